@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Player actions shared by every frontend (PygameInterface, ConsoleFrontend).
+
+GameActions owns the rules a frontend must not reimplement: one action per
+cooldown (10 s after a shot or scout, 20 s after a move), moves of exactly
+one cell in x or y inside the grid, and leaving the match. Each accepted
+action is sent, logged to the EventChannel as EV_ACTION and starts the
+cooldown; a refused one raises ActionRefused with a message for the player:
+
+    actions = GameActions(GRID_SIZE, globals(), lock, send_udp_to_all, send_message, events)
+    try:
+        actions.shot(3, 4)
+    except ActionRefused as e:
+        print(e)
+
+Position, hit count and the game_running flag live in main's globals when
+game_running_ref is that dict (so main answers shots with the position the
+frontend moved to). Otherwise game_running_ref is the initial flag, the
+values given here are used and `on_game_running(value)` (optional) is
+called whenever the frontend changes the flag.
+"""
+
+import time
+
+from events import EventChannel, EV_ACTION
+
+SHOT_COOLDOWN = 10.0
+SCOUT_COOLDOWN = 10.0
+MOVE_COOLDOWN = 20.0
+
+MOVES = {"+x": (1, 0), "-x": (-1, 0), "+y": (0, 1), "-y": (0, -1)}
+
+
+class ActionRefused(Exception):
+    """The action was not sent (cooldown, invalid cell or move)."""
+
+
+class GameActions:
+    """Cooldown-checked player actions over main's send functions."""
+
+    def __init__(self, grid_size, game_running_ref, lock, send_udp_to_all, send_message,
+                 events=None, my_position=(0, 0), times_hit=0, clock=time.monotonic,
+                 on_game_running=None):
+        self.grid_size = grid_size
+        self.game_running_ref = game_running_ref
+        self.lock = lock
+        self.send_udp_to_all = send_udp_to_all
+        self.send_message = send_message
+        self.events = events if events is not None else EventChannel()
+        self.clock = clock
+        self.lock_timer = None  # PerfOverlay (F3) mede a espera pelo lock quando ligado
+        self._my_position = my_position
+        self._times_hit = times_hit
+        self.on_game_running = on_game_running
+        self.ready_at = 0.0     # instante (clock) em que a próxima ação é aceita
+
+    # --- estado compartilhado com main ---
+    @property
+    def my_position(self):
+        if isinstance(self.game_running_ref, dict):
+            return self.game_running_ref.get('my_position', self._my_position)
+        return self._my_position
+
+    @my_position.setter
+    def my_position(self, value):
+        self._my_position = value
+        if isinstance(self.game_running_ref, dict):
+            self.game_running_ref['my_position'] = value
+
+    @property
+    def times_hit(self):
+        if isinstance(self.game_running_ref, dict):
+            return self.game_running_ref.get('times_hit', self._times_hit)
+        return self._times_hit
+
+    @property
+    def game_running(self):
+        if isinstance(self.game_running_ref, dict):
+            return self.game_running_ref.get('game_running', False)
+        return self.game_running_ref
+
+    @game_running.setter
+    def game_running(self, value):
+        if isinstance(self.game_running_ref, dict):
+            self.game_running_ref['game_running'] = value
+        else:
+            self.game_running_ref = value
+        if self.on_game_running is not None:
+            self.on_game_running(value)
+
+    def locked(self):
+        """The shared lock (timed while the F3 overlay is shown)."""
+        timer = self.lock_timer
+        return self.lock if timer is None else timer.timed(self.lock)
+
+    # --- cooldown ---
+    def remaining(self):
+        """Seconds until the next action is accepted (0.0 if ready)."""
+        return max(0.0, self.ready_at - self.clock())
+
+    def ready(self):
+        return self.remaining() <= 0.0
+
+    def _check(self, x, y):
+        if not self.ready():
+            raise ActionRefused(f"Aguarde {int(self.remaining() + 0.999)}s de cooldown antes de outra ação.")
+        if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+            raise ActionRefused(f"Coordenadas fora do grid (0..{self.grid_size - 1}).")
+
+    def _done(self, text, cooldown):
+        self.ready_at = self.clock() + cooldown
+        self.events.post(EV_ACTION, None, text)
+
+    # --- ações ---
+    def shot(self, x, y):
+        self._check(x, y)
+        self.send_udp_to_all(f"shot:{x},{y}")
+        self._done(f"shot:{x},{y}", SHOT_COOLDOWN)
+
+    def scout(self, ip, x, y):
+        self._check(x, y)
+        self.send_message(ip, f"scout:{x},{y}")
+        self._done(f"scout:{x},{y} -> {ip}", SCOUT_COOLDOWN)
+
+    def move_to(self, x, y):
+        """Move to (x, y), which must be one cell away in x or y."""
+        self._check(x, y)
+        with self.locked():
+            cur_x, cur_y = self.my_position
+            if abs(x - cur_x) + abs(y - cur_y) != 1:
+                raise ActionRefused("Movimento inválido: pode mover somente 1 bloco em x ou y.")
+            self.my_position = (x, y)
+        self.send_udp_to_all("moved")
+        self._done(f"move:{x},{y}", MOVE_COOLDOWN)
+
+    def move_by(self, direction):
+        """Move one cell: direction is "+x", "-x", "+y" or "-y"."""
+        if direction not in MOVES:
+            raise ActionRefused("Formato inválido. Use: move {+|-}{x|y}")
+        dx, dy = MOVES[direction]
+        with self.locked():
+            x, y = self.my_position
+        self.move_to(x + dx, y + dy)
+
+    def leave(self):
+        """Leave the match (announces "saindo" once)."""
+        if not self.game_running:
+            return
+        self.game_running = False
+        self.send_udp_to_all("saindo")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Outbound micro-batching: coalesce small messages to the same peer.
+
+OutboundBatcher queues each message per destination and sends the queue as
+ONE frame when the first queued message is `window` seconds old, or as soon
+as the next message would push the frame past `mtu` bytes. A queue holding
+a single message is sent as-is, so batching only changes the wire format
+when it actually saves a send:
+
+    bat:<len:u16><message><len:u16><message>...
+
+split_batch() turns such a frame back into the original messages (receivers
+handle plain and batched datagrams alike). window=0 disables batching:
+every send goes straight out, as before.
+
+Latency/throughput trade-off: a larger window packs more messages per
+syscall but delays the first one by up to `window`; stats reports both the
+packing (messages per frame) and the delay actually added.
+"""
+
+import struct
+import threading
+import time
+from collections import deque
+
+BATCH_PREFIX = b"bat:"
+_LEN = struct.Struct("!H")
+_FRAMING = _LEN.size
+
+EMIT_LOCKS = 64  # locks de envio (ip -> hash % EMIT_LOCKS)
+
+STATS_KEYS = ("messages", "frames", "batched_frames", "flush_window", "flush_full",
+              "flush_urgent", "delay_total", "delay_max")
+
+
+def encode_batch(messages):
+    """One batch frame carrying every message (each shorter than 64 KiB)."""
+    parts = [BATCH_PREFIX]
+    for message in messages:
+        parts.append(_LEN.pack(len(message)))
+        parts.append(message)
+    return b"".join(parts)
+
+
+def split_batch(data):
+    """Messages (memoryviews, no copies) of a batch frame; a truncated or
+    malformed tail is dropped."""
+    view = memoryview(data)
+    out = []
+    offset, end = len(BATCH_PREFIX), len(view)
+    while offset + _FRAMING <= end:
+        (size,) = _LEN.unpack_from(view, offset)
+        offset += _FRAMING
+        if offset + size > end:
+            break
+        out.append(view[offset:offset + size])
+        offset += size
+    return out
+
+
+def is_batch(data):
+    return data[:len(BATCH_PREFIX)] == BATCH_PREFIX
+
+
+class _Queue:
+    __slots__ = ("since", "size", "messages")
+
+    def __init__(self, now):
+        self.since = now
+        self.size = len(BATCH_PREFIX)
+        self.messages = []
+
+
+class OutboundBatcher:
+    """Per-destination coalescing in front of a send(ip, data) function.
+
+    Until start() is called (and after stop()) every message is sent
+    immediately, so code that never starts the batcher (benchmarks,
+    tests) sees the old one-send-per-message behavior, without taking
+    any lock.
+
+    Per-peer order is kept by taking a queue and emitting it under the
+    same emit lock (striped by ip), whichever thread flushes it; `send`
+    should therefore not block for long (hand slow sends to a worker).
+    """
+
+    def __init__(self, send, window=0.002, mtu=1200, name="batch"):
+        self.send_now = send
+        self.window = window
+        self.mtu = mtu
+        self.name = name
+        self.stats = dict.fromkeys(STATS_KEYS, 0)
+        self.stats["delay_total"] = 0.0
+        self.stats["delay_max"] = 0.0
+        self._queues = {}         # ip -> _Queue
+        self._deadlines = deque()  # (deadline, ip, queue): janela fixa => já em ordem
+        self._cond = threading.Condition()
+        self._emit_locks = [threading.Lock() for _ in range(EMIT_LOCKS)]
+        self._running = False
+        self._draining = False  # stop() esvaziando as filas
+        self._thread = None
+
+    # --- ciclo de vida ---
+    def start(self):
+        if self._thread is not None or self.window <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._running = True  # _thread já definido: send() deixa o caminho direto
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything still queued and go back to unbatched sends."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._draining = True
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            self._draining = False
+
+    def flush(self):
+        with self._cond:
+            ips = list(self._queues)
+            self._deadlines.clear()
+        for ip in ips:
+            with self._emit_lock(ip):
+                with self._cond:
+                    messages = self._take(ip, "flush_window") if ip in self._queues else None
+                if messages:
+                    self._emit(ip, messages)
+
+    def _emit_lock(self, ip):
+        return self._emit_locks[hash(ip) % EMIT_LOCKS]
+
+    # --- envio ---
+    def send(self, ip, data, urgent=False):
+        """Queue data for ip. urgent=True sends it right away (after whatever
+        is already queued for ip, to keep the order), e.g. ping/pong."""
+        if self._thread is None and not self._draining and not self._queues:
+            # parado e sem filas: nada a ordenar, envia direto (sem locks)
+            stats = self.stats
+            stats["messages"] += 1
+            stats["frames"] += 1
+            self._emit(ip, (data,))
+            return
+        with self._emit_lock(ip):
+            due = []  # filas a enviar, em ordem (fora do _cond, dentro do lock de envio)
+            with self._cond:
+                queue = self._queues.get(ip)
+                if urgent or not self._running:
+                    if queue is not None:
+                        due.append(self._take(ip, "flush_urgent"))
+                    self.stats["messages"] += 1
+                    self.stats["frames"] += 1
+                    due.append([data])
+                else:
+                    if queue is not None and queue.size + _FRAMING + len(data) > self.mtu:
+                        due.append(self._take(ip, "flush_full"))
+                        queue = None
+                    if queue is None:
+                        now = time.monotonic()
+                        queue = self._queues[ip] = _Queue(now)
+                        self._deadlines.append((now + self.window, ip, queue))
+                        if len(self._deadlines) == 1:
+                            self._cond.notify()
+                    queue.messages.append(data)
+                    queue.size += _FRAMING + len(data)
+                    if queue.size >= self.mtu:
+                        due.append(self._take(ip, "flush_full"))
+            for messages in due:
+                self._emit(ip, messages)
+
+    def _take(self, ip, reason):
+        """Remove ip's queue (lock held) and account for it; returns its messages."""
+        queue = self._queues.pop(ip)
+        delay = time.monotonic() - queue.since
+        stats = self.stats
+        stats["messages"] += len(queue.messages)
+        stats["frames"] += 1
+        if len(queue.messages) > 1:
+            stats["batched_frames"] += 1
+        stats[reason] += 1
+        stats["delay_total"] += delay
+        if delay > stats["delay_max"]:
+            stats["delay_max"] = delay
+        return queue.messages
+
+    def _emit(self, ip, messages):
+        data = messages[0] if len(messages) == 1 else encode_batch(messages)
+        try:
+            self.send_now(ip, data)
+        except Exception as e:
+            print(f"Erro ao enviar lote para {ip}: {e}")
+
+    def _run(self):
+        while True:
+            due = []
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, ip, queue = self._deadlines.popleft()
+                    if self._queues.get(ip) is queue:
+                        due.append((ip, queue))
+                if not due:
+                    if self._deadlines:
+                        self._cond.wait(self._deadlines[0][0] - now)
+                    continue
+            for ip, queue in due:
+                # tira e envia sob o lock de envio do ip: nada do mesmo peer passa na frente
+                with self._emit_lock(ip):
+                    with self._cond:
+                        if self._queues.get(ip) is not queue:
+                            continue  # já foi enviada por send() (cheia/urgente)
+                        messages = self._take(ip, "flush_window")
+                    self._emit(ip, messages)
+
+    # --- métricas ---
+    def snapshot(self, prefix=""):
+        """Counters plus derived averages, keys prefixed (for get_net_stats)."""
+        with self._cond:
+            stats = dict(self.stats)
+        frames = stats["frames"]
+        queued = stats["flush_window"] + stats["flush_full"] + stats["flush_urgent"]
+        stats["messages_per_frame"] = round(stats["messages"] / frames, 2) if frames else 0.0
+        stats["delay_avg_ms"] = round(stats["delay_total"] / queued * 1000.0, 3) if queued else 0.0
+        stats["delay_max_ms"] = round(stats.pop("delay_max") * 1000.0, 3)
+        del stats["delay_total"]
+        stats["window_ms"] = self.window * 1000.0
+        return {prefix + key: value for key, value in stats.items()}
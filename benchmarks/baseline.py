@@ -0,0 +1,97 @@
+"""
+JSON baselines shared by the benchmark scripts.
+
+A result set maps a metric name to {"value": float, "unit": str,
+"better": "higher" | "lower"}. save() stores it next to the machine info;
+compare() lists the metrics that got worse than the baseline by more than
+`tolerance` (a fraction: 0.2 = 20%).
+"""
+
+import json
+import os
+import platform
+import sys
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def metric(value, unit, better):
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def default_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        "machine": {"python": sys.version.split()[0], "platform": platform.platform()},
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, tolerance):
+    """[(name, baseline_value, value, change)] for every regression."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if current["better"] == "higher" else change
+        if worse > tolerance:
+            regressions.append((name, base["value"], current["value"], change))
+    return regressions
+
+
+def report(results, baseline=None):
+    """Print one line per metric (with the change vs. baseline, if any)."""
+    width = max((len(name) for name in results), default=0)
+    for name, current in results.items():
+        line = f"{name:<{width}}  {current['value']:>12.2f} {current['unit']}"
+        base = (baseline or {}).get(name)
+        if base is not None and base["value"]:
+            change = (current["value"] - base["value"]) / base["value"]
+            line += f"   ({change:+.1%} vs {base['value']:.2f})"
+        print(line)
+
+
+def finish(name, results, args):
+    """Common tail of the benchmark CLIs: --save / --compare handling.
+    Returns the process exit status."""
+    path = args.baseline or default_path(name)
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"FAIL: could not read baseline {path}: {e}")
+            return 1
+    report(results, baseline)
+    if args.save:
+        save(path, results)
+        print(f"baseline saved to {path}")
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for metric_name, base, value, change in regressions:
+        print(f"REGRESSION: {metric_name}: {value:.2f} vs baseline {base:.2f} ({change:+.1%})")
+    return 1 if regressions else 0
+
+
+def add_arguments(parser):
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare against the baseline; exit 1 on regressions")
+    parser.add_argument("--baseline", help="baseline file (default: benchmarks/baselines/<name>.json)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before flagging (fraction, default 0.25)")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Frame-time micro-benchmark for the pygame scenes (offline, SDL dummy driver).
+
+Drives each scene exactly like SceneManager does for one frame
+(update() + draw() + display.flip()), without the pacing sleep, and reports
+the median and 95th-percentile frame time. The game screen is measured with
+a populated room: many participants with RTT samples and a full history.
+
+    python benchmarks/frames.py --save      # record benchmarks/baselines/frames.json
+    python benchmarks/frames.py --compare   # exit 1 if a scene got >25% slower
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import baseline  # noqa: E402  (benchmarks/baseline.py)
+
+
+def game_scene(ui, participants_count, history_count):
+    from events import EventChannel
+    from latency import LatencyTable
+
+    participants = {f"10.1.{i >> 8}.{i & 255}" for i in range(participants_count)}
+    latency = LatencyTable()
+    for i, ip in enumerate(sorted(participants)):
+        latency.sample(ip, 0.001 + (i % 50) / 1000.0)
+    state = {"game_running": True, "my_position": (3, 4), "times_hit": 2}
+    scene = ui.PygameInterface(
+        grid_size=10, my_position=(3, 4), my_ip="10.0.0.1",
+        participants=participants, players_hit=set(), times_hit=2,
+        game_running_ref=state, lock=threading.Lock(),
+        send_udp_to_all=lambda message: None, send_message=lambda ip, message: None,
+        events=EventChannel(), latency=latency)
+    for i in range(history_count):
+        scene.action_history.append((time.time(), f"shot:{i % 10},{i // 10 % 10} -> 10.1.0.{i}"))
+    return scene
+
+
+def frame_times(ui, display, scene, frames):
+    display.open(scene.size, scene.caption)
+    scene.running = True
+    scene.enter(display)
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        scene.update()
+        ui.pygame.event.pump()
+        scene.draw(display.screen)
+        ui.pygame.display.flip()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    scene.exit()
+    return times
+
+
+def run(frames, participants_count, history_count):
+    import ui
+    if not ui.PYGAME_AVAILABLE:
+        raise SystemExit("pygame not available")
+    display = ui.Display()
+    scenes = [
+        ("menu", ui.MenuScreen()),
+        ("game", game_scene(ui, participants_count, history_count)),
+        ("score", ui.ScoreScreen(12, 14, 2)),
+    ]
+    results = {}
+    try:
+        for name, scene in scenes:
+            frame_times(ui, display, scene, max(5, frames // 10))  # aquecimento (fontes, superfícies)
+            times = sorted(frame_times(ui, display, scene, frames))
+            results[f"{name}_frame_ms_median"] = baseline.metric(statistics.median(times), "ms", "lower")
+            results[f"{name}_frame_ms_p95"] = baseline.metric(
+                times[int(len(times) * 0.95) - 1], "ms", "lower")
+    finally:
+        display.close()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=50)
+    baseline.add_arguments(parser)
+    args = parser.parse_args()
+    return baseline.finish("frames", run(args.frames, args.participants, args.history), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
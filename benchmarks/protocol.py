@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Protocol micro-benchmark: messages/second through main's real handlers.
+
+Each message type goes through handle_message() (and a burst of shots
+through dispatch_batch()) with the network replaced by a transport that
+drops every send, so only parsing, dispatch and state updates are timed.
+
+    python benchmarks/protocol.py --save      # record benchmarks/baselines/protocol.json
+    python benchmarks/protocol.py --compare   # exit 1 if a type got >25% slower
+"""
+
+import argparse
+import contextlib
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import baseline  # noqa: E402  (benchmarks/baseline.py)
+from transport import Transport  # noqa: E402
+
+MY_IP = "10.0.0.1"
+PEER_IP = "10.0.0.2"
+
+
+class NullTransport(Transport):
+    """Every send succeeds instantly and goes nowhere."""
+
+    local_ip = MY_IP
+
+    def __init__(self):
+        super().__init__()
+        self.sends = 0
+
+    def start(self, on_datagrams, on_stream, accept=None):
+        self._stopping.clear()
+        return True
+
+    def _send(self, *args):
+        self.sends += 1
+
+    send_datagram = broadcast = send_group = _send
+
+    def send_stream(self, ip, data, timeout=None):
+        self.sends += 1
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        self.multicast_group = group
+
+
+def ip_list(n):
+    return [f"10.1.{i >> 8}.{i & 255}" for i in range(n)]
+
+
+def cases():
+    """(name, messages per call, callable(main)) for every measured type."""
+    def single(data):
+        return lambda main: main.handle_message(data, PEER_IP, "udp")
+
+    shot_burst = [(b"shot:7,7", PEER_IP)] * 64
+    out = [
+        ("shot", 1, single(b"shot:7,7")),
+        ("shot_batch64", 64, lambda main: main.dispatch_batch(shot_burst, "udp")),
+        ("scout", 1, single(b"scout:3,4")),
+        ("info", 1, single(b"info:1,-1")),
+        ("moved", 1, single(b"moved")),
+    ]
+    for n in (10, 100, 1000):
+        data = f"participantes:{ip_list(n)}".encode()
+        out.append((f"participantes_{n}", 1,
+                    lambda main, data=data: main.handle_message(data, PEER_IP, "tcp")))
+    return out
+
+
+def setup_main():
+    import main
+    main.use_transport(NullTransport())
+    main.LOG_MESSAGES = False
+    main.my_ip = MY_IP
+    main.my_position = (0, 0)  # shots at 7,7 / scouts at 3,4 miss
+    main.participants.add(PEER_IP)
+    return main
+
+
+def measure(main, fn, per_call, min_time, repeats=5):
+    """Best-of-`repeats` messages/second, each run at least min_time seconds
+    (GC off while timing; the best run is the least disturbed one)."""
+    best = 0.0
+    calls = 1
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                fn(main)
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time:
+                break
+            calls *= 2
+        gc.enable()
+        main.reliable.reset()  # replies (scout -> info) pile up as unacked frames
+        best = max(best, calls * per_call / elapsed)
+    return best
+
+
+def run(min_time):
+    main = setup_main()
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, per_call, fn in cases():
+            results[f"{name}_msgs_per_s"] = baseline.metric(
+                measure(main, fn, per_call, min_time), "msg/s", "higher")
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    baseline.add_arguments(parser)
+    args = parser.parse_args()
+    return baseline.finish("protocol", run(args.min_time), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the headless path.
+
+Measures:
+  - import time of `main` in a fresh interpreter (and that pygame is NOT imported)
+  - time-to-first-message: start_servers() until a "Conectando" from a peer
+    has been handled (signaled through the event channel, no polling)
+
+Exits with status 1 when a limit is exceeded, so it can guard regressions:
+    python benchmarks/startup.py --max-import-ms 200 --max-ready-ms 300
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "import main\n"
+    "print((time.perf_counter() - t) * 1000.0, 'pygame' in sys.modules)\n"
+)
+
+
+def free_port(kind):
+    s = socket.socket(socket.AF_INET, kind)
+    s.bind(('', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def bench_import(runs):
+    times = []
+    pygame_loaded = False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        pygame_loaded = pygame_loaded or out[1] == "True"
+    return {"import_ms_median": statistics.median(times), "import_ms_max": max(times),
+            "pygame_imported": pygame_loaded}
+
+
+def bench_first_message(peer_ip="127.0.0.2"):
+    import main
+
+    main.UDP_PORT = free_port(socket.SOCK_DGRAM)
+    main.TCP_PORT = free_port(socket.SOCK_STREAM)
+    main.use_transport(main.make_transport())
+    main.my_ip = "127.0.0.1"
+    main.game_running = True
+    main.events.clear()
+    handled = threading.Event()
+    main.events.notify = handled.set
+
+    t0 = time.perf_counter()
+    if not main.start_servers():
+        raise SystemExit("start_servers() failed (ports in use?)")
+    t_ready = time.perf_counter()
+
+    peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    peer.bind((peer_ip, 0))
+    peer.sendto(b"Conectando", ("127.0.0.1", main.UDP_PORT))
+    ok = handled.wait(5.0)
+    t_msg = time.perf_counter()
+    peer.close()
+    main.shutdown_servers()
+
+    return {"ready_ms": (t_ready - t0) * 1000.0,
+            "first_message_ms": (t_msg - t0) * 1000.0 if ok else None}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=250.0)
+    parser.add_argument("--max-ready-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    results = bench_import(args.runs)
+    results.update(bench_first_message())
+    print(json.dumps(results, indent=2))
+
+    failures = []
+    if results["pygame_imported"]:
+        failures.append("pygame imported on the headless path")
+    if results["import_ms_median"] > args.max_import_ms:
+        failures.append(f"import {results['import_ms_median']:.1f} ms > {args.max_import_ms} ms")
+    if results["first_message_ms"] is None:
+        failures.append("first message never handled")
+    elif results["first_message_ms"] > args.max_ready_ms:
+        failures.append(f"first message {results['first_message_ms']:.1f} ms > {args.max_ready_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
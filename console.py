@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Terminal frontend for headless games, driven by a selectors event loop.
+
+One thread waits on stdin, a wake-up socket and the next timer at once, so
+while the player is typing the console still shows incoming events (hits,
+joins, departures, scout hints) as they are posted, a status line whenever
+position/hits/participants change, and a "pronto" notice when the action
+cooldown ends. The game ending (game_running cleared by the network or the
+UI) is noticed within TICK seconds. Actions go through actions.GameActions,
+the same API PygameInterface uses.
+
+    shot X Y | scout X Y IP | move {+|-}{x|y} | move X Y | status | sair
+
+stdin reaching EOF (e.g. a server started with </dev/null) only stops the
+input: the node keeps playing its part until the match ends. Where stdin
+cannot be selected (Windows consoles) a reader thread feeds the same loop.
+"""
+
+import heapq
+import itertools
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from actions import ActionRefused
+from events import EV_ACTION
+
+TICK = 0.25     # s máximos sem olhar game_running
+PROMPT = "> "
+HELP = "Ação (shot X Y | scout X Y IP | move {+|-}{x|y} | move X Y | status | sair)"
+
+
+def parse_command(line):
+    """(cmd lowercased, args with their case preserved — IPs)."""
+    parts = line.split()
+    if not parts:
+        return "", []
+    return parts[0].lower(), parts[1:]
+
+
+class ConsoleFrontend:
+    """Non-blocking console over GameActions (see module doc)."""
+
+    def __init__(self, actions, my_ip, participants, players_hit, events,
+                 latency=None, stdin=None, out=None):
+        self.actions = actions
+        self.my_ip = my_ip
+        self.participants = participants
+        self.players_hit = players_hit
+        self.events = events
+        self.latency = latency
+        self.stdin = stdin if stdin is not None else sys.stdin
+        self.out = out if out is not None else sys.stdout
+        self.selector = None
+        self._wake_r = self._wake_w = None
+        self._wake_pending = False
+        self._timers = []        # heap (when, seq, fn)
+        self._seq = itertools.count()
+        self._partial = ""
+        self._lines = deque()    # linhas lidas pela thread de fallback
+        self._input_open = False
+        self._prompt_shown = False
+        self._last_status = None
+        self._ready_timer_at = None
+
+    # --- saída ---
+    def _write(self, text):
+        if self._prompt_shown:
+            # escreve por cima do prompt; ele volta depois da rajada de saída
+            self.out.write("\r")
+            self._prompt_shown = False
+        self.out.write(text + "\n")
+        self.out.flush()
+
+    def _show_prompt(self):
+        if self._input_open and not self._prompt_shown:
+            self.out.write(PROMPT)
+            self.out.flush()
+            self._prompt_shown = True
+
+    def _status(self):
+        with self.actions.locked():
+            state = (self.actions.my_position, self.actions.times_hit,
+                     len(self.players_hit), len(self.participants))
+        return state
+
+    def print_status(self, full=False):
+        state = self._status()
+        self._last_status = state
+        pos, times_hit, hits, peers = state
+        remaining = self.actions.remaining()
+        ready = f"cooldown {int(remaining + 0.999)}s" if remaining > 0 else "pronto"
+        self._write(f"[Status] pos {pos} | atingido {times_hit} | acertou {hits} "
+                    f"| participantes {peers} | {ready}")
+        if full:
+            with self.actions.locked():
+                current = sorted(self.participants)
+            for ip in current:
+                rtt = f"  {self.latency.describe(ip)}" if self.latency is not None else ""
+                self._write(f"    {ip}{rtt}")
+
+    # --- timers e wake-up ---
+    def call_later(self, delay, fn):
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), fn))
+
+    def _run_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            heapq.heappop(self._timers)[2]()
+
+    def _timeout(self):
+        if not self._timers:
+            return TICK
+        return max(0.0, min(TICK, self._timers[0][0] - time.monotonic()))
+
+    def wake(self):
+        """Interrupt the select (any thread); repeated calls are coalesced."""
+        if self._wake_pending or self._wake_w is None:
+            return
+        self._wake_pending = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # buffer cheio: o loop já vai acordar
+
+    def _on_wake(self):
+        self._wake_pending = False
+        try:
+            while self._wake_r.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    # --- entrada ---
+    def _open(self):
+        self.selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, self._on_wake)
+        self.events.notify = self.wake
+        self._input_open = True
+        try:
+            self.selector.register(self.stdin.fileno(), selectors.EVENT_READ, self._on_stdin)
+        except (OSError, ValueError, AttributeError):
+            # stdin não selecionável (console do Windows, pipes em alguns sistemas)
+            threading.Thread(target=self._read_lines, name="console-input", daemon=True).start()
+
+    def _close(self):
+        self.events.notify = None
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        for sock in (self._wake_r, self._wake_w):
+            if sock is not None:
+                sock.close()
+        self._wake_r = self._wake_w = None
+
+    def _on_stdin(self):
+        try:
+            data = os.read(self.stdin.fileno(), 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        if not data:
+            self._end_of_input()
+            return
+        lines = (self._partial + data.decode(errors="replace")).split("\n")
+        self._partial = lines.pop()
+        self._prompt_shown = False  # o Enter do jogador já encerrou a linha do prompt
+        for line in lines:
+            self.execute(line)
+
+    def _read_lines(self):
+        for line in self.stdin:
+            self._lines.append(line)
+            self.wake()
+        self._lines.append(None)
+        self.wake()
+
+    def _take_lines(self):
+        while self._lines:
+            line = self._lines.popleft()
+            self._prompt_shown = False
+            if line is None:
+                self._end_of_input()
+            else:
+                self.execute(line)
+
+    def _end_of_input(self):
+        if self.selector is not None:
+            try:
+                self.selector.unregister(self.stdin.fileno())
+            except (KeyError, ValueError, OSError):
+                pass
+        self._input_open = False
+        self._write("[Console] entrada encerrada; o jogo segue até a partida acabar.")
+
+    # --- comandos ---
+    def execute(self, line):
+        """Run one line typed by the player."""
+        cmd, args = parse_command(line)
+        if not cmd:
+            return
+        actions = self.actions
+        try:
+            if cmd == "shot" and len(args) == 2:
+                actions.shot(int(args[0]), int(args[1]))
+            elif cmd == "scout" and len(args) == 3:
+                actions.scout(args[2], int(args[0]), int(args[1]))
+            elif cmd == "move" and len(args) == 1:
+                actions.move_by(args[0])
+            elif cmd == "move" and len(args) == 2:
+                actions.move_to(int(args[0]), int(args[1]))
+            elif cmd == "status":
+                self.print_status(full=True)
+            elif cmd in ("sair", "quit", "exit"):
+                actions.leave()
+            elif cmd in ("shot", "scout", "move"):
+                self._write(f"Formato inválido. {HELP}")
+            else:
+                self._write(f"Comando inválido. {HELP}")
+        except ValueError:
+            self._write("Coordenadas devem ser inteiros.")
+        except ActionRefused as e:
+            self._write(str(e))
+        except Exception as e:
+            self._write(f"Erro ao enviar ação: {e}")
+        self._schedule_ready()
+
+    def _schedule_ready(self):
+        """Timer that announces the end of the current cooldown (once)."""
+        remaining = self.actions.remaining()
+        if remaining <= 0:
+            return
+        ready_at = self.actions.ready_at
+        if self._ready_timer_at == ready_at:
+            return
+        self._ready_timer_at = ready_at
+
+        def ready():
+            if self.actions.ready_at == ready_at and self.actions.game_running:
+                self._write("[Pronto] próxima ação liberada.")
+        self.call_later(remaining, ready)
+
+    # --- eventos da rede ---
+    def _drain_events(self):
+        for event in self.events.drain():
+            if not event.text:
+                continue
+            stamp = time.strftime("%H:%M:%S", time.localtime(event.ts))
+            tag = "Ação Enviada" if event.kind == EV_ACTION else "Evento"
+            self._write(f"[{stamp}] [{tag}] {event.text}")
+        if self._status() != self._last_status:
+            self.print_status()
+
+    # --- loop ---
+    def run(self):
+        """Until the match ends (sair, Ctrl+C is left to the caller)."""
+        self._open()
+        try:
+            self._write(f"Jogando como {self.my_ip}. {HELP}")
+            self.print_status(full=True)
+            while self.actions.game_running:
+                self._show_prompt()
+                for key, _ in self.selector.select(self._timeout()):
+                    key.data()
+                self._take_lines()
+                self._run_timers()
+                self._drain_events()
+        finally:
+            self._close()
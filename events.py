@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Event channel between network threads and the UI.
+
+Receiver threads post typed GameEvents; the UI (single consumer) drains them
+once per frame. The channel is a bounded deque ring: append/popleft are
+atomic, so neither side takes a lock.
+"""
+
+import time
+from collections import deque, namedtuple
+
+# Event kinds
+EV_ACTION = "action"    # local action (shot/scout/move sent)
+EV_JOINED = "joined"    # new participant
+EV_LEFT = "left"        # participant left ("saindo")
+EV_HIT_BY = "hit_by"    # we were hit
+EV_HIT = "hit"          # our shot hit someone
+EV_INFO = "info"        # scout hint received
+EV_MOVED = "moved"      # participant moved
+
+GameEvent = namedtuple("GameEvent", "kind ip text ts")
+
+
+class EventChannel:
+    """Bounded multi-producer / single-consumer event ring.
+
+    When full, the oldest event is overwritten and `dropped` is incremented.
+    `notify` (optional) is called after each post, e.g. to wake the renderer.
+    """
+
+    def __init__(self, maxlen=1024, notify=None):
+        self._queue = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.notify = notify
+
+    def __len__(self):
+        return len(self._queue)
+
+    def post(self, kind, ip=None, text=""):
+        """Queue an event (any thread)."""
+        queue = self._queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(GameEvent(kind, ip, text, time.time()))
+        notify = self.notify
+        if notify is not None:
+            notify()
+
+    def clear(self):
+        """Discard queued events (e.g. left over from a previous match)."""
+        self._queue.clear()
+
+    def drain(self):
+        """Yield the events queued so far (consumer thread only)."""
+        pop = self._queue.popleft
+        for _ in range(len(self._queue)):
+            try:
+                yield pop()
+            except IndexError:
+                return
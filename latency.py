@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Per-peer round-trip time, jitter and liveness.
+
+Samples come from ping/pong messages (ping:<t_ns> -> pong:<t_ns>, the
+sender's own monotonic clock echoed back) and from reliable-UDP acks.
+Timeouts, retransmission intervals and failure detection are derived from
+the measurements, so peers on the same switch fail fast while peers on a
+slow link get more slack.
+"""
+
+import threading
+import time
+
+PING_INTERVAL = 1.0     # s between pings to each participant
+
+INITIAL_RTO = 0.5       # s, before any RTT sample
+MIN_RTO = 0.05
+MAX_RTO = 3.0
+
+DEFAULT_SEND_TIMEOUT = 3.0  # s, for peers never measured
+MIN_SEND_TIMEOUT = 0.2
+MAX_SEND_TIMEOUT = 5.0
+
+MIN_FAILURE_TIMEOUT = 3 * PING_INTERVAL  # silence before a peer is declared gone
+FAILURE_RTO_FACTOR = 8
+
+
+class RttEstimator:
+    """Smoothed RTT / RTT variance (RFC 6298) for one peer, plus liveness."""
+
+    __slots__ = ("srtt", "rttvar", "last_seen")
+
+    def __init__(self, now=None):
+        self.srtt = None
+        self.rttvar = None
+        self.last_seen = time.monotonic() if now is None else now
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def rto(self):
+        if self.srtt is None:
+            return INITIAL_RTO
+        return min(MAX_RTO, max(MIN_RTO, self.srtt + 4.0 * self.rttvar))
+
+
+class LatencyTable:
+    """RttEstimator per peer IP (thread-safe)."""
+
+    def __init__(self):
+        self._peers = {}
+        self._lock = threading.Lock()
+
+    def _get(self, ip, now=None):
+        peer = self._peers.get(ip)
+        if peer is None:
+            with self._lock:
+                peer = self._peers.get(ip)
+                if peer is None:
+                    peer = self._peers[ip] = RttEstimator(now)
+        return peer
+
+    def sample(self, ip, rtt):
+        peer = self._get(ip)
+        with self._lock:
+            peer.sample(rtt)
+        peer.last_seen = time.monotonic()
+
+    def seen(self, ip, now=None):
+        """Any traffic from ip counts as proof of life."""
+        self._get(ip, now).last_seen = time.monotonic() if now is None else now
+
+    def forget(self, ip):
+        with self._lock:
+            self._peers.pop(ip, None)
+
+    def clear(self):
+        with self._lock:
+            self._peers.clear()
+
+    def srtt(self, ip):
+        peer = self._peers.get(ip)
+        return peer.srtt if peer is not None else None
+
+    def jitter(self, ip):
+        peer = self._peers.get(ip)
+        return peer.rttvar if peer is not None else None
+
+    def rto(self, ip):
+        """Retransmission timeout for reliable UDP."""
+        peer = self._peers.get(ip)
+        return peer.rto() if peer is not None else INITIAL_RTO
+
+    def send_timeout(self, ip):
+        """Connect/send timeout for TCP to ip."""
+        peer = self._peers.get(ip)
+        if peer is None or peer.srtt is None:
+            return DEFAULT_SEND_TIMEOUT
+        # a TCP connect+send is ~2 RTTs; leave room for a SYN retransmit
+        timeout = 2 * peer.srtt + 8 * peer.rttvar + MIN_SEND_TIMEOUT
+        return min(MAX_SEND_TIMEOUT, max(MIN_SEND_TIMEOUT, timeout))
+
+    def failure_timeout(self, ip):
+        """Silence after which ip is considered gone."""
+        return max(MIN_FAILURE_TIMEOUT, FAILURE_RTO_FACTOR * self.rto(ip))
+
+    def silent_for(self, ip, now=None):
+        peer = self._peers.get(ip)
+        if peer is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return now - peer.last_seen
+
+    def failed(self, ips, now=None):
+        """The subset of ips that have been silent past their failure timeout."""
+        now = time.monotonic() if now is None else now
+        return [ip for ip in ips if self.silent_for(ip, now) > self.failure_timeout(ip)]
+
+    def describe(self, ip):
+        """Short text for the UI, e.g. '12ms ±3'."""
+        peer = self._peers.get(ip)
+        if peer is None or peer.srtt is None:
+            return "--"
+        return f"{peer.srtt * 1000:.0f}ms ±{peer.rttvar * 1000:.0f}"
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Persistent leaderboard (SQLite) for tournament results.
+
+    matches   one row per played match (tournament, seed) -> id
+    results   one row per (match, player): score, hits, times_hit
+    ratings   running totals per player, updated with an upsert in the same
+              transaction that inserts the match, so rankings never need a
+              scan over `results`
+
+Rankings are read straight from indexes on `ratings` (total score, average
+score, wins), and a player's history from the (player, match_id) index on
+`results`. Recording a match that is already stored (same tournament and
+seed) is a no-op, so an interrupted tournament can simply be run again.
+"""
+
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id           INTEGER PRIMARY KEY,
+    tournament   TEXT    NOT NULL,
+    seed         INTEGER NOT NULL,
+    players      INTEGER NOT NULL,
+    played_at    REAL    NOT NULL,
+    wall_seconds REAL    NOT NULL,
+    UNIQUE (tournament, seed)
+);
+CREATE TABLE IF NOT EXISTS results (
+    match_id  INTEGER NOT NULL REFERENCES matches(id),
+    player    TEXT    NOT NULL,
+    score     INTEGER NOT NULL,
+    hits      INTEGER NOT NULL,
+    times_hit INTEGER NOT NULL,
+    PRIMARY KEY (match_id, player)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ratings (
+    player      TEXT PRIMARY KEY,
+    games       INTEGER NOT NULL,
+    wins        INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    hits        INTEGER NOT NULL,
+    times_hit   INTEGER NOT NULL,
+    best        INTEGER NOT NULL,
+    last_played REAL    NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_player ON results (player, match_id);
+CREATE INDEX IF NOT EXISTS ratings_total ON ratings (total_score DESC, player);
+CREATE INDEX IF NOT EXISTS ratings_wins ON ratings (wins DESC, player);
+CREATE INDEX IF NOT EXISTS ratings_average ON ratings ((total_score * 1.0 / games) DESC, player);
+"""
+
+# coluna de ordenação -> expressão (igual à dos índices, para o planner usá-los)
+ORDERS = {
+    "total": "total_score",
+    "wins": "wins",
+    "average": "(total_score * 1.0 / games)",
+}
+
+_UPSERT_RATING = """
+INSERT INTO ratings (player, games, wins, total_score, hits, times_hit, best, last_played)
+VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    games       = games + 1,
+    wins        = wins + excluded.wins,
+    total_score = total_score + excluded.total_score,
+    hits        = hits + excluded.hits,
+    times_hit   = times_hit + excluded.times_hit,
+    best        = max(best, excluded.best),
+    last_played = excluded.last_played
+"""
+
+
+class Leaderboard:
+    """One SQLite file; use from a single thread/process (the tournament's
+    collector), readers may open the same file concurrently (WAL)."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # WAL: perde no máximo o último commit
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # --- escrita ---
+    def record(self, tournament, seed, results, wall_seconds=0.0, played_at=None):
+        """Store one match. results: [(player, score, hits, times_hit)].
+        Returns False if the match was already recorded."""
+        with self.db:
+            return self._record(tournament, seed, results, wall_seconds, played_at)
+
+    def record_many(self, matches):
+        """Store several matches in one transaction (much cheaper per match).
+        matches: [(tournament, seed, results, wall_seconds)]. Returns how many
+        were new."""
+        added = 0
+        with self.db:
+            for tournament, seed, results, wall_seconds in matches:
+                added += self._record(tournament, seed, results, wall_seconds, None)
+        return added
+
+    def _record(self, tournament, seed, results, wall_seconds, played_at):
+        played_at = time.time() if played_at is None else played_at
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO matches (tournament, seed, players, played_at, wall_seconds)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (tournament, seed, len(results), played_at, wall_seconds))
+        if cursor.rowcount == 0:
+            return False
+        match_id = cursor.lastrowid
+        self.db.executemany(
+            "INSERT INTO results (match_id, player, score, hits, times_hit) VALUES (?, ?, ?, ?, ?)",
+            [(match_id, player, score, hits, times_hit)
+             for player, score, hits, times_hit in results])
+        best = max((score for _, score, _, _ in results), default=0)
+        self.db.executemany(
+            _UPSERT_RATING,
+            [(player, int(score == best), score, hits, times_hit, score, played_at)
+             for player, score, hits, times_hit in results])
+        return True
+
+    # --- leitura ---
+    def played_seeds(self, tournament):
+        """Seeds of the matches already stored for a tournament."""
+        return {seed for (seed,) in self.db.execute(
+            "SELECT seed FROM matches WHERE tournament = ?", (tournament,))}
+
+    def match_count(self):
+        return self.db.execute("SELECT count(*) FROM matches").fetchone()[0]
+
+    def top(self, limit=10, order="total", min_games=1):
+        """[(rank, player, games, wins, total_score, average, best)]."""
+        expression = ORDERS[order]
+        rows = self.db.execute(
+            f"SELECT player, games, wins, total_score, total_score * 1.0 / games, best"
+            f" FROM ratings WHERE games >= ? ORDER BY {expression} DESC, player LIMIT ?",
+            (min_games, limit))
+        return [(rank,) + tuple(row) for rank, row in enumerate(rows, 1)]
+
+    def player(self, name):
+        """Ratings row of a player as a dict (None if unknown)."""
+        row = self.db.execute(
+            "SELECT games, wins, total_score, hits, times_hit, best, last_played"
+            " FROM ratings WHERE player = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        keys = ("games", "wins", "total_score", "hits", "times_hit", "best", "last_played")
+        return dict(zip(keys, row))
+
+    def rank_of(self, name, order="total"):
+        """1-based position of a player (ties share the better rank), or None."""
+        expression = ORDERS[order]
+        row = self.db.execute(
+            f"SELECT {expression} FROM ratings WHERE player = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        return self.db.execute(
+            f"SELECT count(*) FROM ratings WHERE {expression} > ?", row).fetchone()[0] + 1
+
+    def history(self, name, limit=20):
+        """Most recent matches of a player: [(tournament, seed, score, hits, times_hit)]."""
+        return self.db.execute(
+            "SELECT m.tournament, m.seed, r.score, r.hits, r.times_hit"
+            " FROM results r JOIN matches m ON m.id = r.match_id"
+            " WHERE r.player = ? ORDER BY r.match_id DESC LIMIT ?", (name, limit)).fetchall()
@@ -3,82 +3,229 @@
 PyNetworkBattleship - Network-based Battleship game.
 Main game logic, networking, and state machine.
 
-Networking: UDP/TCP on local network.
+Networking: UDP/TCP on local network, through a pluggable transport
+(transport.py: sockets, asyncio or an in-memory simulated network).
 Grid: 10x10 cells.
 UI: Optional Pygame interface (falls back to console).
 """
 
+import atexit
+import os
 import socket
 import threading
 import random
 import time
 import sys
-import ast
 import traceback
 
-# Importa componentes do ui.py
-try:
-    from ui import MenuScreen, ScoreScreen, PygameInterface, PYGAME_AVAILABLE
-except Exception as e:
-    print(f"Warning: Could not import UI components: {e}")
-    PYGAME_AVAILABLE = False
-    
-    # Classes dummy
-    class MenuScreen:
-        def __init__(self): pass
-        def start(self): pass
-        def join(self, timeout=None): pass
-        @property
-        def choice(self): return "play"
-    
-    class ScoreScreen:
-        def __init__(self, *args, **kwargs): pass
-        def start(self): pass
-        def join(self, timeout=None): pass
-        @property
-        def choice(self): return "menu"
-    
-    class PygameInterface:
-        def __init__(self, *args, **kwargs): pass
-        def start(self): pass
-        def stop(self): pass
-        def join(self, timeout=None): pass
-
-UDP_PORT = 5000
-TCP_PORT = 5001
+from events import (EventChannel, EV_JOINED, EV_LEFT, EV_HIT_BY, EV_HIT,
+                    EV_INFO, EV_MOVED)
+from reliable import ReliableChannel
+from latency import LatencyTable, PING_INTERVAL
+from workers import RateLimiter, SerialQueues, WorkerPool
+from transport import SocketTransport, AsyncioTransport, discover_lan_ip
+from peers import PeerRegistry, PeerSet
+from snapshot import SnapshotWriter, load_snapshot
+from profiling import Profiler
+from actions import GameActions
+from console import ConsoleFrontend
+from spectator import SpectatorPublisher
+from batching import OutboundBatcher, is_batch, split_batch
+
+# Componentes de UI: ui.py (e pygame) só são importados por load_ui(), quando
+# uma janela é pedida. Processos headless usam as classes dummy abaixo.
+PYGAME_AVAILABLE = False
+
+# Classes dummy
+class MenuScreen:
+    def __init__(self): pass
+    def start(self): pass
+    def join(self, timeout=None): pass
+    def is_alive(self): return False
+    @property
+    def choice(self): return "play"
+
+class ScoreScreen:
+    def __init__(self, *args, **kwargs): pass
+    def start(self): pass
+    def join(self, timeout=None): pass
+    def is_alive(self): return False
+    @property
+    def choice(self): return "menu"
+
+class PygameInterface:
+    def __init__(self, *args, **kwargs): pass
+    def start(self): pass
+    def stop(self): pass
+    def join(self, timeout=None): pass
+    def is_alive(self): return False
+
+def shutdown_ui(timeout=2.0): pass
+
+
+def load_ui():
+    """Importa ui.py (pygame/SDL) sob demanda. Retorna True se a UI está disponível."""
+    global MenuScreen, ScoreScreen, PygameInterface, PYGAME_AVAILABLE, shutdown_ui
+    try:
+        import ui
+    except Exception as e:
+        print(f"Warning: Could not import UI components: {e}")
+        return False
+    MenuScreen = ui.MenuScreen
+    ScoreScreen = ui.ScoreScreen
+    PygameInterface = ui.PygameInterface
+    shutdown_ui = ui.shutdown_ui
+    PYGAME_AVAILABLE = ui.PYGAME_AVAILABLE
+    return PYGAME_AVAILABLE
+
+
+UDP_PORT = int(os.environ.get("BATTLESHIP_UDP_PORT", "5000"))
+TCP_PORT = int(os.environ.get("BATTLESHIP_TCP_PORT", "5001"))
 GRID_SIZE = 10
 BROADCAST_ADDR = '255.255.255.255'
 
-participants = set()
+# --- Multicast (opcional): shots, moves e saídas num datagrama só para o grupo ---
+MULTICAST_ENABLED = os.environ.get("BATTLESHIP_MULTICAST") == "1"
+MULTICAST_GROUP = os.environ.get("BATTLESHIP_MCAST_GROUP", "239.255.42.99")
+MULTICAST_TTL = int(os.environ.get("BATTLESHIP_MCAST_TTL", "1"))      # 1 = só a LAN
+MULTICAST_LOOP = os.environ.get("BATTLESHIP_MCAST_LOOP") == "1"      # recebe o próprio envio (testes locais)
+MULTICAST_PREFIXES = ("shot:", "moved", "saindo")
+
+peers = PeerRegistry()  # ip -> id inteiro + PeerStats; os conjuntos abaixo são bitmaps de ids
+participants = PeerSet(peers)
 my_position = (0, 0)
 my_ip = ""
 times_hit = 0
-players_hit = set()
+players_hit = PeerSet(peers)
 game_running = True
-move_penalty = False
-moved = False
 lock = threading.Lock()
 ui_instance = None
+events = EventChannel()  # network -> UI
 
 # --- Network Configuration ---
-TCP_SEND_TIMEOUT = 3.0
-SERVER_ACCEPT_TIMEOUT = 1.0
-UDP_RECV_TIMEOUT = 1.0
+# Timeouts de envio/retransmissão/queda vêm do RTT medido por peer (latency.py)
+RECV_BUFFER_SIZE = 4096  # buffers de recepção pré-alocados (um por thread/conexão)
+UDP_RCVBUF_SIZE = 1 << 20  # SO_RCVBUF pedido ao kernel (aguenta rajadas de shots)
+UDP_BATCH_SIZE = 64        # datagramas drenados por acordada do servidor UDP
+
+# Contadores do receptor (ver get_net_stats)
+net_stats = {
+    "udp_received": 0,      # datagramas lidos
+    "udp_batches": 0,       # acordadas com pelo menos um datagrama
+    "udp_max_batch": 0,     # maior rajada drenada de uma vez
+    "udp_ignored": 0,       # loopback / próprias mensagens
+    "udp_truncated": 0,     # maiores que RECV_BUFFER_SIZE (cortados)
+    "udp_kernel_drops": 0,  # descartados pelo kernel por buffer cheio (SO_RXQ_OVFL)
+    "udp_rate_limited": 0,  # descartados pelo limite por peer
+    "tcp_accepted": 0,      # conexões entregues ao pool
+    "tcp_shed": 0,          # recusadas com a fila do pool cheia
+    "tcp_rate_limited": 0,  # conexões/mensagens acima do limite por peer
+    "tcp_idle_reaped": 0,   # fechadas por ociosidade
+    "tcp_received": 0,      # pedaços lidos de conexões TCP
+    "sent": 0,              # mensagens enviadas (datagramas, TCP, broadcast)
+    "udp_batched_in": 0,    # datagramas recebidos que eram lotes (bat:)
+}
+
+# --- Limites / backpressure ---
+TCP_BACKLOG = 64         # backlog do listen()
+TCP_WORKERS = 8          # threads fixas que atendem conexões TCP
+TCP_QUEUE_SIZE = 32      # conexões aceitas esperando worker; cheia => descarta
+TCP_IDLE_TIMEOUT = 2.0   # s sem dados antes de fechar a conexão
+PEER_RATE = 50.0         # mensagens/s por peer (UDP e TCP, cada um com seu balde)
+PEER_BURST = 100         # rajada máxima por peer
+
+# --- Agrupamento de saída (batching.py): mensagens ao mesmo peer dentro da janela
+# saem num quadro só. Janela maior = menos syscalls, mais latência (ver get_net_stats)
+BATCH_WINDOW = float(os.environ.get("BATTLESHIP_BATCH_WINDOW_MS", "2")) / 1000.0  # 0 desliga
+BATCH_MTU = int(os.environ.get("BATTLESHIP_BATCH_MTU", "1200"))  # bytes por datagrama
+TCP_BATCH_WINDOW = float(os.environ.get("BATTLESHIP_TCP_BATCH_WINDOW_MS", "5")) / 1000.0
+TCP_SEND_DRAIN = 1.0     # s máximos esperando envios TCP pendentes ao encerrar
+
+tcp_pool = WorkerPool(TCP_WORKERS, TCP_QUEUE_SIZE, name="tcp")
+# envios TCP (connect+send, até o timeout do peer): fila por destino sobre um pool
+# próprio, para um peer lento/inalcançável não atrasar os demais
+tcp_send_pool = WorkerPool(TCP_WORKERS, TCP_QUEUE_SIZE, name="tcp-send")
+tcp_senders = SerialQueues(tcp_send_pool)
+udp_limiter = RateLimiter(PEER_RATE, PEER_BURST)
+tcp_limiter = RateLimiter(PEER_RATE, PEER_BURST)
+LOG_MESSAGES = True      # imprime cada mensagem recebida (só então decodifica para str)
+RELIABLE_UDP = True      # shot/scout/hit/info via UDP confiável (reliable.py) em vez de TCP
+RELIABLE_PREFIXES = ("shot:", "scout:", "info:", "hit")
+
+# --- Snapshots: estado salvo periodicamente para retomar a partida após um crash ---
+SNAPSHOT_PATH = os.environ.get(                 # "" desliga
+    "BATTLESHIP_SNAPSHOT",
+    os.path.join(os.path.expanduser("~"), ".pynetworkbattleship", f"state-{UDP_PORT}.json"))
+SNAPSHOT_INTERVAL = 1.0   # s entre amostras (só grava se algo mudou)
+SNAPSHOT_MAX_AGE = 120.0  # s sem gravar nem tocar o snapshot => partida nova
+
+# --- Espectadores: quadros delta/keyframe do meu tabuleiro (spectator.py) ---
+SPECTATOR_RELAY = os.environ.get("BATTLESHIP_SPECTATOR_RELAY", "")  # ip do relay; "" = só diretos
+
+# --- Perfil (opt-in): espera/posse do lock por call site, tempo por handler, amostras ---
+PROFILE = os.environ.get("BATTLESHIP_PROFILE", "")  # "1" = lock + handlers; "sample" = + amostragem
+PROFILE_DIR = os.environ.get("BATTLESHIP_PROFILE_DIR", ".")
+PROFILE_INTERVAL = 0.005  # s entre amostras de stack
+profiler = None
+handler_timer = None      # profiling.HandlerTimer enquanto o perfil está ligado
+
+
+def make_transport(kind="socket"):
+    """Transporte nas portas configuradas: "socket", "asyncio", "shm" (só
+    processos no mesmo host) ou "shm+socket" (mesmo host por memória
+    compartilhada, o resto por UDP/TCP)."""
+    if kind.startswith("shm"):
+        # só carrega multiprocessing.shared_memory quando pedido (tempo de import)
+        from shm_transport import ShmTransport
+    if kind == "shm":
+        return ShmTransport(local_ip=os.environ.get("BATTLESHIP_IP"), stats=net_stats)
+    options = dict(local_ip="", stats=net_stats, rcvbuf=UDP_RCVBUF_SIZE,
+                   batch_size=UDP_BATCH_SIZE, buffer_size=RECV_BUFFER_SIZE,
+                   backlog=TCP_BACKLOG, idle_timeout=TCP_IDLE_TIMEOUT)
+    if kind == "asyncio":
+        return AsyncioTransport(UDP_PORT, TCP_PORT, **options)
+    sockets = SocketTransport(UDP_PORT, TCP_PORT, pool=tcp_pool, **options)
+    if kind == "shm+socket":
+        return ShmTransport(local_ip=os.environ.get("BATTLESHIP_IP"), fallback=sockets)
+    return sockets
+
+# Tudo que sai/entra pela rede passa por aqui (ver use_transport)
+transport = make_transport(os.environ.get("BATTLESHIP_TRANSPORT", "socket"))
+
+def use_transport(new_transport):
+    """Troca o transporte (ex.: um nó de transport.MemoryNetwork em simulações)."""
+    global transport
+    if new_transport is not transport:
+        transport.close()
+        transport = new_transport
+    return transport
+
+def enable_profiling(sample=False):
+    """Liga o perfil: troca o lock global pelo instrumentado e mede os handlers.
+
+    Tem que rodar antes das threads de rede e da UI pegarem o lock. O relatório
+    (e o .folded da amostragem) é gravado na saída do processo.
+    """
+    global profiler, handler_timer, lock
+    if profiler is not None:
+        return profiler
+    profiler = Profiler(sample=sample, interval=PROFILE_INTERVAL, out_dir=PROFILE_DIR)
+    lock = profiler.wrap_lock(lock, "lock")
+    handler_timer = profiler.handlers
+    profiler.start()
+    atexit.register(profiler.write)
+    return profiler
 
 
 # -------------------------
 # UTILIDADES
 # -------------------------
 def safe_decode(data):
-    #Decodifica bytes para str de forma segura
+    #Decodifica bytes (ou memoryview/bytearray) para str de forma segura
     try:
-        return data.decode().strip()
+        return str(data, 'utf-8', 'replace').strip()
     except Exception:
-        # tenta com erros substituídos
-        try:
-            return data.decode(errors='replace').strip()
-        except Exception:
-            return ""
+        return ""
 
 def print_exc_context(prefix=""):
     """Imprime traceback para debug de exceptions."""
@@ -90,65 +237,138 @@ def print_exc_context(prefix=""):
 # =============================================================================
 
 def get_my_ip():
-    #Descobre IP local 'visível' conectando a um destino externo (não envia dados)
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        # destino arbitrário; não envia pacotes
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
+    #Descobre o IP local da interface de broadcast da LAN, sem precisar de rota externa
+    ip = os.environ.get("BATTLESHIP_IP") or transport.local_ip
+    if ip:
+        return ip
+    ip = discover_lan_ip(UDP_PORT)
+    if ip:
         return ip
+    # fallback: endereços do próprio hostname (sem loopback)
+    try:
+        for addr in socket.gethostbyname_ex(socket.gethostname())[2]:
+            if not addr.startswith("127."):
+                return addr
     except Exception:
-        return "127.0.0.1"
+        pass
+    return "127.0.0.1"
 
 def send_broadcast_udp(message):
     #Envia mensagem UDP em broadcast
     try:
-        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-        udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        # Reuseaddr pode ajudar em alguns sistemas
-        try:
-            udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        except Exception:
-            pass
-        # bind em porta efêmera para controlar interface de envio em alguns ambientes
-        try:
-            udp_socket.bind(('', 0))
-        except Exception:
-            pass
-        udp_socket.sendto(message.encode(), (BROADCAST_ADDR, UDP_PORT))
-        udp_socket.close()
+        transport.broadcast(message.encode())
+        net_stats["sent"] += 1
         print(f"[UDP Broadcast Enviado]: {message}")
     except Exception as e:
         print(f"Erro ao enviar broadcast: {e}")
         print_exc_context()
 
+def _send_multicast_raw(data):
+    #Envia um datagrama para o grupo multicast do jogo
+    try:
+        transport.send_group(data)
+        net_stats["sent"] += 1
+    except Exception as e:
+        print(f"Erro ao enviar multicast: {e}")
+
 def send_udp_to_all(message):
     #Envia UDP para cada participante conhecido (thread-safe)
+    # Com multicast: um datagrama para o grupo (shots confiáveis: o canal
+    # retransmite por unicast só para quem não confirmou).
     with lock:
-        current_participants = list(participants)
+        ids = list(participants.ids())
+    current_participants = [peers.ip(pid) for pid in ids]
+    for pid in ids:
+        peers.stats(pid).sent += 1
+    if MULTICAST_ENABLED and message.startswith(MULTICAST_PREFIXES):
+        if RELIABLE_UDP and message.startswith(RELIABLE_PREFIXES):
+            reliable.send_group(current_participants, message, _send_multicast_raw)
+        elif current_participants:
+            _send_multicast_raw(message.encode())
+        if message != "saindo":
+            print(f"[UDP Multicast Enviado]: {message}")
+        return
+    if RELIABLE_UDP and message.startswith(RELIABLE_PREFIXES):
+        for ip in current_participants:
+            reliable.send(ip, message)
+        print(f"[UDP Confiável para Todos]: {message}")
+        return
     try:
-        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        data = message.encode()
         for ip in current_participants:
-            try:
-                udp_socket.sendto(message.encode(), (ip, UDP_PORT))
-            except Exception as e:
-                print(f"Erro ao enviar UDP para {ip}: {e}")
-        udp_socket.close()
+            udp_batcher.send(ip, data)
+        net_stats["sent"] += len(current_participants)
         if message != "saindo":
             print(f"[UDP Enviado para Todos]: {message}")
     except Exception as e:
         print(f"Erro ao enviar UDP para todos: {e}")
         print_exc_context()
 
-def send_tcp_message(ip, message, timeout=TCP_SEND_TIMEOUT):
-    #Envia uma mensagem TCP, com timeout e tratamento
+def _send_datagram_now(ip, data):
+    #sendto de fato (quadros já agrupados pelo udp_batcher)
+    try:
+        transport.send_datagram(ip, data)
+    except Exception as e:
+        print(f"Erro ao enviar UDP para {ip}: {e}")
+
+def _send_stream_now(ip, data):
+    #Lote do tcp_batcher: vai para a fila do destino (o flush não espera o connect)
+    if not tcp_senders.submit(ip, _deliver_stream, ip, data):
+        print(f"Erro ao enviar TCP para {ip}: fila de envio cheia (descartado)")
+
+def _deliver_stream(ip, data):
+    #connect/send/close de fato; só conta/loga "enviado" depois de dar certo
     try:
-        tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        tcp_socket.settimeout(timeout)
-        tcp_socket.connect((ip, TCP_PORT))
-        tcp_socket.sendall(message.encode())
-        tcp_socket.close()
+        transport.send_stream(ip, data, latency.send_timeout(ip))
+    except Exception as e:
+        print(f"Erro ao enviar TCP para {ip}: {e}")
+        return
+    messages = split_batch(data) if is_batch(data) else (data,)
+    net_stats["sent"] += len(messages)
+    for message in messages:
+        print(f"[TCP Enviado para {ip}]: {safe_decode(message)}")
+
+udp_batcher = OutboundBatcher(_send_datagram_now, BATCH_WINDOW, BATCH_MTU, name="udp-batch")
+tcp_batcher = OutboundBatcher(_send_stream_now, TCP_BATCH_WINDOW, RECV_BUFFER_SIZE, name="tcp-batch")
+
+def _send_udp_raw(ip, data, urgent=False):
+    #Envia um datagrama já codificado (canal confiável, ping/pong); urgent=True
+    # não espera a janela de agrupamento (medidas de RTT, quadros de espectador)
+    udp_batcher.send(ip, data, urgent)
+    net_stats["sent"] += 1
+
+def _send_udp_urgent(ip, data):
+    _send_udp_raw(ip, data, urgent=True)
+
+def _on_reliable_fail(ip, message):
+    print(f"Sem confirmação de {ip} para '{message}' (desistindo).")
+
+latency = LatencyTable()  # RTT/jitter/última atividade por peer
+reliable = ReliableChannel(_send_udp_raw, on_fail=_on_reliable_fail, latency=latency)
+
+def send_message(ip, message):
+    #Envia mensagem direta a um peer: UDP confiável quando possível, senão TCP
+    stats = peers.stats_for(ip)
+    if stats is not None:
+        stats.sent += 1
+    if RELIABLE_UDP and message.startswith(RELIABLE_PREFIXES):
+        reliable.send(ip, message)
+        print(f"[UDP Confiável para {ip}]: {message}")
+    else:
+        send_tcp_message(ip, message)
+
+def send_tcp_message(ip, message, timeout=None):
+    #Envia uma mensagem TCP, com timeout (derivado do RTT do peer) e tratamento
+    try:
+        if tcp_batcher.window > 0 and timeout is None:
+            # agrupa com outras respostas ao peer; "enviado" é logado na entrega
+            tcp_batcher.send(ip, message.encode())
+            print(f"[TCP Enfileirado para {ip}]: {message}")
+            return
+        if timeout is None:
+            timeout = latency.send_timeout(ip)
+        transport.send_stream(ip, message.encode(), timeout)
+        net_stats["sent"] += 1
         print(f"[TCP Enviado para {ip}]: {message}")
     except Exception as e:
         print(f"Erro ao enviar TCP para {ip}: {e}")
@@ -158,338 +378,587 @@ def send_tcp_message(ip, message, timeout=TCP_SEND_TIMEOUT):
 # LÓGICA DE MENSAGENS
 # =============================================================================
 
-def handle_message(data, ip, protocol, tcp_conn=None, ui=None):
-    #Processa mensagens recebidas (UDP ou TCP)
-    global times_hit
-    try:
-        message = safe_decode(data)
-        if message == "":
-            return
-        print(f"[Mensagem {protocol.upper()} Recebida de {ip}]: {message}")
-
-        # --- Conexão ---
-        if message == "Conectando":
-            list_str = None
-            with lock:
-                if ip not in participants and ip != my_ip:
-                    participants.add(ip)
-                    print(f"Novo participante: {ip}")
-                    print(f"Lista de participantes atualizada: {list(participants)}")
-                    # inclui todos que conheço + eu mesmo
-                    all_ips = set(participants)
-                    if my_ip:
-                        all_ips.add(my_ip)
-                    list_str = f"participantes:{list(all_ips)}"
-            # responde via TCP com a lista (se tiver algo novo para mandar)
-            if list_str is not None:
+_WHITESPACE = b" \t\r\n\x0b\x0c"
+
+def _strip(view):
+    """Remove espaços (ASCII) das pontas de um memoryview, sem copiar."""
+    start, end = 0, len(view)
+    while start < end and view[start] in _WHITESPACE:
+        start += 1
+    while end > start and view[end - 1] in _WHITESPACE:
+        end -= 1
+    return view[start:end]
+
+def parse_coords(view):
+    """Lê 'x,y' (inteiros ASCII) direto de um memoryview/bytes."""
+    values = [0, 0]
+    idx = 0
+    sign = 1
+    digits = 0
+    for b in view:
+        if 48 <= b <= 57:
+            values[idx] = values[idx] * 10 + (b - 48)
+            digits += 1
+        elif b == 44 and idx == 0 and digits:  # ','
+            values[0] *= sign
+            idx, sign, digits = 1, 1, 0
+        elif b == 45 and not digits and sign == 1:  # '-'
+            sign = -1
+        elif b not in _WHITESPACE:
+            raise ValueError(f"coordenada inválida: {safe_decode(view)!r}")
+    if idx != 1 or not digits:
+        raise ValueError(f"coordenada inválida: {safe_decode(view)!r}")
+    values[1] *= sign
+    return values[0], values[1]
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+def _apply_joins(items):
+    # "Conectando" de um ou mais peers: um único lock para o grupo todo
+    new_ips = []
+    with lock:
+        for _, ip in items:
+            if ip not in participants and ip != my_ip:
                 try:
-                    send_tcp_message(ip, list_str)
-                except Exception:
-                    pass
-
-        elif message.startswith("participantes:"):
-            try:
-                ip_list_str = message.split(":", 1)[1].strip()
-                new_ips = ast.literal_eval(ip_list_str)
-                with lock:
-                    updated = False
-                    for new_ip in new_ips:
-                        if new_ip not in participants and new_ip != my_ip:
-                            participants.add(new_ip)
-                            updated = True
-                    if updated:
-                        print(f"Lista de participantes atualizada: {list(participants)}")
-            except Exception as e:
-                print(f"Erro ao processar lista de participantes: {e}")
-                print_exc_context()
-
-        elif message.startswith("shot:"):
-            try:
-                coords = message.split(':', 1)[1].split(',')
-                x, y = int(coords[0]), int(coords[1])
-                with lock:
-                    if (x, y) == my_position:
-                        print(f"ALERTA: Fui atingido por 'shot' de {ip}!")
-                        times_hit += 1
-                        if ui is not None:
-                            ui._add_action(f"HIT por {ip}")
-                        # Responde com "hit" via TCP
-                        send_tcp_message(ip, "hit")
-            except Exception as e:
-                print(f"Erro ao processar 'shot': {e}")
-                print_exc_context()
-
-        # --- Jogo: scout (TCP preferido) ---
-        elif message.startswith("scout:"):
-            try:
-                coords = message.split(':', 1)[1].split(',')
-                shot_x, shot_y = int(coords[0]), int(coords[1])
-
-                with lock:
-                    my_x, my_y = my_position
-
-                if (shot_x, shot_y) == (my_x, my_y):
-                    print(f"ALERTA: Fui atingido por 'scout' de {ip}!")
-                    with lock:
-                        times_hit += 1
-                    if ui is not None:
-                        ui._add_action(f"HIT por {ip}")
-                    # responde abrindo TCP de volta
-                    send_tcp_message(ip, "hit")
-                else:
-                    # dx = sign(my_x - shot_x), dy = sign(my_y - shot_y)
-                    if my_x > shot_x:
-                        dx = 1
-                    elif my_x < shot_x:
-                        dx = -1
-                    else:
-                        dx = 0
-
-                    if my_y > shot_y:
-                        dy = 1
-                    elif my_y < shot_y:
-                        dy = -1
-                    else:
-                        dy = 0
-
-                    info_msg = f"info:{dx},{dy}"
-                    send_tcp_message(ip, info_msg)
-            except Exception as e:
-                print(f"Erro ao processar 'scout': {e}")
-                print_exc_context()
-
-        elif message == "hit":
-            print(f"SUCESSO: Você atingiu {ip}!")
-            with lock:
-                players_hit.add(ip)
-            if ui is not None:
-                ui._add_action(f"SHOT hit {ip}")
-
-        elif message.startswith("info:"):
-            print(f"INFO (Scout): Pista de {ip}: {message}")
-            if ui is not None:
-                ui._add_action(f"scout info {ip}: {message}")
-
-        elif message == "moved":
-            print(f"INFO: Jogador {ip} se moveu.")
-            ui._add_action(f"INFO: Jogador {ip} se moveu.")
-
-        elif message == "saindo":
-            print(f"INFO: Jogador {ip} saiu do jogo.")
-            ui._add_action(f"INFO: Jogador {ip} saiu do jogo.")
-            with lock:
-                if ip in participants:
-                    participants.remove(ip)
-                    print(f"Lista de participantes atualizada: {list(participants)}")
+                    participants.add(ip)
+                except (OSError, ValueError):
+                    continue  # remetente não-IPv4: ignora só este (como parse_list)
+                new_ips.append(ip)
+                print(f"Novo participante: {ip}")
+        if not new_ips:
+            return
+        print(f"Lista de participantes atualizada: {list(participants)}")
+        # inclui todos que conheço + eu mesmo (mesmo formato de lista de sempre)
+        all_ips = list(participants)
+        if my_ip and my_ip not in participants:
+            all_ips.append(my_ip)
+        list_str = f"participantes:{all_ips}"
+    for ip in new_ips:
+        latency.seen(ip)
+        spectators.unwatch(ip)  # entrou na partida: deixa de receber meu tabuleiro
+        events.post(EV_JOINED, ip, f"INFO: Jogador {ip} entrou no jogo.")
+    # responde via TCP com a lista (só para quem é novo)
+    for ip in new_ips:
+        try:
+            send_tcp_message(ip, list_str)
+        except Exception:
+            pass
 
-        else:
-            print(f"Mensagem desconhecida de {ip}: {message}")
+def _on_conectando(payload, ip):
+    _apply_joins([(payload, ip)])
 
+def _on_participantes(payload, ip):
+    try:
+        # "['a', 'b', ...]": parse simples (sem eval), entradas não-IPv4 ignoradas
+        new_ids = peers.parse_list(safe_decode(payload))
+        my_id = peers.id_of(my_ip)
+        added = []
+        with lock:
+            for pid in new_ids:
+                if pid != my_id and participants.add_id(pid):
+                    added.append(peers.ip(pid))
+            if added:
+                print(f"Lista de participantes atualizada: {list(participants)}")
+        for new_ip in added:
+            latency.seen(new_ip)
+            spectators.unwatch(new_ip)
+            events.post(EV_JOINED, new_ip, f"INFO: Jogador {new_ip} entrou no jogo.")
     except Exception as e:
-        print(f"Erro geral ao processar mensagem de {ip}: {e}")
+        print(f"Erro ao processar lista de participantes: {e}")
         print_exc_context()
 
-# =============================================================================
-# TCP CLIENT HANDLER
-# =============================================================================
-
-def handle_tcp_client(connection, addr):
-    """Lida com uma conexão TCP - pode receber múltiplas mensagens curtas."""
-    ip = addr[0]
+def _apply_shots(items):
+    # Um ou mais "shot:x,y": parse fora do lock, um único lock para o grupo
+    global times_hit
+    shots = []
+    for payload, ip in items:
+        try:
+            shots.append((parse_coords(payload), ip))
+        except Exception as e:
+            print(f"Erro ao processar 'shot': {e}")
+            print_exc_context()
+    with lock:
+        position = my_position
+        hits = [ip for coords, ip in shots if coords == position]
+        times_hit += len(hits)
+    for _, ip in shots:
+        stats = peers.stats_for(ip)
+        if stats is not None:
+            stats.shots_at_me += 1
+            stats.hit_me += ip in hits
+    for ip in hits:
+        print(f"ALERTA: Fui atingido por 'shot' de {ip}!")
+        events.post(EV_HIT_BY, ip, f"HIT por {ip}")
+        # Responde com "hit" (fora do lock)
+        send_message(ip, "hit")
+
+def _on_shot(payload, ip):
+    _apply_shots([(payload, ip)])
+
+def _on_scout(payload, ip):
+    # --- Jogo: scout (resposta por send_message) ---
+    global times_hit
     try:
-        connection.settimeout(1.0)
-        while True:
-            try:
-                data = connection.recv(4096)
-            except socket.timeout:
-                # continua esperando por novas mensagens, até a conexão fechar
-                continue
-            except Exception:
-                # erro de recv: encerra o handler
-                break
-
-            if not data:
-                # conexão fechada pela outra ponta
-                break
-
-            # processa a mensagem, permitindo respostas através da mesma conexão
-            handle_message(data, ip, 'tcp', tcp_conn=connection, ui=ui_instance)
-
+        shot_x, shot_y = parse_coords(payload)
+
+        with lock:
+            my_x, my_y = my_position
+            hit = (shot_x, shot_y) == (my_x, my_y)
+            if hit:
+                times_hit += 1
+
+        if hit:
+            print(f"ALERTA: Fui atingido por 'scout' de {ip}!")
+            events.post(EV_HIT_BY, ip, f"HIT por {ip}")
+            send_message(ip, "hit")
+        else:
+            # dx = sign(my_x - shot_x), dy = sign(my_y - shot_y)
+            send_message(ip, f"info:{_sign(my_x - shot_x)},{_sign(my_y - shot_y)}")
     except Exception as e:
-        print(f"Erro ao lidar com cliente TCP {ip}: {e}")
+        print(f"Erro ao processar 'scout': {e}")
         print_exc_context()
-    finally:
-        try:
-            connection.close()
-        except Exception:
-            pass
 
-# =============================================================================
-# THREADS DE SERVIDOR
-# =============================================================================
+def _on_hit(payload, ip):
+    print(f"SUCESSO: Você atingiu {ip}!")
+    with lock:
+        players_hit.add(ip)
+    peers.stats(peers.intern(ip)).hit_by_me += 1
+    events.post(EV_HIT, ip, f"SHOT hit {ip}")
+
+def _on_info(payload, ip):
+    message = "info:" + safe_decode(payload)
+    print(f"INFO (Scout): Pista de {ip}: {message}")
+    events.post(EV_INFO, ip, f"scout info {ip}: {message}")
+
+def _on_watch(payload, ip):
+    # espectador (não vira participante): recebe keyframe no próximo quadro.
+    # Participante não assiste: o quadro traz minha posição.
+    with lock:
+        playing = ip in participants
+    if playing:
+        print(f"Pedido de 'watch' de {ip} recusado: é participante.")
+        return
+    spectators.watch(ip)
 
-def udp_server_thread():
-    """Thread que escuta UDP."""
-    global game_running
-    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    try:
-        udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    except Exception:
-        pass
+def _on_unwatch(payload, ip):
+    spectators.unwatch(ip)
+
+def _on_moved(payload, ip):
+    print(f"INFO: Jogador {ip} se moveu.")
+    events.post(EV_MOVED, ip, f"INFO: Jogador {ip} se moveu.")
+
+def _apply_departures(items):
+    # "saindo" de um ou mais peers: um único lock para o grupo
+    removed = False
+    with lock:
+        for _, ip in items:
+            if ip in participants:
+                participants.remove(ip)
+                removed = True
+        if removed:
+            print(f"Lista de participantes atualizada: {list(participants)}")
+    for _, ip in items:
+        print(f"INFO: Jogador {ip} saiu do jogo.")
+        events.post(EV_LEFT, ip, f"INFO: Jogador {ip} saiu do jogo.")
+
+def _on_saindo(payload, ip):
+    _apply_departures([(payload, ip)])
+
+# Mensagens sem argumento (comparação exata) e com prefixo "op:" (payload = resto)
+EXACT_HANDLERS = {
+    b"Conectando": _on_conectando,
+    b"hit": _on_hit,
+    b"moved": _on_moved,
+    b"saindo": _on_saindo,
+    b"watch": _on_watch,
+    b"unwatch": _on_unwatch,
+}
+_EXACT_MAX_LEN = max(len(op) for op in EXACT_HANDLERS)
+
+def _on_rel(payload, ip):
+    # quadro confiável: confirma, descarta duplicatas e processa a mensagem interna
+    inner = reliable.accept(payload, ip)
+    if inner is not None:
+        handler, inner_payload = _lookup(_strip(inner))
+        if handler is not None and handler is not _on_rel:
+            if handler_timer is None:
+                handler(inner_payload, ip)
+            else:
+                handler_timer.call(handler, inner_payload, ip)
+    reliable.flush_acks()
+
+def _on_ack(payload, ip):
+    reliable.on_ack(payload, ip)
+
+def _on_ping(payload, ip):
+    # ecoa o timestamp do remetente (o RTT é calculado do lado de lá)
+    _send_udp_raw(ip, b"pong:" + payload.tobytes(), urgent=True)
+
+def _on_pong(payload, ip):
+    sent_ns = int(payload.tobytes())
+    latency.sample(ip, (time.monotonic_ns() - sent_ns) / 1e9)
+
+# Mensagens de controle que não são impressas mesmo com LOG_MESSAGES
+QUIET_HANDLERS = {_on_ack, _on_ping, _on_pong}
+
+PREFIX_HANDLERS = (  # ordem: mais frequentes primeiro
+    (b"rel:", _on_rel),
+    (b"ack:", _on_ack),
+    (b"ping:", _on_ping),
+    (b"pong:", _on_pong),
+    (b"shot:", _on_shot),
+    (b"scout:", _on_scout),
+    (b"info:", _on_info),
+    (b"participantes:", _on_participantes),
+)
+
+# Handlers que sabem aplicar um grupo inteiro de mensagens sob um único lock
+BATCH_HANDLERS = {
+    _on_shot: _apply_shots,
+    _on_conectando: _apply_joins,
+    _on_saindo: _apply_departures,
+}
+
+def _lookup(view):
+    """Retorna (handler, payload) para a mensagem (já sem espaços), ou (None, None)."""
+    if len(view) <= _EXACT_MAX_LEN:
+        handler = EXACT_HANDLERS.get(view.tobytes())
+        if handler is not None:
+            return handler, None
+    for prefix, handler in PREFIX_HANDLERS:
+        if view[:len(prefix)] == prefix:
+            return handler, view[len(prefix):]
+    return None, None
+
+def handle_message(data, ip, protocol, tcp_conn=None):
+    #Processa mensagens recebidas (UDP ou TCP)
+    # data pode ser bytes ou um memoryview sobre o buffer de recepção (reutilizado):
+    # os handlers não guardam referências ao payload além da chamada.
     try:
-        udp_socket.bind(('', UDP_PORT))
+        view = _strip(memoryview(data))
+        if not view:
+            return
+        handler, payload = _lookup(view)
+        if LOG_MESSAGES and handler not in QUIET_HANDLERS:
+            print(f"[Mensagem {protocol.upper()} Recebida de {ip}]: {safe_decode(view)}")
+        if handler is None:
+            print(f"Mensagem desconhecida de {ip}: {safe_decode(view)}")
+            return
+        if handler_timer is None:
+            handler(payload, ip)
+        else:
+            handler_timer.call(handler, payload, ip)
+
     except Exception as e:
-        print(f"Falha ao bindar UDP ({UDP_PORT}): {e}")
+        print(f"Erro geral ao processar mensagem de {ip}: {e}")
         print_exc_context()
-        return
 
-    udp_socket.settimeout(UDP_RECV_TIMEOUT)
-    print(f"[*] Escutando UDP na porta {UDP_PORT}...")
+def dispatch_batch(batch, protocol='udp'):
+    """Processa uma rajada de mensagens [(data, ip), ...] agrupando por tipo.
 
-    while game_running:
+    Tipos em BATCH_HANDLERS são aplicados em grupo (um lock por grupo); os
+    demais são tratados na ordem de chegada, como em handle_message.
+    """
+    groups = {}
+    for data, ip in batch:
         try:
-            data, addr = udp_socket.recvfrom(4096)
-            sender_ip = addr[0]
-            # ignora mensagens locais de loopback e as próprias mensagens (se desejar)
-            if sender_ip == my_ip or sender_ip == "127.0.0.1":
+            view = _strip(memoryview(data))
+            if not view:
                 continue
-            handle_message(data, sender_ip, 'udp', ui=ui_instance)
-        except socket.timeout:
-            continue
+            handler, payload = _lookup(view)
+            if LOG_MESSAGES and handler not in QUIET_HANDLERS:
+                print(f"[Mensagem {protocol.upper()} Recebida de {ip}]: {safe_decode(view)}")
+            if handler is _on_rel:
+                # desembrulha para poder agrupar a mensagem interna
+                inner = reliable.accept(payload, ip)
+                if inner is None:
+                    continue
+                handler, payload = _lookup(_strip(inner))
+                if handler is _on_rel:
+                    continue
+            if handler is None:
+                print(f"Mensagem desconhecida de {ip}: {safe_decode(view)}")
+                continue
+            group_handler = BATCH_HANDLERS.get(handler)
+            if group_handler is None:
+                if handler_timer is None:
+                    handler(payload, ip)
+                else:
+                    handler_timer.call(handler, payload, ip)
+            else:
+                groups.setdefault(group_handler, []).append((payload, ip))
         except Exception as e:
-            if game_running:
-                print(f"Erro no servidor UDP: {e}")
-                print_exc_context()
-    try:
-        udp_socket.close()
-    except Exception:
-        pass
-    print("Servidor UDP encerrado.")
+            print(f"Erro geral ao processar mensagem de {ip}: {e}")
+            print_exc_context()
+    for group_handler, items in groups.items():
+        try:
+            if handler_timer is None:
+                group_handler(items)
+            else:
+                handler_timer.call(group_handler, items)
+        except Exception as e:
+            print(f"Erro ao processar grupo de mensagens: {e}")
+            print_exc_context()
+    reliable.flush_acks()
 
-def tcp_server_thread():
-    global game_running
-    tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    except Exception:
-        pass
+# =============================================================================
+# RECEPÇÃO (callbacks do transporte)
+# =============================================================================
 
-    try:
-        tcp_socket.bind(('', TCP_PORT))
-        tcp_socket.listen(5)
-    except Exception as e:
-        print(f"Falha ao criar servidor TCP ({TCP_PORT}): {e}")
-        print_exc_context()
+def get_net_stats():
+    """Cópia dos contadores de rede (para UI/benchmarks)."""
+    stats = dict(net_stats)
+    stats["ui_events_dropped"] = events.dropped
+    stats["tcp_pool_depth"] = tcp_pool.depth()
+    stats["tcp_pool_busy"] = tcp_pool.busy
+    stats["tcp_pool_max_depth"] = tcp_pool.stats["max_depth"]
+    stats.update(udp_batcher.snapshot("batch_udp_"))
+    stats.update(tcp_batcher.snapshot("batch_tcp_"))
+    stats["tcp_send_pending"] = tcp_senders.pending()
+    stats["tcp_send_shed"] = tcp_senders.stats["shed"]
+    return stats
+
+def peer_stats(ips=None):
+    """{ip: contadores} dos ips dados, ou de todos os participantes atuais
+    (overlay F3 / diagnóstico)."""
+    if ips is None:
+        with lock:
+            ids = list(participants.ids())
+    else:
+        ids = [pid for pid in map(peers.id_of, ips) if pid is not None]
+    return {peers.ip(pid): peers.stats(pid).as_dict() for pid in ids}
+
+def _on_datagrams(batch):
+    """Rajada de datagramas drenada pelo transporte de uma vez.
+
+    Filtra as próprias mensagens e peers acima do limite, marca os
+    remetentes como vivos e despacha o resto com dispatch_batch.
+    """
+    accepted = []
+    for data, sender_ip in batch:
+        # ignora mensagens locais de loopback e as próprias mensagens (se desejar)
+        if sender_ip == my_ip or sender_ip == "127.0.0.1":
+            net_stats["udp_ignored"] += 1
+            continue
+        if is_batch(data):
+            # lote (batching.py): cada mensagem conta no limite do peer
+            net_stats["udp_batched_in"] += 1
+            for part in split_batch(data):
+                if udp_limiter.allow(sender_ip):
+                    accepted.append((part, sender_ip))
+                else:
+                    net_stats["udp_rate_limited"] += 1
+            continue
+        if not udp_limiter.allow(sender_ip):
+            net_stats["udp_rate_limited"] += 1
+            continue
+        accepted.append((data, sender_ip))
+    if not accepted:
         return
+    now = time.monotonic()
+    for ip in {ip for _, ip in accepted}:
+        latency.seen(ip, now)
+    for _, ip in accepted:
+        stats = peers.stats_for(ip)
+        if stats is not None:
+            stats.received += 1
+    net_stats["udp_received"] += len(accepted)
+    net_stats["udp_batches"] += 1
+    if len(accepted) > net_stats["udp_max_batch"]:
+        net_stats["udp_max_batch"] = len(accepted)
+    dispatch_batch(accepted, 'udp')
+
+def _accept_stream(sender_ip):
+    """Aceita (True) ou recusa uma conexão TCP de sender_ip."""
+    if sender_ip == my_ip or sender_ip == "127.0.0.1":
+        # fecha conexões locais indesejadas
+        return False
+    if not tcp_limiter.allow(sender_ip):
+        net_stats["tcp_rate_limited"] += 1
+        return False
+    return True
+
+def _on_stream(data, ip):
+    """Uma mensagem TCP inteira (a conexão é lida até o EOF) ou um lote bat:."""
+    latency.seen(ip)
+    stats = peers.stats_for(ip)
+    for message in (split_batch(data) if is_batch(data) else (data,)):
+        if not tcp_limiter.allow(ip):
+            net_stats["tcp_rate_limited"] += 1
+            continue
+        net_stats["tcp_received"] += 1
+        if stats is not None:
+            stats.received += 1
+        handle_message(message, ip, 'tcp')
 
-    tcp_socket.settimeout(SERVER_ACCEPT_TIMEOUT)
-    print(f"[*] Escutando TCP na porta {TCP_PORT}...")
+def ping_thread():
+    """Mede RTT/jitter dos participantes (ping/pong) e detecta quem caiu.
 
-    while game_running:
-        try:
-            conn, addr = tcp_socket.accept()
-            sender_ip = addr[0]
-            if sender_ip == my_ip or sender_ip == "127.0.0.1":
-                # fecha conexões locais indesejadas
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                continue
-            # cria thread para tratar essa conexão
-            client_handler = threading.Thread(target=handle_tcp_client, args=(conn, addr), daemon=True)
-            client_handler.start()
-        except socket.timeout:
+    Um peer é removido quando fica calado além de latency.failure_timeout(ip),
+    que cresce com o RTT/jitter medidos dele.
+    """
+    while not transport.wait_stopping(PING_INTERVAL):
+        with lock:
+            current = list(participants)
+        ping = b"ping:%d" % time.monotonic_ns()
+        for ip in current:
+            _send_udp_raw(ip, ping, urgent=True)
+        failed = latency.failed(current)
+        if not failed:
             continue
-        except Exception as e:
-            if game_running:
-                print(f"Erro no servidor TCP: {e}")
-                print_exc_context()
-    try:
-        tcp_socket.close()
-    except Exception:
-        pass
-    print("Servidor TCP encerrado.")
+        with lock:
+            for ip in failed:
+                participants.discard(ip)
+        for ip in failed:
+            latency.forget(ip)
+            print(f"INFO: Jogador {ip} não responde; removido.")
+            events.post(EV_LEFT, ip, f"INFO: Jogador {ip} caiu (sem resposta).")
+
+_ping = None
 
 # =============================================================================
 # JOGO E INTERFACE
 # =============================================================================
 
 def shutdown_servers():
-    """Gracefully shutdown UDP and TCP servers."""
-    global game_running, udp_socket, tcp_socket
+    """Encerra a partida: acorda e para as threads de servidor na hora.
+
+    Os listeners ficam abertos para a próxima partida (transport.close() no fim).
+    """
+    global game_running, _ping
     game_running = False
-    time.sleep(0.5)  # Give threads time to notice game_running = False
-    
-    try:
-        if udp_socket:
-            udp_socket.close()
-    except Exception:
-        pass
-    
-    try:
-        if tcp_socket:
-            tcp_socket.close()
-    except Exception:
-        pass
+    if snapshots is not None:
+        snapshots.stop(discard=True)  # partida terminou direito: nada a retomar
+    spectators.stop()  # avisa os espectadores antes de parar o transporte
+    udp_batcher.stop()  # esvazia as filas (ex.: o "saindo" recém-enviado)
+    tcp_batcher.stop()
+    tcp_senders.join(TCP_SEND_DRAIN)  # entregas TCP pendentes, com limite
+    transport.stop()
+    if _ping is not None:
+        _ping.join(1.0)
+        _ping = None
+    reliable.reset()
+    latency.clear()
+
+def start_servers():
+    """Liga a recepção do transporte (listeners prontos no retorno) e o ping."""
+    global _ping
+    if not transport.start(_on_datagrams, _on_stream, accept=_accept_stream):
+        return False
+    udp_batcher.start()
+    tcp_batcher.start()
+    _ping = threading.Thread(target=ping_thread, daemon=True)
+    _ping.start()
+    return True
+
+def _snapshot_token():
+    # barato: tupla + cópia dos bitmaps; muda sempre que o estado salvo muda
+    with lock:
+        return (my_position, times_hit, participants.bits(), players_hit.bits())
+
+def _snapshot_state():
+    with lock:
+        return {"ip": my_ip, "position": list(my_position), "times_hit": times_hit,
+                "participants": list(participants), "players_hit": list(players_hit)}
+
+snapshots = SnapshotWriter(SNAPSHOT_PATH, _snapshot_token, _snapshot_state,
+                           SNAPSHOT_INTERVAL) if SNAPSHOT_PATH else None
+
+def _spectator_board():
+    with lock:
+        return my_position, times_hit, list(players_hit), list(participants)
+
+# mesmo token barato dos snapshots: só monta o tabuleiro quando algo mudou
+spectators = SpectatorPublisher(_snapshot_token, _spectator_board, _send_udp_urgent,
+                                relay=SPECTATOR_RELAY or None)
+
+def _restore_snapshot(state):
+    """Aplica um snapshot salvo; retorna os peers conhecidos na hora do crash."""
+    global my_position, times_hit
+    cached = []
+    with lock:
+        my_position = tuple(state["position"])
+        times_hit = int(state.get("times_hit", 0))
+        for ip in state.get("players_hit", ()):
+            try:
+                players_hit.add(ip)
+            except (OSError, ValueError):
+                pass
+        for ip in state.get("participants", ()):
+            try:
+                participants.add(ip)
+                cached.append(ip)
+            except (OSError, ValueError):
+                pass
+    for ip in cached:
+        latency.seen(ip)  # começa a contar o silêncio (ping remove quem morreu)
+    return cached
 
 def initialize_game():
+    """Prepara a partida. Retorna os peers de um snapshot retomado ([] se nova)."""
     global my_position, my_ip
     my_ip = get_my_ip()
-    my_position = (random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1))
     print(f"Meu IP: {my_ip}")
+    state = None
+    if SNAPSHOT_PATH:
+        state = load_snapshot(SNAPSHOT_PATH, SNAPSHOT_MAX_AGE, ip=my_ip)
+    if state is not None:
+        try:
+            cached = _restore_snapshot(state)
+            print(f"Retomando partida interrompida: posição {my_position}, "
+                  f"{times_hit} hit(s) sofrido(s), {len(cached)} peer(s) conhecido(s)")
+            return cached
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Snapshot inválido ignorado: {e}")
+    my_position = (random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1))
     print(f"Meu navio está na posição: {my_position}")
+    return []
+
+def rejoin(cached_peers):
+    """Avisa os peers do snapshot direto (um datagrama cada, sem esperar
+    respostas): quem já nos removeu nos readiciona e responde com a lista."""
+    for ip in cached_peers:
+        _send_udp_raw(ip, b"Conectando")
+    if cached_peers:
+        print(f"[Rejoin]: Conectando enviado a {len(cached_peers)} peer(s) conhecido(s)")
 
 def calculate_score():
     with lock:
         score = len(players_hit) - times_hit
         return score, len(players_hit), times_hit
 
-def print_status():
-    with lock:
-        print("\n" + "="*30)
-        print(f"Posição Atual: {my_position}")
-        print(f"Participantes: {list(participants)}")
-        print(f"Atingido: {times_hit} vez(es)")
-        print(f"Atingiu: {len(players_hit)} jogador(es) únicos")
-        print("="*30 + "\n")
-
-def parse_input_preserve(raw_input):
-    """
-    Recebe a string completa do usuário (sem lower) e retorna:
-    (cmd, args_list)
-    cmd é lowercased; args preservam case (importante para IPs).
-    """
-    raw = raw_input.strip()
-    if raw == "":
-        return "", []
-    parts = raw.split()
-    cmd = parts[0].lower()
-    args = parts[1:]
-    return cmd, args
-
-def shutdown_servers():
-    global game_running, udp_socket, tcp_socket
-    game_running = False
-    time.sleep(0.5) 
-    
-    try:
-        if udp_socket:
-            udp_socket.close()
-    except Exception:
-        pass
-    
-    try:
-        if tcp_socket:
-            tcp_socket.close()
-    except Exception:
-        pass
+def main(argv=None):
+    """Main game loop with state machine: MENU -> GAME -> SCORE -> MENU
 
+    Use --headless (ou BATTLESHIP_HEADLESS=1) para rodar sem importar pygame e
+    --multicast (ou BATTLESHIP_MULTICAST=1) para shots/moves/saídas via multicast e
+    --transport=asyncio (ou BATTLESHIP_TRANSPORT=asyncio) para a rede num event loop.
+    --spectator-relay=IP (ou BATTLESHIP_SPECTATOR_RELAY) publica o tabuleiro para um relay.
+    --profile[=sample] (ou BATTLESHIP_PROFILE=1|sample) grava um perfil do lock e dos
+    handlers (e, com sample, stacks amostrados de todas as threads) ao sair.
+    """
+    global game_running, my_ip, my_position, ui_instance
+    global MULTICAST_ENABLED
+
+    argv = sys.argv[1:] if argv is None else argv
+    headless = "--headless" in argv or os.environ.get("BATTLESHIP_HEADLESS") == "1"
+    if "--multicast" in argv:
+        MULTICAST_ENABLED = True
+    for arg in argv:
+        if arg.startswith("--transport="):
+            use_transport(make_transport(arg.split("=", 1)[1]))
+        elif arg.startswith("--spectator-relay="):
+            spectators.relay = arg.split("=", 1)[1] or None
+    profile = PROFILE
+    for arg in argv:
+        if arg == "--profile" or arg.startswith("--profile="):
+            profile = arg.partition("=")[2] or "1"
+    if profile:
+        enable_profiling(sample=profile == "sample")
+    if not headless:
+        load_ui()
 
-def main():
-    """Main game loop with state machine: MENU -> GAME -> SCORE -> MENU"""
-    global game_running, move_penalty, moved, my_ip, my_position, ui_instance
-    
     state = "MENU"  #Inicia no estado MENU
 
     while True:
@@ -503,21 +972,34 @@ def main():
                 state = "INIT_GAME"
             elif menu.choice == "quit" or menu.choice is None:
                 print("Saindo do jogo...")
+                transport.close()
+                shutdown_ui()
                 return
 
         elif state == "INIT_GAME":
             # Inicia o jogo
             game_running = True
-            initialize_game()
-
-            # Inicia server
-            udp_thread = threading.Thread(target=udp_server_thread, daemon=True)
-            tcp_thread = threading.Thread(target=tcp_server_thread, daemon=True)
-            udp_thread.start()
-            tcp_thread.start()
-
-            time.sleep(1)
-
+            events.clear()
+            cached_peers = initialize_game()
+            if MULTICAST_ENABLED and transport.multicast_group is None:
+                transport.enable_multicast(MULTICAST_GROUP, MULTICAST_TTL, MULTICAST_LOOP,
+                                           interface=my_ip)
+
+            # Inicia server (broadcast só depois de estar escutando)
+            if not start_servers():
+                # sem listener ninguém nos alcança: não adianta anunciar nem abrir a UI
+                print("Não foi possível escutar nas portas do jogo; encerrando.")
+                transport.close()
+                shutdown_ui()
+                return
+            if snapshots is not None:
+                snapshots.start()
+            spectators.start(my_ip)
+            rejoin(cached_peers)
+
+            # descoberta: grupo multicast (se habilitado) + broadcast como fallback
+            if MULTICAST_ENABLED:
+                _send_multicast_raw(b"Conectando")
             send_broadcast_udp("Conectando")
 
             # Inicia UI
@@ -534,7 +1016,11 @@ def main():
                         game_running_ref=globals(),
                         lock=lock,
                         send_udp_to_all=send_udp_to_all,
-                        send_tcp_message=send_tcp_message
+                        send_message=send_message,
+                        latency=latency,
+                        events=events,
+                        net_stats=get_net_stats,
+                        peer_stats=peer_stats
                     )
                     ui_instance.start()
                 except Exception as e:
@@ -546,92 +1032,15 @@ def main():
         elif state == "GAME":
             try:
                 while game_running:
-                    # Se tem pygame, não usa input do console
+                    # Se tem pygame, não usa o console: espera a cena terminar
                     if ui_instance is not None and ui_instance.is_alive():
-                        time.sleep(0.5)
-                        continue
-                    
-                    print_status()
-
-                    if move_penalty:
-                        print("Penalidade de movimento: esperando 10s adicionais...")
-                        for _ in range(10):
-                            if not game_running:
-                                break
-                            time.sleep(1)
-                        move_penalty = False
-
-                    print("Próxima ação em 10 segundos...")
-                    for _ in range(10):
-                        if not game_running:
-                            break
-                        time.sleep(1)
-                    if not game_running:
-                        break
-
-                    # coleta input
-                    raw = input("Ação (shot X Y | scout X Y IP | move {+|-}{x|y} | sair): ")
-                    cmd, args = parse_input_preserve(raw)
-                    if not cmd:
+                        ui_instance.join()
                         continue
-                    print(f"[Ação Enviada]: {raw}")
-
-                    if cmd == "shot":
-                        if len(args) == 2:
-                            try:
-                                x = int(args[0]); y = int(args[1])
-                                send_udp_to_all(f"shot:{x},{y}")
-                            except ValueError:
-                                print("Coordenadas devem ser inteiros. Use: shot X Y")
-                        else:
-                            print("Formato inválido. Use: shot X Y")
-
-                    elif cmd == "scout":
-                        if len(args) == 3:
-                            try:
-                                x = int(args[0]); y = int(args[1]); ip = args[2]
-                                send_tcp_message(ip, f"scout:{x},{y}")
-                            except ValueError:
-                                print("Coordenadas devem ser inteiros. Use: scout X Y IP")
-                        else:
-                            print("Formato inválido. Use: scout X Y IP")
-
-                    elif cmd == "move":
-                        if len(args) == 1:
-                            move = args[0]
-                            valid_move = False
-                            with lock:
-                                x, y = my_position
-                                if move == "+x" and x < GRID_SIZE - 1:
-                                    x += 1; valid_move = True
-                                elif move == "-x" and x > 0:
-                                    x -= 1; valid_move = True
-                                elif move == "+y" and y < GRID_SIZE - 1:
-                                    y += 1; valid_move = True
-                                elif move == "-y" and y > 0:
-                                    y -= 1; valid_move = True
-
-                                if valid_move:
-                                    my_position = (x, y)
-                                    print(f"Nova posição: {my_position}")
-                                    move_penalty = True
-                                    moved = True
-                                else:
-                                    print("Movimento inválido ou fora dos limites.")
-                        else:
-                            print("Formato inválido. Use: move {+|-}{x|y}")
-                        if moved:
-                            send_udp_to_all("moved")
-                            moved = False
-                    if game_running == False:
-                        cmd = "sair"
-                    elif cmd == "sair":
-                        game_running = False
-                        send_udp_to_all("saindo")
-                        break
-
-                    else:
-                        print("Comando inválido.")
+                    # console orientado a eventos, com as mesmas ações (e cooldown) da UI
+                    actions = getattr(ui_instance, "actions", None) or GameActions(
+                        GRID_SIZE, globals(), lock, send_udp_to_all, send_message, events)
+                    ConsoleFrontend(actions, my_ip, participants, players_hit, events,
+                                    latency=latency).run()
 
             except KeyboardInterrupt:
                 print("\nSaindo por (Ctrl+C)...")
@@ -654,7 +1063,6 @@ def main():
 
             # Desliga os servers
             shutdown_servers()
-            time.sleep(1.0)  # tempo para pygame finalizar sem problemas
 
             # Calcula pontuação
             score, p_hit, t_hit = calculate_score()
@@ -664,11 +1072,11 @@ def main():
             final_times_hit = t_hit
 
         elif state == "SCORE":
-            # Mostra pontuação
+            # Mostra pontuação (a cena termina sozinha se a janela fechar)
             score_screen = ScoreScreen(final_score, final_hits, final_times_hit)
             score_screen.start()
             if score_screen.is_alive():
-                score_screen.join(timeout=5.0)  # Wait with timeout
+                score_screen.join()
             else:
                 # Thread didn't start, use the default choice
                 if not hasattr(score_screen, 'choice') or score_screen.choice is None:
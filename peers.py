@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Peer registry: every peer address interned once to a small integer id.
+
+    PeerRegistry   ip -> id, packed IPv4 address (array of uint32) and a
+                   PeerStats record per id; ids are never reused
+    PeerSet        set of peers as a bitmap over ids (one bit per known
+                   peer), with a set-like API that accepts ips or ids
+
+Membership tests are a dict lookup plus a bit test, and a room of N peers
+costs N/8 bytes per set instead of N string entries.
+"""
+
+import socket
+import struct
+import threading
+from array import array
+
+_UNPACK_IP = struct.Struct("!I").unpack
+_LIST_JUNK = str.maketrans("", "", "'\" ")
+
+
+def pack_ip(ip):
+    """Dotted quad -> uint32 (raises OSError/ValueError if it is not IPv4)."""
+    if ip.count(".") != 3:
+        raise ValueError(f"não é IPv4: {ip!r}")
+    return _UNPACK_IP(socket.inet_aton(ip))[0]
+
+
+class PeerStats:
+    """Per-peer counters (updated by the network/handler threads)."""
+
+    __slots__ = ("received", "sent", "shots_at_me", "hit_me", "hit_by_me")
+
+    def __init__(self):
+        self.received = 0      # mensagens recebidas do peer
+        self.sent = 0          # mensagens enviadas ao peer
+        self.shots_at_me = 0   # shots/scouts do peer
+        self.hit_me = 0        # vezes que o peer me acertou
+        self.hit_by_me = 0     # vezes que acertei o peer
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PeerRegistry:
+    """Interns peer ips to dense integer ids (thread-safe)."""
+
+    def __init__(self):
+        self._ids = {}            # ip -> id
+        self._ips = []            # id -> ip (a string interned, reused everywhere)
+        self._addrs = array("I")  # id -> IPv4 empacotado
+        self._stats = []          # id -> PeerStats
+        self._lock = threading.Lock()
+
+    def intern(self, ip):
+        """Id of ip, allocating one the first time (ValueError if not IPv4)."""
+        pid = self._ids.get(ip)
+        if pid is not None:
+            return pid
+        addr = pack_ip(ip)
+        with self._lock:
+            pid = self._ids.get(ip)
+            if pid is None:
+                pid = len(self._ips)
+                self._ips.append(ip)
+                self._addrs.append(addr)
+                self._stats.append(PeerStats())
+                self._ids[ip] = pid
+        return pid
+
+    def id_of(self, ip):
+        """Id of ip, or None if it was never interned."""
+        return self._ids.get(ip)
+
+    def ip(self, pid):
+        return self._ips[pid]
+
+    def packed(self, pid):
+        return self._addrs[pid]
+
+    def stats(self, pid):
+        return self._stats[pid]
+
+    def stats_for(self, ip):
+        """PeerStats of a known ip, or None."""
+        pid = self._ids.get(ip)
+        return self._stats[pid] if pid is not None else None
+
+    def __len__(self):
+        return len(self._ips)
+
+    def parse_list(self, text):
+        """Ids from a 'participantes:' payload ("['a', 'b']").
+
+        A payload not closed by "]" (a truncated list) or whose entries are
+        not all quoted yields no ids, so a cut address like '10.0.1.4 never
+        becomes a peer; quoted entries that are not IPv4 are skipped."""
+        text = text.strip()
+        if len(text) < 2 or text[0] != "[" or text[-1] != "]":
+            return []
+        body = text[1:-1]
+        if not body.strip():
+            return []
+        # uma verificação só no texto todo: duas aspas por entrada
+        if body.count("'") + body.count('"') != 2 * (body.count(",") + 1):
+            return []
+        ids = []
+        known = self._ids.get  # peers já internados: sem chamada a intern()
+        for ip in body.translate(_LIST_JUNK).split(","):
+            pid = known(ip)
+            if pid is None:
+                try:
+                    pid = self.intern(ip)
+                except (OSError, ValueError):
+                    continue
+            ids.append(pid)
+        return ids
+
+class PeerSet:
+    """Set of peers of one registry, stored as a bitmap indexed by id.
+
+    add/discard/remove/`in` accept an ip (str) or an id (int); iteration
+    yields ips (ascending id order), ids() yields ids.
+    """
+
+    __slots__ = ("registry", "_bits", "_count")
+
+    def __init__(self, registry, peers=()):
+        self.registry = registry
+        self._bits = bytearray()
+        self._count = 0
+        for peer in peers:
+            self.add(peer)
+
+    def _id(self, peer, create):
+        if isinstance(peer, int):
+            return peer
+        return self.registry.intern(peer) if create else self.registry.id_of(peer)
+
+    def add_id(self, pid):
+        """Add by id. Returns True if it was not present."""
+        byte, bit = pid >> 3, 1 << (pid & 7)
+        bits = self._bits
+        if byte >= len(bits):
+            bits.extend(bytes(byte - len(bits) + 1))
+        if bits[byte] & bit:
+            return False
+        bits[byte] |= bit
+        self._count += 1
+        return True
+
+    def discard_id(self, pid):
+        """Remove by id. Returns True if it was present."""
+        byte, bit = pid >> 3, 1 << (pid & 7)
+        bits = self._bits
+        if byte >= len(bits) or not bits[byte] & bit:
+            return False
+        bits[byte] &= ~bit & 0xFF
+        self._count -= 1
+        return True
+
+    def has_id(self, pid):
+        byte = pid >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (pid & 7)))
+
+    def add(self, peer):
+        self.add_id(self._id(peer, True))
+
+    def discard(self, peer):
+        pid = self._id(peer, False)
+        if pid is not None:
+            self.discard_id(pid)
+
+    def remove(self, peer):
+        pid = self._id(peer, False)
+        if pid is None or not self.discard_id(pid):
+            raise KeyError(peer)
+
+    def __contains__(self, peer):
+        pid = self._id(peer, False) if isinstance(peer, str) else peer
+        return pid is not None and self.has_id(pid)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def ids(self):
+        for byte, value in enumerate(self._bits):
+            if value:
+                base = byte << 3
+                for bit in range(8):
+                    if value & (1 << bit):
+                        yield base + bit
+
+    def __iter__(self):
+        ips = self.registry._ips
+        for pid in self.ids():
+            yield ips[pid]
+
+    def bits(self):
+        """Copy of the bitmap (cheap change-detection token)."""
+        return bytes(self._bits)
+
+    def clear(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def copy(self):
+        other = PeerSet(self.registry)
+        other._bits = bytearray(self._bits)
+        other._count = self._count
+        return other
+
+    def __repr__(self):
+        return f"PeerSet({list(self)!r})"
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling hooks (main.py --profile / BATTLESHIP_PROFILE=1).
+
+    ProfiledLock      drop-in wrapper for a threading.Lock that records, per
+                      call site, how long callers waited to acquire it and
+                      how long they held it
+    HandlerTimer      time spent in each message handler (one row per
+                      handle_message/dispatch_batch branch)
+    SamplingProfiler  samples the stacks of every thread at a fixed interval
+                      (sys._current_frames) into folded stacks
+
+Profiler ties them together and writes, at shutdown, a text report and a
+`.folded` file (one "frame;frame;frame count" line per stack) that
+flamegraph.pl, speedscope or inferno render directly.
+
+None of this is installed unless profiling is enabled; the normal path keeps
+the plain lock and a single `is None` check per handled message.
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+# frames de wrappers de `with` (ex.: ui._TimedAcquire) não contam como call site
+_WRAPPER_FRAMES = ("__enter__", "acquire")
+
+
+def _call_site(frame):
+    while frame.f_code.co_name in _WRAPPER_FRAMES and frame.f_back is not None:
+        frame = frame.f_back
+    return frame.f_code, frame.f_lineno
+
+
+def _site_name(code, lineno):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+class ProfiledLock:
+    """threading.Lock wrapper with wait/hold time per call site.
+
+    Statistics are updated while the wrapped lock is held, so they need no
+    lock of their own.
+    """
+
+    def __init__(self, lock=None, name="lock"):
+        self._lock = lock if lock is not None else threading.Lock()
+        self.name = name
+        self.sites = {}  # (code, lineno) -> [acquires, wait_total, wait_max, hold_total, hold_max]
+        self._held_site = None
+        self._held_since = 0.0
+
+    def _acquired(self, site, waited):
+        stats = self.sites.get(site)
+        if stats is None:
+            stats = self.sites[site] = [0, 0.0, 0.0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += waited
+        if waited > stats[2]:
+            stats[2] = waited
+        self._held_site = site
+        self._held_since = time.perf_counter()
+
+    def acquire(self, blocking=True, timeout=-1):
+        site = _call_site(sys._getframe(1))
+        t0 = time.perf_counter()
+        ok = self._lock.acquire(blocking, timeout)
+        if ok:
+            self._acquired(site, time.perf_counter() - t0)
+        return ok
+
+    def release(self):
+        held = time.perf_counter() - self._held_since
+        stats = self.sites.get(self._held_site)
+        if stats is not None:
+            stats[3] += held
+            if held > stats[4]:
+                stats[4] = held
+        self._lock.release()
+
+    def __enter__(self):
+        site = _call_site(sys._getframe(1))
+        t0 = time.perf_counter()
+        self._lock.acquire()
+        self._acquired(site, time.perf_counter() - t0)
+        return True
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    def locked(self):
+        return self._lock.locked()
+
+    def rows(self):
+        """[(site, acquires, wait_total, wait_max, hold_total, hold_max)],
+        most waited-on first."""
+        rows = [(_site_name(*site),) + tuple(stats) for site, stats in list(self.sites.items())]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+
+class HandlerTimer:
+    """Calls handlers and accumulates (calls, total, max) per handler."""
+
+    def __init__(self):
+        self.stats = {}  # name -> [calls, total, max]
+        self._lock = threading.Lock()
+
+    def call(self, handler, *args):
+        t0 = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            elapsed = time.perf_counter() - t0
+            name = handler.__name__
+            with self._lock:
+                stats = self.stats.get(name)
+                if stats is None:
+                    stats = self.stats[name] = [0, 0.0, 0.0]
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+    def rows(self):
+        with self._lock:
+            rows = [(name,) + tuple(stats) for name, stats in self.stats.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+
+class SamplingProfiler:
+    """Periodically samples every thread's Python stack into folded counts."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.stacks = {}  # "thread;frame;...;frame" -> samples
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(1.0)
+            self._thread = None
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def top_frames(self, limit=20):
+        """Leaf frames with the most samples (where time is spent)."""
+        leaves = {}
+        for stack, count in self.stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        return sorted(leaves.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class Profiler:
+    """Owns the hooks of one profiling session and writes the report."""
+
+    def __init__(self, sample=False, interval=0.01, out_dir=".", prefix="battleship-profile"):
+        self.locks = []
+        self.handlers = HandlerTimer()
+        self.sampler = SamplingProfiler(interval) if sample else None
+        self.out_dir = out_dir
+        self.prefix = f"{prefix}-{os.getpid()}"
+        self.started = time.perf_counter()
+        self._written = False
+
+    def wrap_lock(self, lock, name):
+        profiled = ProfiledLock(lock, name)
+        self.locks.append(profiled)
+        return profiled
+
+    def start(self):
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        out = [f"Perfil de {elapsed:.1f}s (pid {os.getpid()})", ""]
+        for lock in self.locks:
+            out.append(f"== lock '{lock.name}' por call site ==")
+            out.append(f"{'site':<44} {'acquires':>9} {'espera ms':>10} {'max ms':>8} "
+                       f"{'posse ms':>10} {'max ms':>8}")
+            for site, acquires, wait, wait_max, hold, hold_max in lock.rows():
+                out.append(f"{site:<44} {acquires:>9} {wait * 1e3:>10.2f} {wait_max * 1e3:>8.2f} "
+                           f"{hold * 1e3:>10.2f} {hold_max * 1e3:>8.2f}")
+            out.append("")
+        out.append("== handlers ==")
+        out.append(f"{'handler':<24} {'chamadas':>9} {'total ms':>10} {'média us':>9} {'max us':>9}")
+        for name, calls, total, worst in self.handlers.rows():
+            out.append(f"{name:<24} {calls:>9} {total * 1e3:>10.2f} "
+                       f"{total / calls * 1e6:>9.1f} {worst * 1e6:>9.1f}")
+        if self.sampler is not None:
+            out.append("")
+            out.append(f"== amostras ({self.sampler.samples} a cada "
+                       f"{self.sampler.interval * 1e3:.0f}ms): frames mais frequentes ==")
+            for frame, count in self.sampler.top_frames():
+                out.append(f"{count:>7}  {frame}")
+        return "\n".join(out) + "\n"
+
+    def write(self):
+        """Write <prefix>.txt (and <prefix>.folded when sampling). Runs once."""
+        if self._written:
+            return []
+        self._written = True
+        if self.sampler is not None:
+            self.sampler.stop()
+        os.makedirs(self.out_dir, exist_ok=True)
+        paths = []
+        path = os.path.join(self.out_dir, self.prefix + ".txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        paths.append(path)
+        if self.sampler is not None:
+            path = os.path.join(self.out_dir, self.prefix + ".folded")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.sampler.folded())
+            paths.append(path)
+        for path in paths:
+            print(f"[Perfil] {path}")
+        return paths
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Reliable datagrams over the game's UDP port.
+
+Wire format (ASCII, shares port 5000 with the plain messages):
+    rel:<seq>:<message>     data; the receiver acks and delivers <message> once
+    rel:g<seq>:<message>    same, in the sender's group (multicast) space
+    ack:<seq>[,g<seq>...]   selective ack of the data frames received
+
+Each peer gets its own sequence space starting at a random base, so a
+restarted peer is not mistaken for duplicates. Group frames are sent once
+(e.g. to a multicast group) and retransmitted by unicast only to the
+peers that have not acked them. Unacked frames are resent
+with the peer's RTT-based timeout from latency.LatencyTable (Karn's rule,
+exponential backoff) until MAX_RETRIES.
+"""
+
+import heapq
+import random
+import threading
+import time
+
+from latency import LatencyTable, MAX_RTO
+
+DATA_PREFIX = b"rel:"
+ACK_PREFIX = b"ack:"
+GROUP = "*"  # pseudo-peer key for the group sequence space
+
+MAX_RETRIES = 6
+DEDUP_WINDOW = 128  # seqs remembered per peer
+
+
+class _SeenWindow:
+    """Duplicate suppression for one peer's sequence space."""
+
+    __slots__ = ("floor", "seen")
+
+    def __init__(self, first_seq):
+        # seqs <= floor count as already delivered
+        self.floor = first_seq - DEDUP_WINDOW - 1
+        self.seen = set()
+
+    def accept(self, seq):
+        """True if seq is new (and records it)."""
+        if seq <= self.floor or seq in self.seen:
+            return False
+        self.seen.add(seq)
+        if len(self.seen) > 2 * DEDUP_WINDOW:
+            self.floor = max(self.seen) - DEDUP_WINDOW
+            self.seen = {s for s in self.seen if s > self.floor}
+        return True
+
+
+class _Pending:
+    __slots__ = ("ip", "seq", "frame", "message", "first_sent", "deadline", "retries", "waiting")
+
+    def __init__(self, ip, seq, frame, message, now, rto, waiting=None):
+        self.ip = ip            # GROUP for group frames
+        self.seq = seq
+        self.frame = frame
+        self.message = message
+        self.first_sent = now
+        self.deadline = now + rto
+        self.retries = 0
+        self.waiting = waiting  # group frames: peers that have not acked yet
+
+
+def _parse_int(view):
+    value = 0
+    if not view:
+        raise ValueError("número vazio")
+    for b in view:
+        if not 48 <= b <= 57:
+            raise ValueError("número inválido")
+        value = value * 10 + (b - 48)
+    return value
+
+
+class ReliableChannel:
+    """Sequencing, acks, retransmission and dedup on top of a datagram sender.
+
+    Args:
+        send_raw: send_raw(ip, data_bytes) — sends one datagram
+        on_fail: optional on_fail(ip, message) when MAX_RETRIES is exhausted
+        latency: LatencyTable shared with the rest of the node (RTO source;
+            acks feed it RTT samples)
+    """
+
+    def __init__(self, send_raw, on_fail=None, latency=None):
+        self.send_raw = send_raw
+        self.on_fail = on_fail
+        self.latency = latency if latency is not None else LatencyTable()
+        self._cond = threading.Condition()
+        self._next_seq = {}     # ip -> next seq to send
+        self._pending = {}      # (ip, seq) -> _Pending
+        self._timers = []       # heap of (deadline, ip, seq); stale entries skipped
+        self._windows = {}      # (ip, is_group) -> _SeenWindow
+        self._acks = {}         # ip -> [b"seq" | b"gseq", ...] waiting for flush_acks()
+        self._thread = None
+        self.stats = {
+            "sent": 0, "retransmits": 0, "acked": 0,
+            "received": 0, "duplicates": 0, "failed": 0,
+        }
+
+    # --- sending ---
+    def send(self, ip, message):
+        """Send message to ip reliably (returns immediately)."""
+        now = time.monotonic()
+        with self._cond:
+            seq = self._next_seq.get(ip)
+            if seq is None:
+                seq = random.randrange(1, 1 << 30)
+            self._next_seq[ip] = seq + 1
+            frame = b"%s%d:%s" % (DATA_PREFIX, seq, message.encode())
+            pending = _Pending(ip, seq, frame, message, now, self.latency.rto(ip))
+            self._pending[(ip, seq)] = pending
+            heapq.heappush(self._timers, (pending.deadline, ip, seq))
+            self.stats["sent"] += 1
+            self._ensure_timer()
+            self._cond.notify()
+        self.send_raw(ip, frame)
+
+    def send_group(self, peers, message, send_group_raw):
+        """Send message once through send_group_raw(frame) (e.g. multicast);
+        peers that do not ack get unicast retransmissions."""
+        peers = set(peers)
+        if not peers:
+            return
+        now = time.monotonic()
+        with self._cond:
+            seq = self._next_seq.get(GROUP)
+            if seq is None:
+                seq = random.randrange(1, 1 << 30)
+            self._next_seq[GROUP] = seq + 1
+            frame = b"%sg%d:%s" % (DATA_PREFIX, seq, message.encode())
+            rto = max(self.latency.rto(ip) for ip in peers)
+            pending = _Pending(GROUP, seq, frame, message, now, rto, waiting=peers)
+            self._pending[(GROUP, seq)] = pending
+            heapq.heappush(self._timers, (pending.deadline, GROUP, seq))
+            self.stats["sent"] += 1
+            self._ensure_timer()
+            self._cond.notify()
+        send_group_raw(frame)
+
+    # --- receiving ---
+    def accept(self, payload, ip):
+        """Handle a 'rel:' payload (after the prefix). Returns the inner
+        message as a memoryview, or None if it is a duplicate/invalid.
+        The ack is queued; call flush_acks() after the batch."""
+        view = memoryview(payload)
+        sep = -1
+        for i in range(min(len(view), 12)):
+            if view[i] == 58:  # ':'
+                sep = i
+                break
+        if sep <= 0:
+            return None
+        is_group = view[0] == 103  # 'g'
+        seq = _parse_int(view[1:sep] if is_group else view[:sep])
+        key = (ip, is_group)
+        with self._cond:
+            self._acks.setdefault(ip, []).append(view[:sep].tobytes())
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _SeenWindow(seq)
+            elif abs(seq - window.floor) > (1 << 20):
+                # peer restarted with a new random base
+                window = self._windows[key] = _SeenWindow(seq)
+            if not window.accept(seq):
+                self.stats["duplicates"] += 1
+                return None
+            self.stats["received"] += 1
+        return view[sep + 1:]
+
+    def on_ack(self, payload, ip):
+        """Handle an 'ack:' payload (after the prefix)."""
+        now = time.monotonic()
+        view = memoryview(payload)
+        start = 0
+        keys = []
+        for i in range(len(view) + 1):
+            if i == len(view) or view[i] == 44:  # ','
+                if i > start:
+                    if view[start] == 103:  # 'g'
+                        keys.append((GROUP, _parse_int(view[start + 1:i])))
+                    else:
+                        keys.append((ip, _parse_int(view[start:i])))
+                start = i + 1
+        samples = []
+        with self._cond:
+            for key in keys:
+                pending = self._pending.get(key)
+                if pending is None:
+                    continue
+                if pending.waiting is not None:
+                    if ip not in pending.waiting:
+                        continue
+                    pending.waiting.discard(ip)
+                    if not pending.waiting:
+                        del self._pending[key]
+                else:
+                    del self._pending[key]
+                self.stats["acked"] += 1
+                if pending.retries == 0:  # Karn: only unambiguous samples
+                    samples.append(now - pending.first_sent)
+        for rtt in samples:
+            self.latency.sample(ip, rtt)
+
+    def flush_acks(self):
+        """Send one selective ack per peer for everything accepted so far."""
+        with self._cond:
+            if not self._acks:
+                return
+            acks, self._acks = self._acks, {}
+        for ip, seqs in acks.items():
+            self.send_raw(ip, ACK_PREFIX + b",".join(seqs))
+
+    def reset(self):
+        """Forget in-flight frames (end of match)."""
+        with self._cond:
+            self._pending.clear()
+            self._timers.clear()
+            self._acks.clear()
+
+    # --- retransmission ---
+    def _ensure_timer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._timer_loop, daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _targets(pending):
+        """Peers a frame must be (re)sent to; snapshot taken under the lock."""
+        if pending.waiting is not None:
+            return tuple(pending.waiting)
+        return (pending.ip,)
+
+    def _timer_loop(self):
+        while True:
+            resend = []
+            failed = []
+            with self._cond:
+                while not self._timers:
+                    self._cond.wait()
+                now = time.monotonic()
+                deadline = self._timers[0][0]
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+                while self._timers and self._timers[0][0] <= now:
+                    _, ip, seq = heapq.heappop(self._timers)
+                    pending = self._pending.get((ip, seq))
+                    if pending is None or pending.deadline > now:
+                        continue  # acked, or a newer timer entry exists
+                    if pending.retries >= MAX_RETRIES:
+                        del self._pending[(ip, seq)]
+                        self.stats["failed"] += 1
+                        failed.append((pending.message, self._targets(pending)))
+                        continue
+                    pending.retries += 1
+                    if pending.waiting is not None:
+                        rto = max(self.latency.rto(peer) for peer in pending.waiting)
+                    else:
+                        rto = self.latency.rto(ip)
+                    backoff = rto * (2 ** pending.retries)
+                    pending.deadline = now + min(MAX_RTO, backoff)
+                    heapq.heappush(self._timers, (pending.deadline, ip, seq))
+                    self.stats["retransmits"] += 1
+                    resend.append((pending.frame, self._targets(pending)))
+            for frame, targets in resend:
+                for ip in targets:
+                    try:
+                        self.send_raw(ip, frame)
+                    except Exception:
+                        pass
+            if self.on_fail is not None:
+                for message, targets in failed:
+                    for ip in targets:
+                        try:
+                            self.on_fail(ip, message)
+                        except Exception:
+                            pass
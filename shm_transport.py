@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Shared-memory transport for game processes on the same host.
+
+Every pair of local nodes talks through a single-producer/single-consumer
+byte ring in a multiprocessing.shared_memory block, created by the sender
+the first time it writes to that peer. Sending is a memcpy plus an index
+store: no syscall per message. The only syscall is the doorbell, a one-byte
+datagram on the receiver's Unix socket, and it is rung only when the
+receiver has flagged the ring as sleeping (it found every ring empty).
+The same socket carries new-ring announcements; the reader drains it without
+blocking on every pass, so a new peer is attached even while others keep
+their rings busy.
+
+Discovery is a directory (BATTLESHIP_SHM_DIR) with one `<ip>.node` file per
+live node plus its `<ip>.bell` doorbell socket. A node without real sockets
+gets a virtual address in 127.77.0.0/16; a node created with a `fallback`
+transport (e.g. SocketTransport) registers under its LAN address and sends
+to every ip that is not a local node through the fallback, so remote peers
+keep using UDP/TCP. Only one such gateway per host can own the game ports,
+and virtual nodes are reachable from the same host only.
+
+Ring layout (native byte order, 64-byte header):
+
+    head:u64 tail:u64 sleeping:u32 closed:u32 capacity:u32 ... data[capacity]
+    record = length:u32 kind:u8 pad:3 | payload, 8-byte aligned
+
+Records never wrap: a PAD record fills the end of the buffer instead. A full
+ring drops datagrams (counted in shm_ring_full) and makes send_stream wait
+up to its timeout, then raise OSError. Records are delivered in ring order.
+
+Platform: x86/x86-64 only (plus AF_UNIX datagram sockets: Linux, macOS on
+Intel). head/tail are published with plain stores and no memory barriers,
+which is only safe under x86's total store order; on weakly ordered CPUs
+(ARM, including Apple Silicon) a reader could see a new head before the
+payload, so start() refuses to run there. The sleeping-flag handshake can
+still lose a wakeup (store-load reordering between "flag set / head read"
+and "head written / flag read"); a sleeping reader rechecks its rings every
+IDLE_WAIT, so such a record waits at most 50 ms.
+"""
+
+import errno
+import json
+import os
+import platform
+import select
+import socket
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from transport import Transport, discover_lan_ip
+
+SHM_DIR = os.environ.get("BATTLESHIP_SHM_DIR",
+                         os.path.join(tempfile.gettempdir(), "pynetworkbattleship-shm"))
+VIRTUAL_PREFIX = "127.77."
+RING_SIZE = 1 << 16     # bytes de dados por par (remetente -> destinatário)
+IDLE_WAIT = 0.05        # s máximos dormindo sem doorbell: limite de atraso de um toque perdido
+TSO_MACHINES = ("x86_64", "amd64", "i386", "i486", "i586", "i686", "x86")
+LOOKUP_RETRY = 1.0      # s antes de procurar de novo um ip que não é nó local
+ANNOUNCE_TIMEOUT = 1.0  # s máximos para entregar o aviso de ring novo
+BATCH_SIZE = 64         # registros entregues por chamada de on_datagrams
+DRAIN_ROUNDS = 16       # lotes por ring a cada volta antes de olhar o doorbell de novo
+
+HEADER_SIZE = 64
+_U64 = struct.Struct("=Q")
+_U32 = struct.Struct("=I")
+_HEAD, _TAIL, _SLEEPING, _CLOSED, _CAPACITY = 0, 8, 16, 20, 24
+_RECORD = struct.Struct("=IB3x")
+KIND_DATAGRAM, KIND_STREAM, KIND_PAD = 0, 1, 2
+
+# Contadores do transporte (merge no dict de stats do chamador)
+SHM_STATS = (
+    "shm_sent",        # registros escritos em rings
+    "shm_received",    # registros lidos
+    "shm_doorbells",   # toques enviados (destinatário dormindo)
+    "shm_wakeups",     # vezes que o leitor dormiu e acordou
+    "shm_ring_full",   # datagramas descartados com o ring cheio
+)
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class ShmRing:
+    """SPSC byte ring in a SharedMemory block (see module doc for the layout)."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf
+        self.capacity = _U32.unpack_from(self.buf, _CAPACITY)[0]
+
+    @classmethod
+    def create(cls, name, capacity=RING_SIZE):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _U32.pack_into(shm.buf, _CAPACITY, capacity)
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # quem criou é o dono: não deixa o resource_tracker deste processo apagar o bloco
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm)
+
+    def _get64(self, offset):
+        return _U64.unpack_from(self.buf, offset)[0]
+
+    # --- produtor ---
+    def write(self, kind, data):
+        """Append one record; False if it does not fit right now."""
+        need = _align(_RECORD.size + len(data))
+        capacity = self.capacity
+        if need > capacity:
+            return False
+        buf = self.buf
+        head = self._get64(_HEAD)
+        used = head - self._get64(_TAIL)
+        pos = head % capacity
+        pad = capacity - pos if pos + need > capacity else 0
+        if used + pad + need > capacity:
+            return False
+        if pad:
+            _RECORD.pack_into(buf, HEADER_SIZE + pos, pad - _RECORD.size, KIND_PAD)
+            head += pad
+            pos = 0
+        start = HEADER_SIZE + pos
+        _RECORD.pack_into(buf, start, len(data), kind)
+        buf[start + _RECORD.size:start + _RECORD.size + len(data)] = data
+        _U64.pack_into(buf, _HEAD, head + need)  # publica o registro
+        return True
+
+    @property
+    def reader_sleeping(self):
+        return _U32.unpack_from(self.buf, _SLEEPING)[0] == 1
+
+    def close_writer(self):
+        _U32.pack_into(self.buf, _CLOSED, 1)
+
+    # --- consumidor ---
+    def pending(self):
+        return self._get64(_HEAD) != self._get64(_TAIL)
+
+    def read(self, limit):
+        """Up to `limit` records as [(kind, memoryview)] and the new tail;
+        the views stay valid until commit(tail)."""
+        buf = self.buf
+        capacity = self.capacity
+        head = self._get64(_HEAD)
+        tail = self._get64(_TAIL)
+        records = []
+        while tail < head and len(records) < limit:
+            pos = tail % capacity
+            length, kind = _RECORD.unpack_from(buf, HEADER_SIZE + pos)
+            if kind != KIND_PAD:
+                start = HEADER_SIZE + pos + _RECORD.size
+                records.append((kind, buf[start:start + length]))
+            tail += _align(_RECORD.size + length)
+        return records, tail
+
+    def commit(self, tail):
+        _U64.pack_into(self.buf, _TAIL, tail)
+
+    def set_sleeping(self, sleeping):
+        _U32.pack_into(self.buf, _SLEEPING, 1 if sleeping else 0)
+
+    @property
+    def writer_closed(self):
+        return _U32.unpack_from(self.buf, _CLOSED)[0] == 1
+
+    def close(self, unlink=False):
+        self.buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # alguma view ainda viva; o mapeamento some com o processo
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmRegistry:
+    """Directory of live local nodes: `<ip>.node` (JSON with the pid) and the
+    `<ip>.bell` doorbell socket."""
+
+    def __init__(self, directory=SHM_DIR):
+        self.directory = directory
+
+    def _node(self, ip):
+        return os.path.join(self.directory, ip + ".node")
+
+    def bell_path(self, ip):
+        return os.path.join(self.directory, ip + ".bell")
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _owner(self, ip):
+        try:
+            with open(self._node(ip), encoding="utf-8") as f:
+                return json.load(f).get("pid")
+        except (OSError, ValueError):
+            return None
+
+    def _claim(self, ip):
+        """Create <ip>.node exclusively; a stale entry (dead pid) is replaced."""
+        path = self._node(ip)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                pid = self._owner(ip)
+                if pid is not None and self._alive(pid):
+                    return False
+                self.unregister(ip)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid()}, f)
+            return True
+        return False
+
+    def register(self, ip=None):
+        """Claim ip (OSError EADDRINUSE if a live node has it), or the first
+        free virtual address when ip is None."""
+        os.makedirs(self.directory, exist_ok=True)
+        if ip is not None:
+            if not self._claim(ip):
+                raise OSError(errno.EADDRINUSE, f"nó local {ip} já registrado")
+            return ip
+        for n in range(1, 1 << 16):
+            candidate = f"{VIRTUAL_PREFIX}{n >> 8}.{n & 255}"
+            if candidate.endswith((".0", ".255")):
+                continue
+            if self._claim(candidate):
+                return candidate
+        raise OSError(errno.EADDRNOTAVAIL, "sem endereços virtuais livres")
+
+    def unregister(self, ip):
+        for path in (self._node(ip), self.bell_path(ip)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def is_local(self, ip):
+        pid = self._owner(ip)
+        return pid is not None and self._alive(pid)
+
+    def nodes(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-5] for name in names
+                if name.endswith(".node") and self.is_local(name[:-5])]
+
+
+class ShmTransport(Transport):
+    """Same-host transport over shared-memory rings, optionally falling back
+    to another transport for remote peers (see module doc)."""
+
+    def __init__(self, local_ip=None, fallback=None, directory=SHM_DIR,
+                 ring_size=RING_SIZE, stats=None):
+        if stats is None and fallback is not None:
+            stats = fallback.stats  # um só dict de métricas para os dois caminhos
+        super().__init__(stats)
+        for key in SHM_STATS:
+            self.stats.setdefault(key, 0)
+        self.fallback = fallback
+        self.registry = ShmRegistry(directory)
+        self.ring_size = ring_size
+        self._ip = local_ip or None
+        self._registered = False
+        self._out = {}         # ip -> ShmRing (eu escrevo)
+        self._out_lock = threading.Lock()
+        self._remote = {}      # ip -> monotonic da última busca sem sucesso
+        self._in = {}          # nome -> (ip, ShmRing) (eu leio)
+        self._pending_attach = []
+        self._attach_lock = threading.Lock()
+        self._bell = None      # socket do meu doorbell
+        self._tx = None        # socket (não bloqueante) para tocar os doorbells dos outros
+        self._announce = None  # socket bloqueante, com timeout, só para avisar rings novos
+        self._announce_lock = threading.Lock()  # serializa a criação de rings
+        self._thread = None
+        self._callbacks = (None, None, None)
+        self._stopping.set()
+
+    # --- identidade ---
+    @property
+    def local_ip(self):
+        """Registered address (claimed on first use)."""
+        if not self._registered:
+            self._register()
+        return self._ip
+
+    def _register(self):
+        ip = self._ip
+        if ip is None and self.fallback is not None:
+            ip = self.fallback.local_ip or discover_lan_ip(getattr(self.fallback, "udp_port", 5000))
+        self._ip = self.registry.register(ip or None)
+        self._registered = True
+
+    # --- lifecycle ---
+    def start(self, on_datagrams, on_stream, accept=None):
+        if platform.machine().lower() not in TSO_MACHINES:
+            print(f"Transporte de memória compartilhada indisponível em {platform.machine()} "
+                  "(rings sem barreiras de memória exigem x86).")
+            return False
+        if not hasattr(socket, "AF_UNIX"):
+            print("Transporte de memória compartilhada indisponível (sem AF_UNIX).")
+            return False
+        try:
+            ip = self.local_ip
+            if self._bell is None:
+                path = self.registry.bell_path(ip)
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                self._bell = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._bell.bind(path)
+                self._bell.setblocking(False)  # só espera dentro de _sleep, via select
+                self._tx = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._tx.setblocking(False)
+                self._announce = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._announce.settimeout(ANNOUNCE_TIMEOUT)
+        except OSError as e:
+            print(f"Falha ao registrar nó local: {e}")
+            return False
+        if self.fallback is not None and not self.fallback.start(on_datagrams, on_stream, accept):
+            return False
+        self._callbacks = (on_datagrams, on_stream, accept)
+        self._stopping.clear()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shm", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self, timeout=1.0):
+        self._stopping.set()
+        if self.fallback is not None:
+            self.fallback.stop(timeout)
+        if self._thread is not None:
+            self._ring_bell(self._ip)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._out_lock:
+            for ring in self._out.values():
+                ring.close_writer()
+                ring.close(unlink=True)
+            self._out.clear()
+        for _, ring in self._in.values():
+            ring.close()
+        self._in.clear()
+        for sock in (self._bell, self._tx, self._announce):
+            if sock is not None:
+                sock.close()
+        self._bell = self._tx = self._announce = None
+        if self._registered:
+            self.registry.unregister(self._ip)
+            self._registered = False
+        if self.fallback is not None:
+            self.fallback.close()
+
+    # --- envio ---
+    def _ring_bell(self, ip, message=b"\x00"):
+        if self._tx is None:
+            return False
+        try:
+            self._tx.sendto(message, self.registry.bell_path(ip))
+            self.stats["shm_doorbells"] += 1
+            return True
+        except (BlockingIOError, InterruptedError):
+            return True  # fila do doorbell cheia: o leitor já tem o que acordar
+        except OSError:
+            return False
+
+    def _ring_for(self, ip):
+        """Outbound ring to a local node (created on first use), or None."""
+        ring = self._out.get(ip)
+        if ring is not None:
+            return ring
+        missed = self._remote.get(ip)
+        if missed is not None and time.monotonic() - missed < LOOKUP_RETRY:
+            return None
+        if ip == self._ip or not self.registry.is_local(ip):
+            self._remote[ip] = time.monotonic()
+            return None
+        # cria e anuncia fora do _out_lock (os envios a outros rings seguem);
+        # o aviso não pode se perder, então vai pelo socket bloqueante próprio
+        with self._announce_lock:
+            ring = self._out.get(ip)
+            if ring is not None:
+                return ring
+            name = f"pnb-{os.getpid()}-{self._ip}-{ip}".replace(".", "_")
+            ring = ShmRing.create(name, self.ring_size)
+            try:
+                self._announce.sendto(b"R" + self._ip.encode() + b" " + name.encode(),
+                                      self.registry.bell_path(ip))
+            except OSError:  # inclui socket.timeout
+                ring.close(unlink=True)
+                self._remote[ip] = time.monotonic()
+                return None
+            with self._out_lock:
+                self._out[ip] = ring
+            self._remote.pop(ip, None)
+        return ring
+
+    def _drop_ring(self, ip):
+        with self._out_lock:
+            ring = self._out.pop(ip, None)
+        if ring is not None:
+            ring.close_writer()
+            ring.close(unlink=True)
+
+    def _write(self, ring, ip, kind, data):
+        with self._out_lock:  # um produtor por ring, mesmo com várias threads enviando
+            ok = ring.buf is not None and ring.write(kind, data)
+            sleeping = ok and ring.reader_sleeping
+        if ok:
+            self.stats["shm_sent"] += 1
+            if sleeping and not self._ring_bell(ip):
+                self._drop_ring(ip)  # destinatário sumiu
+        return ok
+
+    def send_datagram(self, ip, data):
+        ring = self._ring_for(ip)
+        if ring is None:
+            if self.fallback is not None:
+                self.fallback.send_datagram(ip, data)
+            return
+        if not self._write(ring, ip, KIND_DATAGRAM, data):
+            self.stats["shm_ring_full"] += 1
+
+    def send_stream(self, ip, data, timeout=None):
+        ring = self._ring_for(ip)
+        if ring is None:
+            if self.fallback is not None:
+                return self.fallback.send_stream(ip, data, timeout)
+            raise OSError(errno.EHOSTUNREACH, f"{ip} não é um nó local")
+        deadline = time.monotonic() + (timeout if timeout is not None else 1.0)
+        while not self._write(ring, ip, KIND_STREAM, data):
+            if len(data) + _RECORD.size > ring.capacity or time.monotonic() >= deadline:
+                raise OSError(errno.ENOBUFS, f"ring para {ip} cheio")
+            self._ring_bell(ip)
+            time.sleep(0.001)
+
+    def broadcast(self, data):
+        for ip in self.registry.nodes():
+            if ip != self._ip:
+                self.send_datagram(ip, data)
+        if self.fallback is not None:
+            self.fallback.broadcast(data)
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        self.multicast_group = group
+        if self.fallback is not None:
+            self.fallback.enable_multicast(group, ttl, loop, interface)
+
+    def send_group(self, data):
+        # sem grupos entre nós locais: todos recebem (como a LAN com multicast)
+        for ip in self.registry.nodes():
+            if ip != self._ip:
+                self.send_datagram(ip, data)
+        if self.fallback is not None and self.fallback.multicast_group is not None:
+            self.fallback.send_group(data)
+
+    # --- recepção ---
+    def _handle_bell(self, message):
+        if message[:1] == b"R":
+            src, _, name = message[1:].decode().partition(" ")
+            try:
+                self._in[name] = (src, ShmRing.attach(name))
+            except (OSError, ValueError) as e:
+                print(f"Falha ao abrir ring de {src}: {e}")
+
+    def _drain(self):
+        """Deliver what is in the rings; returns how many records."""
+        on_datagrams, on_stream, accept = self._callbacks
+        delivered = 0
+        for name, (src, ring) in list(self._in.items()):
+            for _ in range(DRAIN_ROUNDS):
+                records, tail = ring.read(BATCH_SIZE)
+                if not records:
+                    break
+                try:
+                    self._deliver(records, src, on_datagrams, on_stream, accept)
+                except Exception as e:
+                    print(f"Erro ao processar mensagens de {src}: {e}")
+                finally:
+                    for _, view in records:
+                        view.release()
+                    ring.commit(tail)
+                delivered += len(records)
+            if ring.writer_closed and not ring.pending():
+                del self._in[name]
+                ring.close()
+        self.stats["shm_received"] += delivered
+        return delivered
+
+    @staticmethod
+    def _deliver(records, src, on_datagrams, on_stream, accept):
+        """Deliver in ring order: runs of datagrams as one batch, each stream
+        message in its place (same order the sender wrote them)."""
+        datagrams = []
+        for kind, view in records:
+            if kind == KIND_DATAGRAM:
+                datagrams.append((view, src))
+                continue
+            if datagrams:
+                on_datagrams(datagrams)
+                datagrams = []
+            if accept is None or accept(src):
+                on_stream(view, src)
+        if datagrams:
+            on_datagrams(datagrams)
+
+    def _take_bells(self):
+        """Handle every queued doorbell and ring announcement, without blocking."""
+        while True:
+            try:
+                message = self._bell.recv(512)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._handle_bell(message)
+
+    def _sleep(self):
+        """Flag every inbound ring as sleeping, re-check, then wait for the
+        doorbell (IDLE_WAIT at most)."""
+        rings = [ring for _, ring in self._in.values()]
+        for ring in rings:
+            ring.set_sleeping(True)
+        try:
+            if any(ring.pending() for ring in rings):
+                return
+            if select.select([self._bell], [], [], IDLE_WAIT)[0]:
+                self.stats["shm_wakeups"] += 1
+        finally:
+            for ring in rings:
+                ring.set_sleeping(False)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                # avisos de ring novo são lidos a cada volta, mesmo com os rings ocupados
+                self._take_bells()
+                if not self._drain():
+                    self._sleep()
+            except Exception as e:
+                print(f"Erro no transporte de memória compartilhada: {e}")
+                time.sleep(IDLE_WAIT)
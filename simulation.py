@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Large-room simulation on transport.MemoryNetwork.
+
+Thousands of lightweight players (SimPlayer) in one process, speaking the
+game's wire protocol: "Conectando" broadcast, "participantes:[...]" reply
+over the stream, shot/hit/moved/saindo, reliable frames (acked) and
+ping/pong. A real node from main.py can join the same network through
+main.use_transport(network.attach()) + network.start().
+
+Everything runs on the network's virtual clock from one thread, so a run is
+reproducible for a given seed:
+
+    python simulation.py --players 500 --seconds 60 --loss 0.02 --seed 7
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from batching import is_batch, split_batch
+from peers import PeerRegistry, PeerSet
+from transport import MemoryNetwork
+
+
+class SimPlayer:
+    """One simulated player: protocol handling only, no UI, no threads."""
+
+    def __init__(self, network, grid_size, rng, action_interval=10.0, move_chance=0.2,
+                 registry=None):
+        self.network = network
+        self.transport = network.attach()
+        self.ip = self.transport.local_ip
+        # um registro compartilhado pela sala: cada conjunto é um bitmap de ids
+        self.registry = registry if registry is not None else PeerRegistry()
+        self.id = self.registry.intern(self.ip)
+        self.grid_size = grid_size
+        self.rng = rng
+        self.action_interval = action_interval
+        self.move_chance = move_chance
+        self.position = (rng.randrange(grid_size), rng.randrange(grid_size))
+        self.participants = PeerSet(self.registry)
+        self.players_hit = PeerSet(self.registry)
+        self.times_hit = 0
+        self.active = False
+        self.counts = {"received": 0, "sent": 0}
+
+    # --- lifecycle ---
+    def join(self):
+        self.transport.start(self.on_datagrams, self.on_stream)
+        self.active = True
+        self._send_broadcast(b"Conectando")
+        self.network.call_later(self.rng.uniform(0, self.action_interval), self.act)
+
+    def leave(self):
+        if not self.active:
+            return
+        self._send_all(b"saindo")
+        self.active = False
+        self.transport.stop()
+
+    # --- ações ---
+    def act(self):
+        if not self.active:
+            return
+        if self.rng.random() < self.move_chance:
+            x, y = self.position
+            dx, dy = self.rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+            x = min(self.grid_size - 1, max(0, x + dx))
+            y = min(self.grid_size - 1, max(0, y + dy))
+            self.position = (x, y)
+            self._send_all(b"moved")
+        else:
+            x, y = self.rng.randrange(self.grid_size), self.rng.randrange(self.grid_size)
+            self._send_all(b"shot:%d,%d" % (x, y))
+        self.network.call_later(self.action_interval, self.act)
+
+    # --- envio ---
+    def _send(self, ip, data):
+        self.counts["sent"] += 1
+        self.transport.send_datagram(ip, data)
+
+    def _send_all(self, data):
+        for ip in self.participants:
+            self._send(ip, data)
+
+    def _send_broadcast(self, data):
+        self.counts["sent"] += 1
+        self.transport.broadcast(data)
+
+    def _send_stream(self, ip, data):
+        self.counts["sent"] += 1
+        try:
+            self.transport.send_stream(ip, data)
+        except OSError:
+            pass
+
+    # --- recepção ---
+    def on_datagrams(self, batch):
+        acks = {}
+        for data, ip in batch:
+            for part in (split_batch(data) if is_batch(data) else (data,)):
+                message = bytes(part).strip()
+                if message.startswith(b"rel:"):
+                    seq, _, message = message[4:].partition(b":")
+                    acks.setdefault(ip, []).append(seq)
+                self.handle(message, ip)
+        for ip, seqs in acks.items():
+            self._send(ip, b"ack:" + b",".join(seqs))
+
+    def on_stream(self, data, ip):
+        for part in (split_batch(data) if is_batch(data) else (data,)):
+            self.handle(bytes(part).strip(), ip)
+
+    def handle(self, message, ip):
+        self.counts["received"] += 1
+        if message.startswith(b"shot:"):
+            if self._coords(message[5:]) == self.position:
+                self.times_hit += 1
+                self._send(ip, b"hit")
+        elif message == b"hit":
+            self.players_hit.add(ip)
+        elif message == b"Conectando":
+            pid = self.registry.intern(ip)
+            if pid != self.id and self.participants.add_id(pid):
+                everyone = list(self.participants)
+                everyone.append(self.ip)
+                self._send_stream(ip, ("participantes:%s" % everyone).encode())
+        elif message.startswith(b"participantes:"):
+            for pid in self.registry.parse_list(message[14:].decode()):
+                if pid != self.id:
+                    self.participants.add_id(pid)
+        elif message == b"saindo":
+            self.participants.discard(ip)
+        elif message.startswith(b"ping:"):
+            self._send(ip, b"pong:" + message[5:])
+
+    def score(self):
+        """Same rule as main.calculate_score: (score, hits, times_hit)."""
+        hits = len(self.players_hit)
+        return hits - self.times_hit, hits, self.times_hit
+
+    @staticmethod
+    def _coords(payload):
+        x, _, y = payload.partition(b",")
+        return int(x), int(y)
+
+
+def run_simulation(players=100, seconds=30.0, seed=0, latency=0.001, jitter=0.0,
+                   loss=0.0, reorder=0.0, grid_size=10, action_interval=10.0,
+                   join_window=1.0, per_player=False):
+    """Run one simulated match and return a summary dict.
+
+    With per_player=True the summary also has "results": one
+    {"slot", "score", "hits", "times_hit"} per player, in join order.
+    """
+    rng = random.Random(seed)
+    network = MemoryNetwork(seed=seed, latency=latency, jitter=jitter,
+                            loss=loss, reorder=reorder)
+    registry = PeerRegistry()
+    room = [SimPlayer(network, grid_size, random.Random(rng.random()),
+                      action_interval=action_interval, registry=registry)
+            for _ in range(players)]
+    for player in room:
+        network.call_at(rng.uniform(0.0, join_window), player.join)
+    for player in room:
+        network.call_at(seconds, player.leave)
+
+    t0 = time.perf_counter()
+    steps = network.run(until=seconds + 1.0)
+    wall = time.perf_counter() - t0
+
+    known = [len(p.participants) for p in room]
+    summary = {
+        "players": players,
+        "seed": seed,
+        "virtual_seconds": seconds,
+        "wall_seconds": round(wall, 3),
+        "steps": steps,
+        "network": dict(network.stats),
+        "messages_sent": sum(p.counts["sent"] for p in room),
+        "messages_received": sum(p.counts["received"] for p in room),
+        "participants_known_min": min(known) if known else 0,
+        "participants_known_avg": round(sum(known) / len(known), 2) if known else 0,
+        "hits": sum(len(p.players_hit) for p in room),
+        "times_hit": sum(p.times_hit for p in room),
+    }
+    if per_player:
+        summary["results"] = []
+        for slot, player in enumerate(room):
+            score, hits, times_hit = player.score()
+            summary["results"].append(
+                {"slot": slot, "score": score, "hits": hits, "times_hit": times_hit})
+    return summary
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=30.0, help="virtual match length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.001, help="one-way delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay (s)")
+    parser.add_argument("--loss", type=float, default=0.0, help="datagram loss probability")
+    parser.add_argument("--reorder", type=float, default=0.0, help="reorder probability")
+    parser.add_argument("--interval", type=float, default=10.0, help="s between actions")
+    args = parser.parse_args(argv)
+
+    summary = run_simulation(players=args.players, seconds=args.seconds, seed=args.seed,
+                             latency=args.latency, jitter=args.jitter, loss=args.loss,
+                             reorder=args.reorder, action_interval=args.interval)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Crash-safe game state snapshots.
+
+A SnapshotWriter thread samples the state every `interval` seconds and
+rewrites the snapshot file only when something changed; otherwise it just
+touches the file, so its mtime is the writer's heartbeat. Writes go to a
+temporary file in the same directory, are fsync'ed and then os.replace()d
+over the old one, so a crash at any point leaves either the previous or the
+new snapshot on disk, never a torn one.
+
+On restart, load_snapshot() returns the last state if the writer was alive
+recently enough (and it is of the same node), however long the state itself
+went unchanged; a clean end of match deletes the file, so only
+interrupted matches are resumed.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path, state):
+    """Atomically replace `path` with `state` (a JSON-serializable dict)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path, max_age=None, ip=None):
+    """The saved state, or None if missing, corrupt, stale (neither saved nor
+    touched in the last max_age seconds) or written by another ip."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            alive_at = os.fstat(f.fileno()).st_mtime
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+        return None
+    alive_at = max(alive_at, state.get("saved_at", 0))
+    if max_age is not None and time.time() - alive_at > max_age:
+        return None
+    if ip is not None and state.get("ip") != ip:
+        return None
+    return state
+
+
+def remove_snapshot(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SnapshotWriter:
+    """Periodic, dirty-checked snapshots of one match.
+
+    Args:
+        path: snapshot file
+        sample: sample() -> hashable token that changes whenever the state
+            does (cheap, taken under the game lock)
+        build: build() -> dict to save (only called when the token changed)
+        interval: seconds between samples
+    """
+
+    def __init__(self, path, sample, build, interval=1.0):
+        self.path = path
+        self.sample = sample
+        self.build = build
+        self.interval = interval
+        self.writes = 0
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._last = None
+        self._thread = threading.Thread(target=self._run, name="snapshot", daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        """Write now if the state changed since the last write; otherwise
+        touch the file (heartbeat for load_snapshot's max_age)."""
+        token = self.sample()
+        if token == self._last:
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass  # apagado por fora: a próxima mudança regrava
+            return False
+        state = self.build()
+        state["version"] = SNAPSHOT_VERSION
+        state["saved_at"] = time.time()
+        try:
+            write_snapshot(self.path, state)
+        except Exception as e:
+            print(f"Falha ao salvar snapshot em {self.path}: {e}")
+            return False
+        self._last = token
+        self.writes += 1
+        return True
+
+    def stop(self, discard=False):
+        """Stop sampling; discard=True deletes the file (match ended cleanly)."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(2.0)
+            self._thread = None
+        if discard:
+            remove_snapshot(self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Read-only spectator feed.
+
+A player's SpectatorPublisher samples its own board (position, times hit,
+players it hit, participants it knows) every PUBLISH_INTERVAL seconds, off
+the network threads, and publishes what changed as a delta frame; every
+KEYFRAME_INTERVAL seconds it publishes the full state as a keyframe. Frames
+are zlib-compressed JSON split in datagram-sized parts:
+
+    spec:<src ipv4:4><kind:1 'K'|'D'><seq:u32><part:u16><parts:u16><zlib chunk>
+
+Frames go to a relay (one extra datagram per tick, whatever the audience)
+and/or to spectators that sent "watch" straight to the player. A
+SpectatorRelay fans the frames out and keeps the merged state, so a
+spectator joining mid-match gets a keyframe of every player at once.
+Spectators never become participants: they are not shot at and cost the
+players nothing per message.
+
+    python spectator.py relay                 # relay nas portas do jogo
+    python spectator.py watch 192.168.0.10    # assiste (relay ou jogador)
+    python spectator.py watch 192.168.0.10 --headless
+"""
+
+import argparse
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+SPEC_PREFIX = b"spec:"
+KEYFRAME = ord("K")
+DELTA = ord("D")
+_HEADER = struct.Struct("!4sBIHH")  # src, kind, seq, part, parts
+MAX_PART = 1200          # bytes de zlib por datagrama (cabe em qualquer MTU)
+PUBLISH_INTERVAL = 0.25  # s entre amostras do publicador
+KEYFRAME_INTERVAL = 5.0  # s entre keyframes periódicos
+WATCH_INTERVAL = 5.0     # s entre "watch" do espectador (mantém a inscrição)
+WATCH_TIMEOUT = 15.0     # inscrição sem "watch" por esse tempo expira
+HISTORY_SIZE = 50
+
+
+# =============================================================================
+# QUADROS
+# =============================================================================
+
+def encode_frame(src_ip, kind, seq, body):
+    """Datagrams (one per part) carrying `body` (a JSON-serializable dict)."""
+    data = zlib.compress(json.dumps(body, separators=(",", ":")).encode(), 6)
+    chunks = [data[i:i + MAX_PART] for i in range(0, len(data), MAX_PART)] or [b""]
+    src = socket.inet_aton(src_ip)
+    return [SPEC_PREFIX + _HEADER.pack(src, kind, seq & 0xFFFFFFFF, part, len(chunks)) + chunk
+            for part, chunk in enumerate(chunks)]
+
+
+class FrameAssembler:
+    """Joins the parts of each frame; returns whole frames as they complete.
+
+    Incomplete frames are forgotten once `keep` newer ones are pending (a
+    lost part just means that frame never completes)."""
+
+    def __init__(self, keep=8):
+        self.keep = keep
+        self._pending = {}  # (src, kind, seq) -> [kind, parts list]
+
+    def feed(self, data):
+        """data: one datagram (without or with the "spec:" prefix).
+        Returns (src_ip, kind, seq, body) or None."""
+        data = bytes(data)
+        if data.startswith(SPEC_PREFIX):
+            data = data[len(SPEC_PREFIX):]
+        if len(data) < _HEADER.size:
+            return None
+        src, kind, seq, part, parts = _HEADER.unpack_from(data)
+        if kind not in (KEYFRAME, DELTA) or part >= parts:
+            return None
+        chunk = data[_HEADER.size:]
+        if parts > 1:
+            key = (src, kind, seq)
+            entry = self._pending.get(key)
+            if entry is None:
+                if len(self._pending) >= self.keep:
+                    del self._pending[next(iter(self._pending))]
+                entry = self._pending[key] = [kind, [None] * parts]
+            if len(entry[1]) != parts:
+                return None
+            entry[1][part] = chunk
+            if any(piece is None for piece in entry[1]):
+                return None
+            del self._pending[key]
+            chunk = b"".join(entry[1])
+        try:
+            body = json.loads(zlib.decompress(chunk))
+        except (zlib.error, ValueError):
+            return None
+        return socket.inet_ntoa(src), kind, seq, body
+
+
+# =============================================================================
+# ESTADO
+# =============================================================================
+
+class PlayerView:
+    """What spectators know about one player."""
+
+    __slots__ = ("pos", "times_hit", "hits", "peers")
+
+    def __init__(self, pos=None, times_hit=0, hits=(), peers=()):
+        self.pos = tuple(pos) if pos is not None else None
+        self.times_hit = times_hit
+        self.hits = set(hits)
+        self.peers = set(peers)
+
+    @classmethod
+    def from_keyframe(cls, body):
+        return cls(body.get("pos"), body.get("hit", 0), body.get("hits", ()), body.get("peers", ()))
+
+    def keyframe(self):
+        return {"pos": list(self.pos) if self.pos is not None else None,
+                "hit": self.times_hit, "hits": sorted(self.hits), "peers": sorted(self.peers)}
+
+    def delta_to(self, new):
+        """Delta dict that turns self into `new` ({} if nothing changed)."""
+        delta = {}
+        if new.pos != self.pos:
+            delta["pos"] = list(new.pos) if new.pos is not None else None
+        if new.times_hit != self.times_hit:
+            delta["hit"] = new.times_hit
+        for name, old_set, new_set in (("hits", self.hits, new.hits),
+                                       ("peers", self.peers, new.peers)):
+            added = new_set - old_set
+            removed = old_set - new_set
+            if added:
+                delta[name + "+"] = sorted(added)
+            if removed:
+                delta[name + "-"] = sorted(removed)
+        return delta
+
+    def apply(self, src, delta):
+        """Apply a delta; returns human-readable events for the history."""
+        events = []
+        if "pos" in delta:
+            self.pos = tuple(delta["pos"]) if delta["pos"] is not None else None
+            events.append(f"{src} moveu para {self.pos}")
+        if "hit" in delta:
+            if delta["hit"] > self.times_hit:
+                events.append(f"{src} foi atingido ({delta['hit']}x)")
+            self.times_hit = delta["hit"]
+        for ip in delta.get("hits+", ()):
+            self.hits.add(ip)
+            events.append(f"{src} acertou {ip}")
+        self.hits.difference_update(delta.get("hits-", ()))
+        self.peers.update(delta.get("peers+", ()))
+        self.peers.difference_update(delta.get("peers-", ()))
+        return events
+
+    @property
+    def score(self):
+        return len(self.hits) - self.times_hit
+
+
+class SpectatorState:
+    """Merged view of every publishing player (thread-safe).
+
+    apply() returns False when a delta cannot be applied (no keyframe yet
+    for that player, or a frame was lost); the caller asks for a keyframe.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.views = {}  # src ip -> PlayerView
+        self.seqs = {}   # src ip -> seq do último quadro aplicado
+        self.history = deque(maxlen=history_size)
+        self.lock = threading.Lock()
+        self.notify = None  # chamado a cada mudança (ex.: ui.wake_ui)
+        self.needs_keyframe = False
+
+    def apply(self, src, kind, seq, body):
+        with self.lock:
+            if kind == KEYFRAME:
+                self.views[src] = PlayerView.from_keyframe(body)
+                self.seqs[src] = seq
+                ok = True
+            else:
+                view = self.views.get(src)
+                ok = view is not None and seq == (self.seqs[src] + 1) & 0xFFFFFFFF
+                if ok:
+                    self.seqs[src] = seq
+                    now = time.time()
+                    for event in view.apply(src, body):
+                        self.history.appendleft((now, event))
+                elif view is not None and seq != self.seqs[src]:
+                    # buraco na sequência: descarta até o próximo keyframe
+                    del self.views[src]
+                    del self.seqs[src]
+            if body.get("left") and self.views.pop(src, None) is not None:
+                del self.seqs[src]
+                self.history.appendleft((time.time(), f"{src} saiu"))
+                ok = True
+        if not ok:
+            self.needs_keyframe = True
+        if self.notify is not None:
+            self.notify()
+        return ok
+
+    def snapshot(self):
+        """[(src, pos, hits, times_hit, score)] sorted by score (for drawing)."""
+        with self.lock:
+            rows = [(src, view.pos, len(view.hits), view.times_hit, view.score)
+                    for src, view in self.views.items()]
+        rows.sort(key=lambda row: (-row[4], row[0]))
+        return rows
+
+    def keyframes(self):
+        """Keyframe datagrams of every known player at its current seq
+        (sent by the relay to a spectator that just joined)."""
+        with self.lock:
+            items = [(src, self.seqs[src], view.keyframe()) for src, view in self.views.items()]
+        frames = []
+        for src, seq, body in items:
+            frames.extend(encode_frame(src, KEYFRAME, seq, body))
+        return frames
+
+
+class Subscribers:
+    """Spectators that sent "watch", expiring WATCH_TIMEOUT after the last one."""
+
+    def __init__(self, timeout=WATCH_TIMEOUT):
+        self.timeout = timeout
+        self._seen = {}  # ip -> monotonic do último watch
+        self._lock = threading.Lock()
+
+    def watch(self, ip):
+        """Returns True if ip was not subscribed."""
+        with self._lock:
+            new = ip not in self._seen
+            self._seen[ip] = time.monotonic()
+        return new
+
+    def unwatch(self, ip):
+        with self._lock:
+            self._seen.pop(ip, None)
+
+    def current(self):
+        limit = time.monotonic() - self.timeout
+        with self._lock:
+            for ip in [ip for ip, seen in self._seen.items() if seen < limit]:
+                del self._seen[ip]
+            return list(self._seen)
+
+    def __len__(self):
+        return len(self._seen)
+
+
+# =============================================================================
+# PUBLICADOR (jogador)
+# =============================================================================
+
+class SpectatorPublisher:
+    """Publishes one player's board to a relay and/or direct spectators.
+
+    Args:
+        sample: sample() -> hashable token that changes whenever the board
+            does (cheap, taken under the game lock)
+        build: build() -> (position, times_hit, players_hit ips, participant ips);
+            only called when the token changed
+        send: send(ip, data) for one datagram (the game's transport)
+        relay: relay ip, or None
+    """
+
+    def __init__(self, sample, build, send, relay=None, interval=PUBLISH_INTERVAL,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.sample = sample
+        self.build = build
+        self.send = send
+        self.relay = relay
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+        self.subscribers = Subscribers()
+        self.frames = 0
+        self.src_ip = None
+        self._view = None
+        self._token = None
+        self._seq = 0
+        self._last_keyframe = 0.0
+        self._joined = set()  # espectadores esperando keyframe
+        self._joined_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, ip):
+        """A spectator asked for the feed (also re-sent after a lost frame)."""
+        self.subscribers.watch(ip)
+        with self._joined_lock:
+            self._joined.add(ip)
+
+    def unwatch(self, ip):
+        self.subscribers.unwatch(ip)
+        with self._joined_lock:
+            self._joined.discard(ip)
+
+    def start(self, src_ip):
+        if self._thread is not None:
+            return
+        self.src_ip = src_ip
+        self._view = None
+        self._token = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spectator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop publishing; tells the audience this player left."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(2.0)
+        self._thread = None
+        targets = self._targets()
+        if targets and self._view is not None:
+            self._publish(targets, DELTA, {"left": True})
+        self._view = None
+
+    def _targets(self):
+        targets = self.subscribers.current()
+        if self.relay:
+            targets.append(self.relay)
+        return targets
+
+    def _publish(self, targets, kind, body):
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        frames = encode_frame(self.src_ip, kind, self._seq, body)
+        for ip in targets:
+            for frame in frames:
+                try:
+                    self.send(ip, frame)
+                except Exception as e:
+                    print(f"Falha ao publicar para espectador {ip}: {e}")
+        self.frames += 1
+
+    def tick(self):
+        """One publishing step (called by the thread every `interval`)."""
+        targets = self._targets()
+        if not targets:
+            self._view = None  # ninguém assistindo: nem amostra
+            return
+        token = self.sample()
+        if self._view is None or token != self._token:
+            pos, times_hit, hits, peers = self.build()
+            view = PlayerView(pos, times_hit, hits, peers)
+        else:
+            view = self._view
+        with self._joined_lock:
+            joined, self._joined = self._joined, set()
+        now = time.monotonic()
+        if self._view is None or now - self._last_keyframe >= self.keyframe_interval:
+            self._publish(targets, KEYFRAME, view.keyframe())
+            self._last_keyframe = now
+        else:
+            delta = self._view.delta_to(view)
+            if delta:
+                # quem acabou de chegar pula este delta: recebe o keyframe da mesma seq
+                self._publish([ip for ip in targets if ip not in joined], DELTA, delta)
+            if joined:
+                # keyframe só para quem chegou, na seq atual (sem consumir seq)
+                frames = encode_frame(self.src_ip, KEYFRAME, self._seq, view.keyframe())
+                for ip in joined:
+                    for frame in frames:
+                        self.send(ip, frame)
+        self._view = view
+        self._token = token
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Erro no publicador de espectadores: {e}")
+
+
+# =============================================================================
+# RELAY E ESPECTADOR
+# =============================================================================
+
+class SpectatorRelay:
+    """Fans player frames out to spectators and serves keyframes to joiners."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.state = SpectatorState()
+        self.subscribers = Subscribers()
+        self.assembler = FrameAssembler()
+        self.forwarded = 0
+
+    def start(self):
+        return self.transport.start(self._on_datagrams, self._on_stream)
+
+    def stop(self):
+        self.transport.stop()
+
+    def _on_stream(self, data, ip):
+        pass
+
+    def _on_datagrams(self, batch):
+        targets = None
+        for data, ip in batch:
+            data = bytes(data)
+            if data.startswith(SPEC_PREFIX):
+                if targets is None:
+                    targets = self.subscribers.current()
+                for target in targets:
+                    self.transport.send_datagram(target, data)
+                    self.forwarded += 1
+                frame = self.assembler.feed(data)
+                if frame is not None:
+                    self.state.apply(*frame)
+            elif data.strip() == b"watch":
+                self.subscribers.watch(ip)
+                for frame in self.state.keyframes():
+                    self.transport.send_datagram(ip, frame)
+            elif data.strip() == b"unwatch":
+                self.subscribers.unwatch(ip)
+
+
+class SpectatorClient:
+    """Watches a relay or a single player through a transport."""
+
+    def __init__(self, transport, target, state=None):
+        self.transport = transport
+        self.target = target
+        self.state = state if state is not None else SpectatorState()
+        self.assembler = FrameAssembler()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.transport.start(self._on_datagrams, lambda data, ip: None):
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="watch", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        try:
+            self.transport.send_datagram(self.target, b"unwatch")
+        except Exception:
+            pass
+        self.transport.stop()
+
+    def _on_datagrams(self, batch):
+        for data, ip in batch:
+            frame = self.assembler.feed(data)
+            if frame is not None:
+                self.state.apply(*frame)
+
+    def _run(self):
+        last = 0.0
+        while not self._stop.wait(0.1):
+            now = time.monotonic()
+            if self.state.needs_keyframe or now - last >= WATCH_INTERVAL:
+                self.state.needs_keyframe = False
+                last = now
+                try:
+                    self.transport.send_datagram(self.target, b"watch")
+                except Exception as e:
+                    print(f"Falha ao enviar watch para {self.target}: {e}")
+
+
+def _print_board(state):
+    rows = state.snapshot()
+    print(f"--- {len(rows)} jogadores ---")
+    for src, pos, hits, times_hit, score in rows:
+        print(f"{src:<15} pos={pos} acertos={hits} atingido={times_hit} score={score}")
+    for _, event in list(state.history)[:5]:
+        print(f"  {event}")
+
+
+def main_cli(argv=None):
+    import main  # portas, IP local e transportes configurados como no jogo
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mode", choices=("relay", "watch"))
+    parser.add_argument("target", nargs="?", help="ip do relay ou do jogador (watch)")
+    parser.add_argument("--headless", action="store_true", help="imprime o placar no console")
+    args = parser.parse_args(argv)
+    transport = main.transport
+
+    if args.mode == "relay":
+        relay = SpectatorRelay(transport)
+        if not relay.start():
+            return 1
+        print(f"Relay de espectadores em {main.get_my_ip()}:{main.UDP_PORT}")
+        try:
+            while True:
+                time.sleep(WATCH_INTERVAL)
+                print(f"[Relay] {len(relay.state.views)} jogadores, "
+                      f"{len(relay.subscribers)} espectadores, {relay.forwarded} repassados")
+        except KeyboardInterrupt:
+            relay.stop()
+            transport.close()
+            return 0
+
+    if not args.target:
+        parser.error("watch precisa do ip do relay ou do jogador")
+    client = SpectatorClient(transport, args.target)
+    if not client.start():
+        return 1
+    try:
+        if args.headless:
+            while True:
+                time.sleep(2.0)
+                _print_board(client.state)
+        else:
+            import ui
+            screen = ui.SpectatorScreen(client.state, args.target, grid_size=main.GRID_SIZE)
+            screen.start()
+            screen.join()
+            ui.shutdown_ui()
+    except KeyboardInterrupt:
+        pass
+    client.stop()
+    transport.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Automated tournaments of headless players, many matches in parallel.
+
+Each match is one simulation.run_simulation() (MemoryNetwork, virtual clock)
+with `--players` entrants drawn from a pool of `--entrants` named bots. Matches
+run in a ProcessPoolExecutor (one per core by default); the parent process
+collects the per-player scores (main.calculate_score's rule) and writes them
+to the SQLite leaderboard in batches, so the ranking is always up to date and
+an interrupted tournament resumes where it stopped:
+
+    python tournament.py --matches 10000 --players 8 --entrants 200 --name liga1
+    python tournament.py --top 20 --order average      # só consulta
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from leaderboard import ORDERS, Leaderboard
+from simulation import run_simulation
+
+DEFAULT_DB = os.path.join(os.path.expanduser("~"), ".pynetworkbattleship", "leaderboard.db")
+COMMIT_EVERY = 200      # partidas por transação no leaderboard
+INFLIGHT_PER_WORKER = 4  # partidas enviadas ao pool por worker (limita memória)
+
+
+def entrant_names(count):
+    return [f"bot-{i:04d}" for i in range(count)]
+
+
+def draw_entrants(tournament, seed, entrants, players):
+    """Entrants of one match: deterministic for (tournament, seed)."""
+    return random.Random(f"{tournament}:{seed}").sample(entrants, players)
+
+
+def play_match(tournament, seed, names, options):
+    """Runs in a worker process. Returns (tournament, seed, results, wall)."""
+    summary = run_simulation(players=len(names), seed=seed, per_player=True, **options)
+    results = [(names[r["slot"]], r["score"], r["hits"], r["times_hit"])
+               for r in summary["results"]]
+    return tournament, seed, results, summary["wall_seconds"]
+
+
+def run_tournament(db, tournament="default", matches=100, players=8, entrants=64,
+                   workers=None, first_seed=0, progress=None, **options):
+    """Play seeds first_seed..first_seed+matches-1 (skipping the ones already in
+    the leaderboard) and record them. Returns the number of new matches."""
+    if players > entrants:
+        raise ValueError("--players não pode ser maior que --entrants")
+    names = entrant_names(entrants)
+    done = db.played_seeds(tournament)
+    pending = (seed for seed in range(first_seed, first_seed + matches) if seed not in done)
+    workers = workers or os.cpu_count() or 1
+    recorded = 0
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight = set()
+        exhausted = False
+        while inflight or not exhausted:
+            while not exhausted and len(inflight) < workers * INFLIGHT_PER_WORKER:
+                seed = next(pending, None)
+                if seed is None:
+                    exhausted = True
+                    break
+                match_names = draw_entrants(tournament, seed, names, players)
+                inflight.add(pool.submit(play_match, tournament, seed, match_names, options))
+            if not inflight:
+                break
+            finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    batch.append(future.result())
+                except Exception as e:
+                    print(f"Erro numa partida do torneio: {e}")
+            if len(batch) >= COMMIT_EVERY or (exhausted and not inflight):
+                recorded += db.record_many(batch)
+                batch = []
+                if progress is not None:
+                    progress(recorded)
+    if batch:
+        recorded += db.record_many(batch)
+    return recorded
+
+
+def print_top(db, limit, order):
+    rows = db.top(limit, order)
+    print(f"{'#':>4} {'jogador':<10} {'jogos':>7} {'vitórias':>8} {'total':>8} {'média':>7} {'melhor':>6}")
+    for rank, player, games, wins, total, average, best in rows:
+        print(f"{rank:>4} {player:<10} {games:>7} {wins:>8} {total:>8} {average:>7.2f} {best:>6}")
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB, help="arquivo SQLite do leaderboard")
+    parser.add_argument("--name", default="default", help="nome do torneio")
+    parser.add_argument("--matches", type=int, default=0, help="partidas a jogar (0 = só consulta)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=8, help="jogadores por partida")
+    parser.add_argument("--entrants", type=int, default=64, help="bots inscritos no torneio")
+    parser.add_argument("--workers", type=int, default=0, help="processos (0 = um por core)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="duração virtual da partida")
+    parser.add_argument("--interval", type=float, default=2.0, help="s entre ações de cada bot")
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--top", type=int, default=10, help="linhas do ranking ao final")
+    parser.add_argument("--order", choices=sorted(ORDERS), default="total")
+    args = parser.parse_args(argv)
+
+    with Leaderboard(args.db) as db:
+        if args.matches:
+            t0 = time.perf_counter()
+            new = run_tournament(
+                db, args.name, args.matches, args.players, args.entrants,
+                workers=args.workers or None, first_seed=args.first_seed,
+                progress=lambda n: print(f"[Torneio] {n} partidas gravadas"),
+                seconds=args.seconds, action_interval=args.interval,
+                loss=args.loss, jitter=args.jitter)
+            elapsed = time.perf_counter() - t0
+            print(f"[Torneio] {new} partidas novas em {elapsed:.1f}s "
+                  f"({new / elapsed if elapsed else 0:.0f}/s); {db.match_count()} no total")
+        if args.top:
+            t0 = time.perf_counter()
+            print_top(db, args.top, args.order)
+            print(f"(consulta em {(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
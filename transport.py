@@ -0,0 +1,970 @@
+#!/usr/bin/env python3
+"""
+Transports: how a node's bytes reach the other nodes.
+
+The game logic (main.py) only talks to a Transport:
+
+    start(on_datagrams, on_stream, accept=None)
+        on_datagrams([(data, ip), ...])  a burst of datagrams (data may be a
+                                         memoryview valid only during the call)
+        on_stream(data, ip)              one whole stream message (TCP: each
+                                         connection carries one message, read
+                                         until EOF)
+        accept(ip) -> bool               optional; False refuses a stream peer
+    send_datagram(ip, data)   unreliable, unordered (UDP)
+    broadcast(data)           datagram to every node on the LAN
+    send_stream(ip, data, timeout=None)
+                              reliable one-shot message (TCP connect+send);
+                              raises OSError when the peer is unreachable
+    enable_multicast(group, ttl=1, loop=False, interface="") / send_group(data)
+    stop() / close(), stopping, wait_stopping(timeout)
+
+Implementations:
+    SocketTransport    real UDP/TCP sockets, selector threads + worker pool
+    AsyncioTransport   real UDP/TCP sockets on an asyncio loop (one thread)
+    MemoryTransport    nodes of a MemoryNetwork: in-process, deterministic
+                       (seeded latency, jitter, loss and reordering, virtual
+                       clock), for simulating large rooms without sockets
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+from workers import WorkerPool
+
+BROADCAST_ADDR = '255.255.255.255'
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+_ANCBUF_SIZE = socket.CMSG_SPACE(4) if hasattr(socket, "CMSG_SPACE") else 0
+MAX_STREAM_MESSAGE = 1 << 20  # bytes; conexão que passa disso é descartada
+
+# Contadores mantidos pelos transportes (merge no dict de stats do chamador)
+TRANSPORT_STATS = (
+    "udp_truncated",     # maiores que o buffer de recepção (cortados)
+    "udp_kernel_drops",  # descartados pelo kernel por buffer cheio (SO_RXQ_OVFL)
+    "tcp_accepted",      # conexões entregues ao pool
+    "tcp_shed",          # recusadas com a fila do pool cheia
+    "tcp_idle_reaped",   # fechadas por ociosidade
+    "tcp_oversized",     # mensagens maiores que MAX_STREAM_MESSAGE (descartadas)
+)
+
+
+class Transport:
+    """Base class: lifecycle flag shared by all transports (see module doc)."""
+
+    local_ip = ""  # "" = descobrir pela rede (sockets reais)
+
+    def __init__(self, stats=None):
+        self.stats = stats if stats is not None else {}
+        for key in TRANSPORT_STATS:
+            self.stats.setdefault(key, 0)
+        self._stopping = threading.Event()
+        self.multicast_group = None
+
+    # --- lifecycle ---
+    def start(self, on_datagrams, on_stream, accept=None):
+        raise NotImplementedError
+
+    def stop(self, timeout=1.0):
+        self._stopping.set()
+
+    def close(self):
+        self.stop()
+
+    @property
+    def stopping(self):
+        return self._stopping.is_set()
+
+    def wait_stopping(self, timeout):
+        """Sleep up to timeout; True (immediately) once stop() is called."""
+        return self._stopping.wait(timeout)
+
+    # --- sending ---
+    def send_datagram(self, ip, data):
+        raise NotImplementedError
+
+    def broadcast(self, data):
+        raise NotImplementedError
+
+    def send_stream(self, ip, data, timeout=None):
+        raise NotImplementedError
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        raise NotImplementedError
+
+    def send_group(self, data):
+        raise NotImplementedError
+
+
+# =============================================================================
+# SOCKETS (compartilhado pelos transportes reais)
+# =============================================================================
+
+def open_udp_socket(port, rcvbuf=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    except Exception:
+        pass
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    except Exception:
+        pass
+    if rcvbuf:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except Exception:
+            pass
+    if SO_RXQ_OVFL is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        except Exception:
+            pass
+    try:
+        sock.bind(('', port))
+    except Exception:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+
+def open_tcp_socket(port, backlog):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    except Exception:
+        pass
+    try:
+        sock.bind(('', port))
+        sock.listen(backlog)
+    except Exception:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock
+
+
+def _interface_addr(local_ip):
+    return local_ip if local_ip and not local_ip.startswith("127.") else "0.0.0.0"
+
+
+def join_multicast_group(sock, group, local_ip=""):
+    """Subscribe a bound UDP socket to group (on the interface of local_ip)."""
+    mreq = socket.inet_aton(group) + socket.inet_aton(_interface_addr(local_ip))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+
+
+def multicast_sender(ttl, loop, local_ip=""):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1 if loop else 0)
+    interface = _interface_addr(local_ip)
+    if interface != "0.0.0.0":
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        except Exception:
+            pass
+    return sock
+
+
+def discover_lan_ip(port):
+    """Address of the interface that reaches the LAN broadcast ("" if unknown).
+
+    connect() on a UDP socket sends nothing; it only asks the kernel which
+    interface the packets would leave from.
+    """
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            s.connect((BROADCAST_ADDR, port))
+            ip = s.getsockname()[0]
+        finally:
+            s.close()
+        if ip and ip != "0.0.0.0":
+            return ip
+    except Exception:
+        pass
+    return ""
+
+
+def send_stream_blocking(ip, port, data, timeout):
+    """TCP connect + sendall + close (raises OSError on failure)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect((ip, port))
+        sock.sendall(data)
+    finally:
+        sock.close()
+
+
+class _RealTransport(Transport):
+    """Sending side shared by the socket-based transports."""
+
+    def __init__(self, udp_port, tcp_port, local_ip="", stats=None,
+                 rcvbuf=1 << 20, batch_size=64, buffer_size=4096,
+                 backlog=64, idle_timeout=2.0, send_timeout=3.0):
+        super().__init__(stats)
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.local_ip = local_ip
+        self.rcvbuf = rcvbuf
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        self.backlog = backlog
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.multicast_ttl = 1
+        self.multicast_loop = False
+        self.multicast_interface = local_ip
+        self._send_socket = None
+        self._multicast_socket = None
+
+    def _sender(self):
+        sock = self._send_socket
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            self._send_socket = sock
+        return sock
+
+    def send_datagram(self, ip, data):
+        self._sender().sendto(data, (ip, self.udp_port))
+
+    def broadcast(self, data):
+        self._sender().sendto(data, (BROADCAST_ADDR, self.udp_port))
+
+    def send_stream(self, ip, data, timeout=None):
+        send_stream_blocking(ip, self.tcp_port, data,
+                             self.send_timeout if timeout is None else timeout)
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        self.multicast_group = group
+        self.multicast_ttl = ttl
+        self.multicast_loop = loop
+        self.multicast_interface = interface or self.local_ip
+        if self._multicast_socket is not None:
+            self._multicast_socket.close()
+            self._multicast_socket = None
+
+    def send_group(self, data):
+        if self._multicast_socket is None:
+            self._multicast_socket = multicast_sender(self.multicast_ttl, self.multicast_loop,
+                                                      self.multicast_interface)
+        self._multicast_socket.sendto(data, (self.multicast_group, self.udp_port))
+
+    def _join_group(self, sock):
+        try:
+            join_multicast_group(sock, self.multicast_group, self.multicast_interface)
+            print(f"[*] Multicast: grupo {self.multicast_group} (ttl={self.multicast_ttl})")
+        except Exception as e:
+            print(f"Falha ao entrar no grupo multicast {self.multicast_group}: {e}")
+
+
+# =============================================================================
+# SOCKETS + THREADS
+# =============================================================================
+
+class SocketTransport(_RealTransport):
+    """UDP/TCP listeners served by selector threads.
+
+    The listeners are created once and reused between matches (a "play
+    again" does not rebind the ports). Threads block in selectors without a
+    timeout; stop() wakes them through a self-pipe. Accepted TCP connections
+    are served by a fixed WorkerPool (queue full => connection shed).
+    """
+
+    def __init__(self, udp_port=5000, tcp_port=5001, pool=None, **kwargs):
+        super().__init__(udp_port, tcp_port, **kwargs)
+        self.pool = pool if pool is not None else WorkerPool(8, 32, name="tcp")
+        self.udp_socket = None
+        self.tcp_socket = None
+        self._ports = None
+        self._threads = []
+        self._callbacks = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+
+    def open(self):
+        """Create/bind the listeners (first time only, or if a port changed)."""
+        if self._ports == (self.udp_port, self.tcp_port):
+            return True
+        self._close_sockets()
+        try:
+            self.udp_socket = open_udp_socket(self.udp_port, self.rcvbuf)
+        except Exception as e:
+            print(f"Falha ao bindar UDP ({self.udp_port}): {e}")
+            return False
+        if self.multicast_group:
+            self._join_group(self.udp_socket)
+        try:
+            self.tcp_socket = open_tcp_socket(self.tcp_port, self.backlog)
+        except Exception as e:
+            print(f"Falha ao criar servidor TCP ({self.tcp_port}): {e}")
+            self._close_sockets()
+            return False
+        self._ports = (self.udp_port, self.tcp_port)
+        return True
+
+    def start(self, on_datagrams, on_stream, accept=None):
+        """Start the server threads for a new match."""
+        self.stop()
+        if not self.open():
+            return False
+        self._callbacks = (on_datagrams, on_stream, accept)
+        self._stopping.clear()
+        self._drain(self._wake_r)
+        self._drain(self.udp_socket)  # descarta datagramas da partida anterior
+        self._threads = [
+            threading.Thread(target=self._udp_loop, daemon=True),
+            threading.Thread(target=self._tcp_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self, timeout=1.0):
+        """Wake and end the threads; the listeners stay open."""
+        self._stopping.set()
+        if not self._threads:
+            return
+        self.wake()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+
+    def close(self):
+        """Shut everything down, listeners included (end of program)."""
+        self.stop()
+        self._close_sockets()
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        super().enable_multicast(group, ttl, loop, interface)
+        if self.udp_socket is not None:
+            self._join_group(self.udp_socket)
+
+    def wake(self):
+        try:
+            self._wake_w.send(b"x")
+        except Exception:
+            pass
+
+    def selector_for(self, sock):
+        """Selector with the socket + self-pipe (to wait without a timeout)."""
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        return selector
+
+    def wait_readable(self, selector, timeout=None):
+        """Block until the socket has data. False once stopped (or after
+        `timeout` seconds without data)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stopping.is_set():
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+            for key, _ in selector.select(remaining):
+                if key.fileobj is not self._wake_r:
+                    return True
+        return False
+
+    # --- UDP ---
+    def _recv_datagram(self, buf):
+        """recvfrom_into, counting truncated datagrams/kernel drops when possible."""
+        sock = self.udp_socket
+        if not hasattr(sock, "recvmsg_into"):
+            return sock.recvfrom_into(buf)
+        n, ancdata, flags, addr = sock.recvmsg_into([buf], _ANCBUF_SIZE)
+        if flags & getattr(socket, "MSG_TRUNC", 0):
+            self.stats["udp_truncated"] += 1
+        for level, kind, value in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(value) >= 4:
+                # contador acumulado do socket
+                self.stats["udp_kernel_drops"] = struct.unpack("I", value[:4])[0]
+        return n, addr
+
+    def _udp_loop(self):
+        """Each wakeup drains every ready datagram (up to batch_size, into
+        preallocated buffers) and hands the burst over in one call."""
+        on_datagrams = self._callbacks[0]
+        selector = self.selector_for(self.udp_socket)
+        bufs = [bytearray(self.buffer_size) for _ in range(self.batch_size)]
+        views = [memoryview(buf) for buf in bufs]
+        print(f"[*] Escutando UDP na porta {self.udp_port}...")
+
+        while self.wait_readable(selector):
+            batch = []
+            try:
+                for slot in range(self.batch_size):
+                    try:
+                        n, addr = self._recv_datagram(bufs[slot])
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    batch.append((views[slot][:n], addr[0]))
+            except Exception as e:
+                if not self.stopping:
+                    print(f"Erro no servidor UDP: {e}")
+            if batch:
+                on_datagrams(batch)
+        selector.close()
+        print("Servidor UDP encerrado.")
+
+    # --- TCP ---
+    def _tcp_loop(self):
+        accept = self._callbacks[2]
+        selector = self.selector_for(self.tcp_socket)
+        print(f"[*] Escutando TCP na porta {self.tcp_port}...")
+
+        while self.wait_readable(selector):
+            try:
+                conn, addr = self.tcp_socket.accept()
+                if accept is not None and not accept(addr[0]):
+                    conn.close()
+                    continue
+                conn.setblocking(True)
+                # entrega ao pool fixo; fila cheia => descarta (load shedding)
+                if self.pool.submit(self._serve_connection, conn, addr[0]):
+                    self.stats["tcp_accepted"] += 1
+                else:
+                    self.stats["tcp_shed"] += 1
+                    conn.close()
+            except (BlockingIOError, InterruptedError):
+                continue
+            except Exception as e:
+                if not self.stopping:
+                    print(f"Erro no servidor TCP: {e}")
+        selector.close()
+        print("Servidor TCP encerrado.")
+
+    def _serve_connection(self, connection, ip):
+        """Read one message (everything up to EOF) from a connection, in a
+        pool worker, and hand it over whole. A connection idle for
+        idle_timeout is closed without delivering its partial message."""
+        on_stream = self._callbacks[1]
+        selector = self.selector_for(connection)
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        size = 0
+        try:
+            while True:
+                if not self.wait_readable(selector, self.idle_timeout):
+                    if not self.stopping:
+                        self.stats["tcp_idle_reaped"] += 1
+                    return
+                if size == len(buf):
+                    # mensagem maior que o buffer: dobra (até MAX_STREAM_MESSAGE)
+                    if size >= MAX_STREAM_MESSAGE:
+                        self.stats["tcp_oversized"] += 1
+                        return
+                    view.release()
+                    buf.extend(bytes(min(size, MAX_STREAM_MESSAGE - size)))
+                    view = memoryview(buf)
+                try:
+                    n = connection.recv_into(view[size:])
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except Exception:
+                    return
+                if not n:
+                    break
+                size += n
+            if size:
+                on_stream(view[:size], ip)
+        except Exception as e:
+            print(f"Erro ao lidar com cliente TCP {ip}: {e}")
+        finally:
+            selector.close()
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _drain(sock):
+        try:
+            while sock.recv(4096):
+                pass
+        except Exception:
+            pass
+
+    def _close_sockets(self):
+        for sock in (self.udp_socket, self.tcp_socket):
+            if sock is not None:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+        self.udp_socket = None
+        self.tcp_socket = None
+        self._ports = None
+
+
+# =============================================================================
+# ASYNCIO
+# =============================================================================
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """Collects the datagrams of one loop iteration into a single burst."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.batch = []
+
+    def datagram_received(self, data, addr):
+        if not self.batch:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.batch.append((data, addr[0]))
+
+    def flush(self):
+        batch, self.batch = self.batch, []
+        if batch and not self.owner.stopping:
+            try:
+                self.owner._callbacks[0](batch)
+            except Exception as e:
+                print(f"Erro no servidor UDP: {e}")
+
+
+class AsyncioTransport(_RealTransport):
+    """UDP/TCP on one asyncio event loop running in a daemon thread.
+
+    No worker pool: every connection is a coroutine; callbacks run on the
+    loop thread. Stream sends made from the loop thread (e.g. a handler
+    replying) are scheduled without blocking it.
+    """
+
+    def __init__(self, udp_port=5000, tcp_port=5001, **kwargs):
+        super().__init__(udp_port, tcp_port, **kwargs)
+        self._loop = None
+        self._thread = None
+        self._udp = None
+        self._server = None
+        self._callbacks = None
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever,
+                                            name="asyncio-transport", daemon=True)
+            self._thread.start()
+
+    def _in_loop(self):
+        return threading.current_thread() is self._thread
+
+    def start(self, on_datagrams, on_stream, accept=None):
+        self.stop()
+        self._ensure_loop()
+        self._callbacks = (on_datagrams, on_stream, accept)
+        self._stopping.clear()
+        future = asyncio.run_coroutine_threadsafe(self._open(), self._loop)
+        try:
+            return future.result(5.0)
+        except Exception as e:
+            print(f"Falha ao iniciar transporte asyncio: {e}")
+            return False
+
+    async def _open(self):
+        if self._udp is None:
+            sock = open_udp_socket(self.udp_port, self.rcvbuf)
+            if self.multicast_group:
+                self._join_group(sock)
+            self._udp, _ = await self._loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), sock=sock)
+            print(f"[*] Escutando UDP na porta {self.udp_port}...")
+        if self._server is None:
+            sock = open_tcp_socket(self.tcp_port, self.backlog)
+            self._server = await asyncio.start_server(self._serve, sock=sock)
+            print(f"[*] Escutando TCP na porta {self.tcp_port}...")
+        return True
+
+    def stop(self, timeout=1.0):
+        # os listeners continuam abertos; callbacks são ignorados até o próximo start()
+        self._stopping.set()
+
+    def close(self):
+        self.stop()
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(2.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(2.0)
+        self._loop.close()
+        self._loop = self._thread = None
+
+    async def _close(self):
+        if self._udp is not None:
+            self._udp.close()
+            self._udp = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        ip = writer.get_extra_info("peername")[0]
+        on_stream, accept = self._callbacks[1], self._callbacks[2]
+        if self.stopping or (accept is not None and not accept(ip)):
+            writer.close()
+            return
+        self.stats["tcp_accepted"] += 1
+        try:
+            # uma mensagem por conexão: lê até o EOF e entrega inteira
+            chunks = []
+            size = 0
+            while not self.stopping:
+                try:
+                    data = await asyncio.wait_for(reader.read(self.buffer_size), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    self.stats["tcp_idle_reaped"] += 1
+                    return
+                if not data:
+                    break
+                size += len(data)
+                if size > MAX_STREAM_MESSAGE:
+                    self.stats["tcp_oversized"] += 1
+                    return
+                chunks.append(data)
+            if chunks and not self.stopping:
+                on_stream(b"".join(chunks), ip)
+        except Exception as e:
+            print(f"Erro ao lidar com cliente TCP {ip}: {e}")
+        finally:
+            writer.close()
+
+    def send_datagram(self, ip, data):
+        if self._udp is None:
+            return super().send_datagram(ip, data)
+        data = bytes(data)
+        if self._in_loop():
+            self._udp.sendto(data, (ip, self.udp_port))
+        else:
+            self._loop.call_soon_threadsafe(self._udp.sendto, data, (ip, self.udp_port))
+
+    def send_stream(self, ip, data, timeout=None):
+        timeout = self.send_timeout if timeout is None else timeout
+        if self._loop is None or not self._in_loop():
+            return super().send_stream(ip, data, timeout)
+        self._loop.create_task(self._send_stream(ip, bytes(data), timeout))
+
+    async def _send_stream(self, ip, data, timeout):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, self.tcp_port), timeout)
+            writer.write(data)
+            await asyncio.wait_for(writer.drain(), timeout)
+            writer.close()
+        except Exception as e:
+            print(f"Erro ao enviar TCP para {ip}: {e}")
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        super().enable_multicast(group, ttl, loop, interface)
+        if self._udp is not None:
+            self._join_group(self._udp.get_extra_info("socket"))
+
+
+# =============================================================================
+# REDE EM MEMÓRIA (simulação)
+# =============================================================================
+
+_DATAGRAM, _STREAM, _TIMER = 0, 1, 2
+
+
+class MemoryNetwork:
+    """Deterministic in-process network with a virtual clock.
+
+    Every send draws its fate from one seeded RNG: a delivery delay of
+    `latency` plus up to `jitter`; with probability `loss` a datagram is
+    dropped; with probability `reorder` it gets up to `reorder_delay`
+    extra, so it can overtake/be overtaken by later ones. Streams are never
+    lost and stay ordered per (sender, receiver).
+
+    Driving it:
+        run(until=t) / step()   single-threaded, fully reproducible for a
+                                given seed (simulation.py)
+        start() / stop()        a pump thread that follows the wall clock,
+                                for real game nodes (main.py) on this network
+
+    Datagrams due at the same instant for the same node are delivered as one
+    burst, like a socket drained after a wakeup.
+    """
+
+    def __init__(self, seed=0, latency=0.001, jitter=0.0, loss=0.0,
+                 reorder=0.0, reorder_delay=0.005, batch_size=64):
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+        self.batch_size = batch_size
+        self.now = 0.0
+        self._queue = []              # heap (time, seq, kind, dst, data, src)
+        self._seq = itertools.count()
+        self._nodes = {}              # ip -> MemoryTransport
+        self._groups = {}             # group -> set(ip)
+        self._stream_clock = {}       # (src, dst) -> last stream delivery time
+        self._cond = threading.Condition(threading.RLock())
+        self._next_host = itertools.count(1)
+        self._pump = None
+        self._pump_stop = False
+        self.stats = {"sent": 0, "delivered": 0, "lost": 0, "reordered": 0,
+                      "unreachable": 0, "streams": 0}
+
+    # --- nodes ---
+    def attach(self, ip=None):
+        """New node; ips default to 10.0.0.1, 10.0.0.2, ..."""
+        with self._cond:
+            if ip is None:
+                while True:
+                    n = next(self._next_host)
+                    ip = f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+                    if ip not in self._nodes:
+                        break
+            if ip in self._nodes:
+                raise ValueError(f"ip {ip} já está na rede")
+            node = self._nodes[ip] = MemoryTransport(self, ip)
+            return node
+
+    def detach(self, ip):
+        with self._cond:
+            self._nodes.pop(ip, None)
+            for members in self._groups.values():
+                members.discard(ip)
+
+    def nodes(self):
+        with self._cond:
+            return list(self._nodes)
+
+    # --- clock ---
+    def call_at(self, when, fn, *args):
+        """Run fn(*args) at virtual time `when` (from the network's thread)."""
+        with self._cond:
+            heapq.heappush(self._queue, (when, next(self._seq), _TIMER, None, (fn, args), None))
+            self._cond.notify()
+
+    def call_later(self, delay, fn, *args):
+        self.call_at(self.now + delay, fn, *args)
+
+    # --- sending (called by MemoryTransport) ---
+    def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self.rng.uniform(0.0, self.jitter)
+        return delay
+
+    def _push(self, when, kind, dst, data, src):
+        heapq.heappush(self._queue, (when, next(self._seq), kind, dst, data, src))
+
+    def _send_datagram(self, src, dst, data):
+        with self._cond:
+            self.stats["sent"] += 1
+            if self.loss and self.rng.random() < self.loss:
+                self.stats["lost"] += 1
+                return
+            delay = self._delay()
+            if self.reorder and self.rng.random() < self.reorder:
+                delay += self.rng.uniform(0.0, self.reorder_delay)
+                self.stats["reordered"] += 1
+            self._push(self.now + delay, _DATAGRAM, dst, bytes(data), src)
+            self._cond.notify()
+
+    def _send_many(self, src, dsts, data):
+        data = bytes(data)
+        for dst in dsts:
+            if dst != src:
+                self._send_datagram(src, dst, data)
+
+    def _broadcast(self, src, data):
+        with self._cond:
+            self._send_many(src, list(self._nodes), data)
+
+    def _join(self, group, ip):
+        with self._cond:
+            self._groups.setdefault(group, set()).add(ip)
+
+    def _send_group(self, src, group, data, loop):
+        with self._cond:
+            members = sorted(self._groups.get(group, ()))  # ordem estável => determinístico
+            self._send_many(src, members, data)
+            if loop and src in self._groups.get(group, ()):
+                self._send_datagram(src, src, data)
+
+    def _send_stream(self, src, dst, data):
+        with self._cond:
+            node = self._nodes.get(dst)
+            if node is None or not node.running:
+                self.stats["unreachable"] += 1
+                raise ConnectionRefusedError(f"{dst} não está escutando")
+            self.stats["streams"] += 1
+            when = self.now + self._delay()
+            last = self._stream_clock.get((src, dst), 0.0)
+            if when <= last:
+                when = last + 1e-9
+            self._stream_clock[(src, dst)] = when
+            self._push(when, _STREAM, dst, bytes(data), src)
+            self._cond.notify()
+
+    # --- delivery ---
+    def step(self):
+        """Deliver the next due item (a burst of datagrams, a stream chunk
+        or a timer). Returns False when nothing is queued."""
+        with self._cond:
+            if not self._queue:
+                return False
+            when, _, kind, dst, data, src = heapq.heappop(self._queue)
+            if when > self.now:
+                self.now = when
+            batch = None
+            if kind == _DATAGRAM:
+                batch = [(data, src)]
+                while (len(batch) < self.batch_size and self._queue
+                       and self._queue[0][0] == when and self._queue[0][2] == _DATAGRAM
+                       and self._queue[0][3] == dst):
+                    item = heapq.heappop(self._queue)
+                    batch.append((item[4], item[5]))
+            node = self._nodes.get(dst) if dst is not None else None
+        # callbacks fora do lock: podem enviar (e a bomba pode estar esperando)
+        if kind == _TIMER:
+            fn, args = data
+            fn(*args)
+        elif node is None or not node.running:
+            with self._cond:
+                self.stats["unreachable"] += 1 if batch is None else len(batch)
+        elif kind == _DATAGRAM:
+            with self._cond:
+                self.stats["delivered"] += len(batch)
+            node._deliver(batch)
+        else:
+            with self._cond:
+                self.stats["delivered"] += 1
+            node._deliver_stream(data, src)
+        return True
+
+    def run(self, until=None, max_steps=None):
+        """Deliver everything due up to virtual time `until` (all if None)."""
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            with self._cond:
+                if not self._queue or (until is not None and self._queue[0][0] > until):
+                    break
+            self.step()
+            steps += 1
+        if until is not None and until > self.now:
+            self.now = until
+        return steps
+
+    def pending(self):
+        return len(self._queue)
+
+    # --- tempo real ---
+    def start(self, speed=1.0):
+        """Deliver in a background thread, with virtual time following the
+        wall clock (speed > 1 runs faster than real time)."""
+        if self._pump is not None:
+            return
+        self._pump_stop = False
+        self._pump = threading.Thread(target=self._pump_loop, args=(speed,),
+                                      name="memory-network", daemon=True)
+        self._pump.start()
+
+    def stop(self, timeout=1.0):
+        if self._pump is None:
+            return
+        with self._cond:
+            self._pump_stop = True
+            self._cond.notify_all()
+        self._pump.join(timeout)
+        self._pump = None
+
+    def _pump_loop(self, speed):
+        wall0, virtual0 = time.monotonic(), self.now
+        while True:
+            with self._cond:
+                while not self._pump_stop:
+                    # o relógio virtual anda com o de parede (mesmo sem eventos),
+                    # para que envios novos não fiquem "no passado"
+                    self.now = max(self.now, virtual0 + (time.monotonic() - wall0) * speed)
+                    if self._queue and self._queue[0][0] <= self.now:
+                        break
+                    timeout = None
+                    if self._queue:
+                        timeout = (self._queue[0][0] - self.now) / speed
+                    self._cond.wait(timeout if timeout is None else max(timeout, 0.0005))
+                if self._pump_stop:
+                    return
+            self.step()
+
+
+class MemoryTransport(Transport):
+    """One node of a MemoryNetwork (create with MemoryNetwork.attach())."""
+
+    def __init__(self, network, ip):
+        super().__init__()
+        self.network = network
+        self.local_ip = ip
+        self.running = False
+        self.multicast_loop = False
+        self._on_datagrams = None
+        self._on_stream = None
+        self._accept = None
+        self._stopping.set()
+
+    def start(self, on_datagrams, on_stream, accept=None):
+        self._on_datagrams = on_datagrams
+        self._on_stream = on_stream
+        self._accept = accept
+        self._stopping.clear()
+        self.running = True
+        return True
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        self._stopping.set()
+
+    def close(self):
+        self.stop()
+        self.network.detach(self.local_ip)
+
+    def send_datagram(self, ip, data):
+        self.network._send_datagram(self.local_ip, ip, data)
+
+    def broadcast(self, data):
+        self.network._broadcast(self.local_ip, data)
+
+    def send_stream(self, ip, data, timeout=None):
+        self.network._send_stream(self.local_ip, ip, data)
+
+    def enable_multicast(self, group, ttl=1, loop=False, interface=""):
+        self.multicast_group = group
+        self.multicast_loop = loop
+        self.network._join(group, self.local_ip)
+
+    def send_group(self, data):
+        self.network._send_group(self.local_ip, self.multicast_group, data, self.multicast_loop)
+
+    def _deliver(self, batch):
+        try:
+            self._on_datagrams(batch)
+        except Exception as e:
+            print(f"Erro no nó {self.local_ip}: {e}")
+
+    def _deliver_stream(self, data, src):
+        if self._accept is not None and not self._accept(src):
+            return
+        self.stats["tcp_accepted"] += 1
+        try:
+            self._on_stream(data, src)
+        except Exception as e:
+            print(f"Erro no nó {self.local_ip}: {e}")
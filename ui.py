@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 """
 Pygame UI components for PyNetworkBattleship.
-Contains MenuScreen, ScoreScreen, and PygameInterface classes.
+Contains the SceneManager (single long-lived window) and the MenuScreen,
+ScoreScreen, PygameInterface and SpectatorScreen scenes.
 """
 
+import bisect
+import itertools
+import socket
 import threading
 import time
+from collections import deque
+
+from actions import ActionRefused, GameActions
+from events import EventChannel, EV_JOINED, EV_LEFT
 
 # Optional pygame
 try:
@@ -14,6 +22,16 @@ try:
 except Exception:
     PYGAME_AVAILABLE = False
 
+# Frame pacing: loops block on the event queue and only redraw at ACTIVE_FPS
+# while something is happening; otherwise they wake up at IDLE_FPS.
+ACTIVE_FPS = 30
+IDLE_FPS = 4
+IDLE_TIMEOUT_MS = 1000 // IDLE_FPS
+
+# Custom event posted by network threads to wake the renderer immediately
+WAKE_EVENT = pygame.USEREVENT + 1 if PYGAME_AVAILABLE else None
+_wake_pending = False
+
 # ============================================================================
 # UI HELPER FUNCTION (imported from main)
 # ============================================================================
@@ -24,105 +42,560 @@ def print_exc_context():
     traceback.print_exc()
 
 
+def wake_ui():
+    """Post a WAKE_EVENT so a blocked render loop redraws right away.
+
+    Safe to call from any thread; repeated calls before the loop wakes up are
+    coalesced into a single event.
+    """
+    global _wake_pending
+    if not PYGAME_AVAILABLE or _wake_pending:
+        return
+    try:
+        _wake_pending = True
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+    except Exception:
+        # event system not initialized (no window open)
+        _wake_pending = False
+
+
+def wait_events(timeout_ms=IDLE_TIMEOUT_MS):
+    """Block until an event arrives (or timeout) and return all pending events.
+
+    A timeout of 0 only polls (used right after a scene switch to draw at once).
+    """
+    global _wake_pending
+    events = []
+    if timeout_ms > 0:
+        first = pygame.event.wait(timeout_ms)
+        if first.type != pygame.NOEVENT:
+            events.append(first)
+    _wake_pending = False
+    events.extend(pygame.event.get())
+    return events
+
+
 # ============================================================================
-# MENU SCREEN
+# DISPLAY / SCENE MANAGER
 # ============================================================================
 
-class MenuScreen(threading.Thread):
-    """Menu screen with Jogar and Sair options."""
+class Display:
+    """The single pygame window and font cache shared by every scene."""
+
+    def __init__(self):
+        self.screen = None
+        self.size = None
+        self._fonts = {}
+
+    def open(self, size, caption):
+        """Make sure the window exists with the given size; only resizes when needed."""
+        if not pygame.get_init():
+            pygame.init()
+        if self.screen is None or self.size != size:
+            self.screen = pygame.display.set_mode(size)
+            self.size = size
+        pygame.display.set_caption(caption)
+        return self.screen
+
+    def font(self, size):
+        """Cached SysFont (font loading is the slow part of building a screen)."""
+        font = self._fonts.get(size)
+        if font is None:
+            font = pygame.font.SysFont(None, size)
+            self._fonts[size] = font
+        return font
+
+    def close(self):
+        self._fonts.clear()
+        self.screen = None
+        self.size = None
+        try:
+            pygame.quit()
+        except Exception:
+            pass
+
+
+class Scene:
+    """Base class for screens run by the SceneManager.
+
+    Keeps the old thread-like API (start/stop/join/is_alive) so callers can
+    treat a scene like the screen threads it replaces.
+    """
+
+    size = (600, 400)
+    caption = 'PyNetworkBattleship'
+    # Set to an object with frame(work_seconds) to have the manager time each
+    # frame (PerfOverlay); None costs one attribute read per frame.
+    frame_stats = None
 
     def __init__(self):
-        super().__init__(daemon=True)
         self.running = False
-        self.clock = None
-        self.choice = None  # "play", "quit", or None
+        self._started = False
+        self._finished = threading.Event()
 
+    # --- thread-like API (called from main) ---
     def start(self):
-        if not PYGAME_AVAILABLE:
-            print("Pygame not available; menu disabled.")
-            self.running = False
-            return
         self.running = True
-        super().start()
+        self._started = True
+        get_scene_manager().push(self)
 
     def stop(self):
         self.running = False
+        wake_ui()
+
+    def join(self, timeout=None):
+        if self._started:
+            self._finished.wait(timeout)
+
+    def is_alive(self):
+        return self._started and not self._finished.is_set()
+
+    # --- hooks (called on the UI thread) ---
+    def enter(self, display):
+        """Scene became the top of the stack."""
+
+    def update(self):
+        """Per-frame work before event handling (e.g. draining channels)."""
+
+    def handle_event(self, event):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def exit(self):
+        """Scene was popped."""
+
+
+class SceneManager(threading.Thread):
+    """Owns the display and runs a stack of scenes on one long-lived thread.
+
+    SDL is initialized once; switching scenes only swaps what gets drawn (and
+    resizes the window if needed) instead of pygame.init/quit per screen.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True, name="ui")
+        self.display = Display()
+        self.clock = None
+        self.running = True
+        self._stack = []
+        self._pending = deque()  # scenes pushed from other threads
+        self._switched = False  # draw the new top scene without waiting
+
+    def push(self, scene):
+        """Push a scene on top of the stack (any thread)."""
+        self._pending.append(scene)
+        wake_ui()
+
+    def stop(self):
+        self.running = False
+        wake_ui()
+
+    def _adopt_pending(self):
+        while self._pending:
+            scene = self._pending.popleft()
+            self._stack.append(scene)
+            self._enter(scene)
+
+    def _enter(self, scene):
+        self.display.open(scene.size, scene.caption)
+        scene.enter(self.display)
+        self._switched = True
+
+    def _pop(self):
+        scene = self._stack.pop()
+        try:
+            scene.exit()
+        finally:
+            scene.running = False
+            scene._finished.set()
+        if self._stack:
+            self._enter(self._stack[-1])
 
     def run(self):
         try:
             pygame.init()
-            screen = pygame.display.set_mode((600, 400))
-            pygame.display.set_caption('PyNetworkBattleship - Menu')
             self.clock = pygame.time.Clock()
-            font_title = pygame.font.SysFont(None, 60)
-            font_button = pygame.font.SysFont(None, 40)
-
-            play_button_rect = pygame.Rect(150, 150, 300, 60)
-            quit_button_rect = pygame.Rect(150, 250, 300, 60)
-
-            while self.running and self.choice is None:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        self.choice = "quit"
-                        self.running = False
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        mx, my = pygame.mouse.get_pos()
-                        if play_button_rect.collidepoint(mx, my):
-                            self.choice = "play"
-                            self.running = False
-                        elif quit_button_rect.collidepoint(mx, my):
-                            self.choice = "quit"
-                            self.running = False
-
-                # Draw background
-                screen.fill((18, 24, 30))
-
-                # Draw title
-                title = font_title.render('PyNetworkBattleship', True, (100, 200, 255))
-                title_rect = title.get_rect(center=(300, 50))
-                screen.blit(title, title_rect)
-
-                # Draw play button
-                pygame.draw.rect(screen, (50, 150, 50), play_button_rect)
-                play_txt = font_button.render('Jogar', True, (255, 255, 255))
-                play_txt_rect = play_txt.get_rect(center=play_button_rect.center)
-                screen.blit(play_txt, play_txt_rect)
-
-                # Draw quit button
-                pygame.draw.rect(screen, (200, 50, 50), quit_button_rect)
-                quit_txt = font_button.render('Sair', True, (255, 255, 255))
-                quit_txt_rect = quit_txt.get_rect(center=quit_button_rect.center)
-                screen.blit(quit_txt, quit_txt_rect)
+            while self.running:
+                self._adopt_pending()
+                if not self._stack:
+                    wait_events()
+                    continue
+
+                scene = self._stack[-1]
+                pending = wait_events(0 if self._switched else IDLE_TIMEOUT_MS)
+                self._switched = False
+                frame_stats = scene.frame_stats
+                if frame_stats is not None:
+                    frame_start = time.perf_counter()
+                scene.update()
+                for event in pending:
+                    if not scene.running:
+                        break
+                    scene.handle_event(event)
+                if not scene.running:
+                    self._pop()
+                    continue
 
+                scene.draw(self.display.screen)
                 pygame.display.flip()
-                self.clock.tick(30)
+                if frame_stats is not None:
+                    frame_stats.frame(time.perf_counter() - frame_start)
+                self.clock.tick(ACTIVE_FPS)
 
         except Exception as e:
-            print(f"Menu error: {e}")
+            print(f"Pygame UI error: {e}")
             print_exc_context()
         finally:
-            try:
-                if PYGAME_AVAILABLE:
-                    pygame.quit()
-            except Exception:
-                pass
+            self.running = False
+            while self._pending:
+                self._stack.append(self._pending.popleft())
+            for scene in self._stack:
+                scene.running = False
+                scene._finished.set()
+            self._stack.clear()
+            self.display.close()
+
+
+_scene_manager = None
+_scene_manager_lock = threading.Lock()
+
+
+def get_scene_manager():
+    """Return the process-wide SceneManager, starting it on first use."""
+    global _scene_manager
+    with _scene_manager_lock:
+        if _scene_manager is None or not _scene_manager.is_alive():
+            _scene_manager = SceneManager()
+            _scene_manager.start()
+        return _scene_manager
+
+
+def shutdown_ui(timeout=2.0):
+    """Close the window and stop the UI thread (call once at exit)."""
+    with _scene_manager_lock:
+        manager = _scene_manager
+    if manager is not None and manager.is_alive():
+        manager.stop()
+        manager.join(timeout)
+
+
+# ============================================================================
+# PARTICIPANT INDEX
+# ============================================================================
+
+class ParticipantIndex:
+    """Sorted participant list for the sidebar, maintained incrementally.
+
+    Rows are ordered by numeric IP so a row keeps its place between frames;
+    only the slice inside the scroll window is ever rendered. An optional
+    substring filter narrows the rows (recomputed only when something changes).
+    """
+
+    def __init__(self, ips=()):
+        self._keys = []  # sorted sort keys
+        self._ips = []   # ips, parallel to _keys
+        self._rows = None  # cached filtered rows (None = dirty)
+        self.filter_text = ""
+        self.scroll = 0
+        for ip in ips:
+            self.add(ip)
+
+    @staticmethod
+    def _key(ip):
+        try:
+            return (0, socket.inet_aton(ip))
+        except (OSError, TypeError):
+            return (1, str(ip))
+
+    def __len__(self):
+        return len(self._ips)
+
+    def __contains__(self, ip):
+        key = self._key(ip)
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def add(self, ip):
+        key = self._key(ip)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return False
+        self._keys.insert(i, key)
+        self._ips.insert(i, ip)
+        self._rows = None
+        return True
+
+    def remove(self, ip):
+        key = self._key(ip)
+        i = bisect.bisect_left(self._keys, key)
+        if i >= len(self._keys) or self._keys[i] != key:
+            return False
+        del self._keys[i]
+        del self._ips[i]
+        self._rows = None
+        return True
+
+    def reset(self, ips):
+        """Replace every row with ips (resync after lost join/leave events)."""
+        pairs = sorted((self._key(ip), ip) for ip in ips)
+        self._keys = [key for key, _ in pairs]
+        self._ips = [ip for _, ip in pairs]
+        self._rows = None
+
+    def set_filter(self, text):
+        if text != self.filter_text:
+            self.filter_text = text
+            self._rows = None
+            self.scroll = 0
+
+    def rows(self):
+        """All rows that match the filter, in display order."""
+        if self._rows is None:
+            if self.filter_text:
+                needle = self.filter_text
+                self._rows = [ip for ip in self._ips if needle in ip]
+            else:
+                self._rows = self._ips
+        return self._rows
+
+    def scroll_by(self, delta, max_rows):
+        self.scroll += delta
+        self._clamp(max_rows)
+
+    def _clamp(self, max_rows):
+        self.scroll = max(0, min(self.scroll, len(self.rows()) - max_rows))
+
+    def visible(self, max_rows):
+        """The rows inside the scroll window."""
+        self._clamp(max_rows)
+        return self.rows()[self.scroll:self.scroll + max_rows]
+
+    def row_at(self, idx, max_rows):
+        """IP of the idx-th visible row, or None."""
+        visible = self.visible(max_rows)
+        if 0 <= idx < len(visible):
+            return visible[idx]
+        return None
+
+
+# ============================================================================
+# PERFORMANCE OVERLAY
+# ============================================================================
+
+class _TimedAcquire:
+    """`with` wrapper that adds the time spent waiting for a lock to an overlay."""
+
+    __slots__ = ("lock", "overlay")
+
+    def __init__(self, lock, overlay):
+        self.lock = lock
+        self.overlay = overlay
+
+    def __enter__(self):
+        t0 = time.perf_counter()
+        self.lock.acquire()
+        self.overlay.lock_waited(time.perf_counter() - t0)
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+        return False
+
+
+class PerfOverlay:
+    """Frame/network/lock statistics drawn over the game scene (F3).
+
+    Exists only while shown: the scene creates it on toggle and drops it on
+    the next one, so nothing is collected while the overlay is off. Counters
+    (net_stats) are sampled at most every SAMPLE_INTERVAL seconds.
+    """
+
+    SAMPLE_INTERVAL = 0.5
+    WINDOW = 240        # frames kept for avg/p99/fps
+    SILENT_PEERS = 5    # peers listed by last-seen age
+
+    def __init__(self, net_stats=None, latency=None, peer_stats=None):
+        self.net_stats = net_stats
+        self.latency = latency
+        self.peer_stats = peer_stats  # peer_stats(ips) -> {ip: contadores} dos peers listados
+        self.frame_work = deque(maxlen=self.WINDOW)    # s of work per frame
+        self.frame_stamps = deque(maxlen=self.WINDOW)  # perf_counter at frame end
+        self.lock_wait = 0.0     # s waited for the shared lock in this sample
+        self.lock_wait_max = 0.0
+        self._rates = (0.0, 0.0, 0.0, 0.0)  # in/s, out/s, lock ms/s, lock max ms
+        self._batching = None  # (msgs por quadro, atraso médio ms) do agrupamento UDP
+        self._last_counts = None
+        self._last_sample = time.perf_counter()
+        self._surface = None
+
+    # --- collection (UI thread) ---
+    def frame(self, work):
+        self.frame_work.append(work)
+        self.frame_stamps.append(time.perf_counter())
+
+    def lock_waited(self, seconds):
+        self.lock_wait += seconds
+        if seconds > self.lock_wait_max:
+            self.lock_wait_max = seconds
+
+    def timed(self, lock):
+        return _TimedAcquire(lock, self)
+
+    def _counts(self):
+        if self.net_stats is None:
+            return (0, 0)
+        stats = self.net_stats()
+        if "batch_udp_messages_per_frame" in stats:
+            self._batching = (stats["batch_udp_messages_per_frame"], stats["batch_udp_delay_avg_ms"])
+        return (stats.get("udp_received", 0) + stats.get("tcp_received", 0),
+                stats.get("sent", 0))
+
+    def _sample(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_sample
+        if elapsed < self.SAMPLE_INTERVAL:
+            return
+        counts = self._counts()
+        if self._last_counts is not None:
+            rate_in = (counts[0] - self._last_counts[0]) / elapsed
+            rate_out = (counts[1] - self._last_counts[1]) / elapsed
+        else:
+            rate_in = rate_out = 0.0
+        self._rates = (rate_in, rate_out, self.lock_wait * 1000.0 / elapsed,
+                       self.lock_wait_max * 1000.0)
+        self._last_counts = counts
+        self._last_sample = now
+        self.lock_wait = 0.0
+        self.lock_wait_max = 0.0
+
+    # --- display ---
+    def lines(self, participants, history, history_max):
+        self._sample()
+        work = sorted(self.frame_work)
+        if work:
+            avg = sum(work) / len(work) * 1000.0
+            p99 = work[min(len(work) - 1, int(len(work) * 0.99))] * 1000.0
+        else:
+            avg = p99 = 0.0
+        fps = 0.0
+        if len(self.frame_stamps) > 1:
+            span = self.frame_stamps[-1] - self.frame_stamps[0]
+            if span > 0:
+                fps = (len(self.frame_stamps) - 1) / span
+        rate_in, rate_out, lock_ms, lock_max = self._rates
+        out = [
+            f"frame {avg:.2f}ms avg  {p99:.2f}ms p99",
+            f"fps {fps:.1f} / alvo {ACTIVE_FPS} (ocioso {IDLE_FPS})",
+            f"msgs in {rate_in:.0f}/s  out {rate_out:.0f}/s",
+            f"lock espera {lock_ms:.2f}ms/s  max {lock_max:.2f}ms",
+            f"history {history}/{history_max}",
+        ]
+        if self._batching is not None:
+            out.append(f"lote udp {self._batching[0]:.1f} msgs/quadro  +{self._batching[1]:.2f}ms")
+        if self.latency is not None and participants:
+            now = time.monotonic()
+            ages = sorted(((self.latency.silent_for(ip, now), ip) for ip in participants),
+                          reverse=True)[:self.SILENT_PEERS]
+            counters = self.peer_stats([ip for _, ip in ages]) if self.peer_stats else {}
+            out.append("visto por último:")
+            for age, ip in ages:
+                c = counters.get(ip)
+                io = f"  in {c['received']} out {c['sent']}" if c else ""
+                out.append(f"  {ip}  {age:.1f}s{io}")
+        return out
+
+    def draw(self, screen, font, lines, pos=(10, 90)):
+        line_h = 16
+        size = (300, line_h * len(lines) + 8)
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size, pygame.SRCALPHA)
+        self._surface.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            self._surface.blit(font.render(line, True, (120, 255, 120)), (6, 4 + i * line_h))
+        screen.blit(self._surface, pos)
+
+
+# ============================================================================
+# MENU SCREEN
+# ============================================================================
+
+class MenuScreen(Scene):
+    """Menu screen with Jogar and Sair options."""
+
+    caption = 'PyNetworkBattleship - Menu'
+
+    def __init__(self):
+        super().__init__()
+        self.choice = None  # "play", "quit", or None
+        self.play_button_rect = None
+        self.quit_button_rect = None
+
+    def start(self):
+        if not PYGAME_AVAILABLE:
+            print("Pygame not available; menu disabled.")
+            self.running = False
+            return
+        super().start()
+
+    def enter(self, display):
+        self.font_title = display.font(60)
+        self.font_button = display.font(40)
+        self.play_button_rect = pygame.Rect(150, 150, 300, 60)
+        self.quit_button_rect = pygame.Rect(150, 250, 300, 60)
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.choice = "quit"
+            self.running = False
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            mx, my = pygame.mouse.get_pos()
+            if self.play_button_rect.collidepoint(mx, my):
+                self.choice = "play"
+                self.running = False
+            elif self.quit_button_rect.collidepoint(mx, my):
+                self.choice = "quit"
+                self.running = False
+
+    def draw(self, screen):
+        # Draw background
+        screen.fill((18, 24, 30))
+
+        # Draw title
+        title = self.font_title.render('PyNetworkBattleship', True, (100, 200, 255))
+        title_rect = title.get_rect(center=(300, 50))
+        screen.blit(title, title_rect)
+
+        # Draw play button
+        pygame.draw.rect(screen, (50, 150, 50), self.play_button_rect)
+        play_txt = self.font_button.render('Jogar', True, (255, 255, 255))
+        play_txt_rect = play_txt.get_rect(center=self.play_button_rect.center)
+        screen.blit(play_txt, play_txt_rect)
+
+        # Draw quit button
+        pygame.draw.rect(screen, (200, 50, 50), self.quit_button_rect)
+        quit_txt = self.font_button.render('Sair', True, (255, 255, 255))
+        quit_txt_rect = quit_txt.get_rect(center=self.quit_button_rect.center)
+        screen.blit(quit_txt, quit_txt_rect)
 
 
 # ============================================================================
 # SCORE SCREEN
 # ============================================================================
 
-class ScoreScreen(threading.Thread):
+class ScoreScreen(Scene):
     """Score screen shown after game ends, with 'Voltar para o Menu' button."""
 
+    caption = 'PyNetworkBattleship - Score'
+
     def __init__(self, score, hits, times_hit):
-        super().__init__(daemon=True)
-        self.running = False
-        self.clock = None
+        super().__init__()
         self.choice = None  # "menu" or None
         self.score = score
         self.hits = hits
         self.times_hit = times_hit
+        self.back_button_rect = None
 
     def start(self):
         if not PYGAME_AVAILABLE:
@@ -130,94 +603,90 @@ class ScoreScreen(threading.Thread):
             self.running = False
             self.choice = "menu"  # Auto-return to menu if pygame unavailable
             return
-        self.running = True
         super().start()
 
-    def stop(self):
-        self.running = False
+    def enter(self, display):
+        self.font_title = display.font(70)
+        self.font_info = display.font(30)
+        self.font_button = display.font(35)
+        self.back_button_rect = pygame.Rect(150, 300, 300, 60)
 
-    def run(self):
-        try:
-            # Try to initialize pygame with retry
-            for attempt in range(3):
-                try:
-                    pygame.init()
-                    break
-                except Exception as e:
-                    if attempt < 2:
-                        import time
-                        time.sleep(0.2)
-                    else:
-                        raise
-            
-            screen = pygame.display.set_mode((600, 400))
-            pygame.display.set_caption('PyNetworkBattleship - Score')
-            self.clock = pygame.time.Clock()
-            font_title = pygame.font.SysFont(None, 70)
-            font_info = pygame.font.SysFont(None, 30)
-            font_button = pygame.font.SysFont(None, 35)
-
-            back_button_rect = pygame.Rect(150, 300, 300, 60)
-
-            while self.running and self.choice is None:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        self.choice = "menu"
-                        self.running = False
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        mx, my = pygame.mouse.get_pos()
-                        if back_button_rect.collidepoint(mx, my):
-                            self.choice = "menu"
-                            self.running = False
-
-                # Draw background
-                screen.fill((18, 24, 30))
-
-                # Draw score
-                score_txt = font_title.render(f'SCORE: {self.score}', True, (100, 255, 100))
-                score_rect = score_txt.get_rect(center=(300, 80))
-                screen.blit(score_txt, score_rect)
-
-                # Draw stats
-                stats_txt = font_info.render(f'Hits: {self.hits} | Hit by: {self.times_hit}', True, (200, 200, 200))
-                stats_rect = stats_txt.get_rect(center=(300, 180))
-                screen.blit(stats_txt, stats_rect)
-
-                # Draw back button
-                pygame.draw.rect(screen, (50, 100, 200), back_button_rect)
-                back_txt = font_button.render('Voltar para o Menu', True, (255, 255, 255))
-                back_txt_rect = back_txt.get_rect(center=back_button_rect.center)
-                screen.blit(back_txt, back_txt_rect)
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.choice = "menu"
+            self.running = False
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            mx, my = pygame.mouse.get_pos()
+            if self.back_button_rect.collidepoint(mx, my):
+                self.choice = "menu"
+                self.running = False
 
-                pygame.display.flip()
-                self.clock.tick(30)
+    def draw(self, screen):
+        # Draw background
+        screen.fill((18, 24, 30))
 
-        except Exception as e:
-            print(f"Score screen error: {e}")
-            print_exc_context()
-        finally:
-            try:
-                if PYGAME_AVAILABLE:
-                    pygame.quit()
-            except Exception:
-                pass
+        # Draw score
+        score_txt = self.font_title.render(f'SCORE: {self.score}', True, (100, 255, 100))
+        score_rect = score_txt.get_rect(center=(300, 80))
+        screen.blit(score_txt, score_rect)
+
+        # Draw stats
+        stats_txt = self.font_info.render(f'Hits: {self.hits} | Hit by: {self.times_hit}', True, (200, 200, 200))
+        stats_rect = stats_txt.get_rect(center=(300, 180))
+        screen.blit(stats_txt, stats_rect)
+
+        # Draw back button
+        pygame.draw.rect(screen, (50, 100, 200), self.back_button_rect)
+        back_txt = self.font_button.render('Voltar para o Menu', True, (255, 255, 255))
+        back_txt_rect = back_txt.get_rect(center=self.back_button_rect.center)
+        screen.blit(back_txt, back_txt_rect)
+
+
+# ============================================================================
+# GRID DRAWING (shared by the game and spectator scenes)
+# ============================================================================
+
+def draw_grid(screen, grid_size, margin, cell_size):
+    """Draw the grid lines of a grid_size x grid_size board."""
+    end = margin + grid_size * cell_size
+    for i in range(grid_size + 1):
+        x = margin + i * cell_size
+        pygame.draw.line(screen, (120, 120, 120), (x, margin), (x, end))
+        y = margin + i * cell_size
+        pygame.draw.line(screen, (120, 120, 120), (margin, y), (end, y))
+
+
+def draw_marker(screen, pos, margin, cell_size, color, scale=0.35):
+    """Draw a player marker centered on grid cell `pos`; returns its center."""
+    px = margin + pos[0] * cell_size + cell_size // 2
+    py = margin + pos[1] * cell_size + cell_size // 2
+    pygame.draw.circle(screen, color, (px, py), int(cell_size * scale))
+    return px, py
 
 
 # ============================================================================
 # GAME INTERFACE
 # ============================================================================
 
-class PygameInterface(threading.Thread):
-    """Threaded Pygame interface with grid, participants list, two-step scout, action history.
+class PygameInterface(Scene):
+    """Pygame game scene with grid, participants list, two-step scout, action history.
 
     - Left-click grid: send `shot:x,y` (if cooldown expired).
     - Right-click grid: move to cell and broadcast `moved` (20s cooldown, must be 1 block orthogonal).
     - Two-step scout: left-click IP to select, then left-click grid cell to send `scout:x,y IP`.
+    - Participants list: mouse wheel scrolls, typing filters (Backspace/Esc edit/clear).
     - Action history scrolls below participants list.
+    - F3 toggles the performance overlay (PerfOverlay).
+
+    Actions and cooldowns go through actions.GameActions (same rules as the
+    console frontend).
     """
 
-    def __init__(self, grid_size, my_position, my_ip, participants, players_hit, times_hit, 
-                 game_running_ref, lock, send_udp_to_all, send_tcp_message):
+    caption = 'PyNetworkBattleship'
+
+    def __init__(self, grid_size, my_position, my_ip, participants, players_hit, times_hit,
+                 game_running_ref, lock, send_udp_to_all, send_message, events=None, latency=None,
+                 net_stats=None, on_game_running=None, peer_stats=None):
         """
         Args:
             grid_size: Game grid size (typically 10)
@@ -226,13 +695,19 @@ class PygameInterface(threading.Thread):
             participants: Set of participant IPs (shared)
             players_hit: Set of players hit (shared)
             times_hit: Number of times hit (shared)
-            game_running_ref: Reference to game_running flag (can be globals dict)
+            game_running_ref: main's globals dict (position/hits/game_running), or the
+                initial game_running flag
             lock: Threading lock for shared state
             send_udp_to_all: Function to send UDP broadcast
-            send_tcp_message: Function to send TCP message
+            send_message: Function to send a direct message to one peer (scout)
+            events: EventChannel fed by the network threads (drained once per frame)
+            latency: LatencyTable with per-peer RTT/jitter (shown next to each participant)
+            net_stats: Callable returning the network counters (for the F3 overlay)
+            on_game_running: Called with the new flag when the scene changes it
+                (needed when game_running_ref is not the globals dict)
+            peer_stats: Callable(ips) returning per-peer counters (F3 overlay)
         """
-        super().__init__(daemon=True)
-        self.running = False
+        super().__init__()
         self.cell_size = 40
         self.margin = 20
         self.grid_size = grid_size
@@ -241,278 +716,363 @@ class PygameInterface(threading.Thread):
         self.button_height = 50
         self.width = self.grid_px + self.sidebar_width
         self.height = self.grid_px + self.button_height
-        self.clock = None
+        self.size = (self.width, self.height)
 
         # References to game state (shared with main.py)
-        self.my_position = my_position
         self.my_ip = my_ip
         self.participants = participants
         self.players_hit = players_hit
-        self.times_hit = times_hit
-        self.game_running_ref = game_running_ref
         self.lock = lock
-        self.send_udp_to_all = send_udp_to_all
-        self.send_tcp_message = send_tcp_message
+        self.latency = latency
+        self.net_stats = net_stats
+        self.peer_stats = peer_stats
 
         # GUI state
-        self.last_action_time = 0.0
-        self.cooldown = 0.0
         self.selected_hover = None
         self.scout_selected_ip = None
-        
-        # Action history
-        self.action_history = []
+
+        # Sidebar participant rows (only these many are drawn)
+        self.participant_rows = 12
+        self.participant_index = ParticipantIndex()
+        self._events_dropped = 0  # events.dropped na última sincronização do índice
+
+        # Network -> UI events; posting wakes the render loop
+        self.events = events if events is not None else EventChannel()
+        self.events.notify = self.wake
+
+        # Shot/scout/move/leave with cooldowns (logged as EV_ACTION)
+        self.actions = GameActions(grid_size, game_running_ref, lock, send_udp_to_all,
+                                   send_message, self.events, my_position, times_hit,
+                                   on_game_running=on_game_running)
+
+        # Action history (only touched by the UI thread)
+        self.action_history = deque(maxlen=50)
         self.history_scroll_offset = 0
-        
+
         # Leave button
         self.leave_button_rect = None
 
-    def _add_action(self, action_str):
-        """Add an action to the history log."""
-        ts = time.time()
-        self.action_history.append((ts, action_str))
-        if len(self.action_history) > 50:
-            self.action_history.pop(0)
+    def _drain_events(self):
+        """Apply queued network events to UI state. Called once per frame."""
+        for event in self.events.drain():
+            if event.kind == EV_JOINED:
+                self.participant_index.add(event.ip)
+            elif event.kind == EV_LEFT:
+                self.participant_index.remove(event.ip)
+                if self.scout_selected_ip == event.ip:
+                    self.scout_selected_ip = None
+            if event.text:
+                self.action_history.append((event.ts, event.text))
+        # canal cheio perdeu joins/leaves (ex.: lista com milhares de IPs): refaz do zero
+        if self.events.dropped != self._events_dropped or \
+                len(self.participant_index) != len(self.participants):
+            self._resync_participants()
+
+    def _resync_participants(self):
+        with self._locked():
+            current = list(self.participants)
+        self._events_dropped = self.events.dropped
+        self.participant_index.reset(current)
+        if self.scout_selected_ip is not None and self.scout_selected_ip not in self.participant_index:
+            self.scout_selected_ip = None
+
+    def wake(self):
+        """Wake the render loop (called from network threads)."""
+        wake_ui()
 
     def start(self):
         if not PYGAME_AVAILABLE:
             print("Pygame not available; GUI disabled.")
             self.running = False
             return
-        self.running = True
         super().start()
 
-    def stop(self):
-        self.running = False
+    @property
+    def my_position(self):
+        return self.actions.my_position
 
-    def _can_do_action(self):
-        now = time.time()
-        return (now - self.last_action_time) >= self.cooldown
+    @property
+    def times_hit(self):
+        return self.actions.times_hit
 
-    def _set_action(self, cooldown_secs):
-        self.last_action_time = time.time()
-        self.cooldown = cooldown_secs
+    def _locked(self):
+        """The shared lock; timed by the overlay while it is shown."""
+        return self.actions.locked()
 
-    def _get_game_running(self):
-        """Get current game_running state."""
-        if isinstance(self.game_running_ref, dict):
-            return self.game_running_ref.get('game_running', False)
-        return self.game_running_ref
-
-    def _set_game_running(self, value):
-        """Set game_running state."""
-        if isinstance(self.game_running_ref, dict):
-            self.game_running_ref['game_running'] = value
+    def toggle_overlay(self):
+        if self.frame_stats is None:
+            self.frame_stats = PerfOverlay(self.net_stats, self.latency, self.peer_stats)
         else:
-            # Try to set in globals
-            try:
-                import main
-                main.game_running = value
-            except Exception:
-                pass
+            self.frame_stats = None
+        self.actions.lock_timer = self.frame_stats
+        wake_ui()
+
+    def enter(self, display):
+        self.font = display.font(18)
+        self.title_font = display.font(20)
+        # seed once; joins/leaves arrive through the event channel afterwards
+        # (resynced from participants if the channel drops any)
+        self._resync_participants()
+
+    def update(self):
+        if not self.actions.game_running:
+            self.running = False
+            return
+        self._drain_events()
 
-    def run(self):
-        try:
-            pygame.init()
-            screen = pygame.display.set_mode((self.width, self.height))
-            pygame.display.set_caption('PyNetworkBattleship')
-            self.clock = pygame.time.Clock()
-            font = pygame.font.SysFont(None, 18)
-            title_font = pygame.font.SysFont(None, 20)
-
-            while self.running and self._get_game_running():
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        print("Pygame: quit requested")
-                        self._set_game_running(False)
-                        self.running = False
-
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        mx, my = pygame.mouse.get_pos()
-
-                        # Check Leave button click
-                        if self.leave_button_rect is not None and self.leave_button_rect.collidepoint(mx, my):
-                            self._set_game_running(False)
-                            self.send_udp_to_all("saindo")
-                            print("Leaving game...")
-                            self.running = False
-                            continue
-
-                        # Clicked in participants sidebar
-                        if mx >= self.grid_px:
-                            with self.lock:
-                                part_list = list(self.participants)
-                            top = 40
-                            line_h = 20
-                            idx = (my - top) // line_h
-                            if 0 <= idx < len(part_list):
-                                target_ip = part_list[idx]
-                                if self.scout_selected_ip == target_ip:
-                                    self.scout_selected_ip = None
-                                    print(f"Scout deselected.")
-                                else:
-                                    self.scout_selected_ip = target_ip
-                                    print(f"Scout selected: {target_ip}. Agora clique em uma célula do grid.")
-                            continue
-
-                        # Clicked inside grid
-                        gx = (mx - self.margin) // self.cell_size
-                        gy = (my - self.margin) // self.cell_size
-                        if gx < 0 or gy < 0 or gx >= self.grid_size or gy >= self.grid_size:
-                            continue
-
-                        # Left click -> shot or scout
-                        if event.button == 1:
-                            if self.scout_selected_ip is not None:
-                                if not self._can_do_action():
-                                    print("Aguarde cooldown antes de outra ação.")
-                                else:
-                                    try:
-                                        self.send_tcp_message(self.scout_selected_ip, f"scout:{gx},{gy}")
-                                        self._add_action(f"scout:{gx},{gy} -> {self.scout_selected_ip}")
-                                        self._set_action(10.0)
-                                        self.scout_selected_ip = None
-                                    except Exception as e:
-                                        print(f"Pygame: erro ao enviar scout: {e}")
-                            else:
-                                if not self._can_do_action():
-                                    print("Aguarde cooldown antes de outra ação.")
-                                else:
-                                    try:
-                                        self.send_udp_to_all(f"shot:{gx},{gy}")
-                                        self._add_action(f"shot:{gx},{gy}")
-                                        self._set_action(10.0)
-                                    except Exception as e:
-                                        print(f"Pygame: erro ao enviar shot: {e}")
-
-                        # Right click -> move
-                        elif event.button == 3:
-                            if not self._can_do_action():
-                                print("Aguarde cooldown antes de outra ação.")
-                            else:
-                                try:
-                                    with self.lock:
-                                        cur_x, cur_y = self.my_position
-                                    dx = abs(gx - cur_x)
-                                    dy = abs(gy - cur_y)
-                                    if (dx + dy) == 1:
-                                        try:
-                                            with self.lock:
-                                                self.my_position = (gx, gy)
-                                            self.send_udp_to_all("moved")
-                                            self._add_action(f"move:{gx},{gy}")
-                                            self._set_action(20.0)
-                                        except Exception as e:
-                                            print(f"Pygame: erro ao mover: {e}")
-                                    else:
-                                        print("Movimento inválido: pode mover somente 1 bloco em x ou y.")
-                                except Exception as e:
-                                    print(f"Pygame: erro ao validar movimento: {e}")
-
-                # Draw background and grid
-                screen.fill((18, 24, 30))
-                for i in range(self.grid_size + 1):
-                    x = self.margin + i * self.cell_size
-                    pygame.draw.line(screen, (120, 120, 120), (x, self.margin), 
-                                    (x, self.margin + self.grid_size * self.cell_size))
-                    y = self.margin + i * self.cell_size
-                    pygame.draw.line(screen, (120, 120, 120), (self.margin, y), 
-                                    (self.margin + self.grid_size * self.cell_size, y))
-
-                # Draw my position
-                try:
-                    with self.lock:
-                        pos = self.my_position
-                except Exception:
-                    pos = None
-                if pos is not None:
-                    px = self.margin + pos[0] * self.cell_size + self.cell_size // 2
-                    py = self.margin + pos[1] * self.cell_size + self.cell_size // 2
-                    pygame.draw.circle(screen, (220, 50, 50), (px, py), int(self.cell_size * 0.35))
-
-                # Hover highlight
-                mx, my = pygame.mouse.get_pos()
-                gx = (mx - self.margin) // self.cell_size
-                gy = (my - self.margin) // self.cell_size
-                hover_valid = (0 <= gx < self.grid_size and 0 <= gy < self.grid_size)
-                if hover_valid:
-                    rx = self.margin + gx * self.cell_size
-                    ry = self.margin + gy * self.cell_size
-                    pygame.draw.rect(screen, (255, 255, 255), (rx, ry, self.cell_size, self.cell_size), 2)
-                    self.selected_hover = (gx, gy)
-                else:
-                    self.selected_hover = None
-
-                # Sidebar: participants list
-                sidebar_x = self.grid_px
-                pygame.draw.rect(screen, (28, 34, 40), (sidebar_x, 0, self.sidebar_width, self.height))
-                title = title_font.render('Participants', True, (230, 230, 230))
-                screen.blit(title, (sidebar_x + 10, 10))
-                with self.lock:
-                    part_list = list(self.participants)
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            print("Pygame: quit requested")
+            self.actions.game_running = False
+            self.running = False
+
+        elif event.type == pygame.KEYDOWN:
+            # type-to-filter the participants list
+            text = self.participant_index.filter_text
+            if event.key == pygame.K_F3:
+                self.toggle_overlay()
+            elif event.key == pygame.K_BACKSPACE:
+                self.participant_index.set_filter(text[:-1])
+            elif event.key == pygame.K_ESCAPE:
+                self.participant_index.set_filter("")
+            elif event.unicode and event.unicode.isprintable():
+                self.participant_index.set_filter(text + event.unicode)
+
+        elif event.type == pygame.MOUSEWHEEL:
+            mx, _ = pygame.mouse.get_pos()
+            if mx >= self.grid_px:
+                self.participant_index.scroll_by(-event.y, self.participant_rows)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button in (4, 5):
+                # wheel (also delivered as MOUSEWHEEL)
+                return
+
+            mx, my = pygame.mouse.get_pos()
+
+            # Check Leave button click
+            if self.leave_button_rect is not None and self.leave_button_rect.collidepoint(mx, my):
+                self.actions.leave()
+                print("Leaving game...")
+                self.running = False
+                return
+
+            # Clicked in participants sidebar
+            if mx >= self.grid_px:
                 top = 40
                 line_h = 20
-                for i, p in enumerate(part_list):
-                    if p == self.scout_selected_ip:
-                        color = (255, 200, 100)
+                target_ip = self.participant_index.row_at((my - top) // line_h, self.participant_rows)
+                if target_ip is not None:
+                    if self.scout_selected_ip == target_ip:
+                        self.scout_selected_ip = None
+                        print(f"Scout deselected.")
                     else:
-                        color = (200, 200, 200)
-                    txt = font.render(p, True, color)
-                    screen.blit(txt, (sidebar_x + 10, top + i * line_h))
-                
-                # Action history
-                hist_top = top + len(part_list) * line_h + 20
-                hist_title = font.render('History', True, (230, 230, 230))
-                screen.blit(hist_title, (sidebar_x + 10, hist_top))
-                hist_top += 20
-                hist_height = self.height - hist_top - 10
-                
-                for i, (ts, action_str) in enumerate(self.action_history[self.history_scroll_offset:]):
-                    if i * line_h >= hist_height:
-                        break
-                    display_str = action_str[:50] if len(action_str) > 50 else action_str
-                    hist_txt = font.render(display_str, True, (150, 150, 200))
-                    screen.blit(hist_txt, (sidebar_x + 10, hist_top + i * line_h))
-
-                # Cooldown and status
-                now = time.time()
-                remaining = 0.0
-                if (now - self.last_action_time) < self.cooldown:
-                    remaining = self.cooldown - (now - self.last_action_time)
-                status_lines = [f"IP: {self.my_ip}", f"Pos: {self.my_position}", 
-                               f"Players: {len(self.participants)}", f"Hits: {self.times_hit}"]
-                for i, line in enumerate(status_lines):
-                    surf = font.render(line, True, (230, 230, 230))
-                    screen.blit(surf, (10, 10 + i * 18))
-
-                if remaining > 0:
-                    rem_s = int(remaining + 0.999)
-                    cd_surf = title_font.render(f'Cooldown: {rem_s}s', True, (255, 200, 60))
-                    screen.blit(cd_surf, (sidebar_x + 10, self.height - 30))
-
-                # Button area background
-                pygame.draw.rect(screen, (18, 24, 30), (0, self.grid_px, self.grid_px, self.button_height))
-
-                # Leave button
-                button_y = self.grid_px + 10
-                button_x = self.margin
-                button_w = self.grid_px - self.margin * 2
-                button_h = 30
-                self.leave_button_rect = pygame.Rect(button_x, button_y, button_w, button_h)
-                pygame.draw.rect(screen, (200, 50, 50), self.leave_button_rect)
-                button_txt = font.render('Sair', True, (255, 255, 255))
-                btn_rect = button_txt.get_rect(center=self.leave_button_rect.center)
-                screen.blit(button_txt, btn_rect)
+                        self.scout_selected_ip = target_ip
+                        print(f"Scout selected: {target_ip}. Agora clique em uma célula do grid.")
+                return
 
-                pygame.display.flip()
-                self.clock.tick(30)
+            # Clicked inside grid
+            gx = (mx - self.margin) // self.cell_size
+            gy = (my - self.margin) // self.cell_size
+            if gx < 0 or gy < 0 or gx >= self.grid_size or gy >= self.grid_size:
+                return
 
-        except Exception as e:
-            print(f"Pygame UI error: {e}")
-            print_exc_context()
-        finally:
+            # Left click -> shot or scout; right click -> move
             try:
-                if PYGAME_AVAILABLE:
-                    pygame.quit()
-            except Exception:
-                pass
+                if event.button == 1 and self.scout_selected_ip is not None:
+                    self.actions.scout(self.scout_selected_ip, gx, gy)
+                    self.scout_selected_ip = None
+                elif event.button == 1:
+                    self.actions.shot(gx, gy)
+                elif event.button == 3:
+                    self.actions.move_to(gx, gy)
+            except ActionRefused as e:
+                print(e)
+            except Exception as e:
+                print(f"Pygame: erro ao enviar ação: {e}")
+
+    def draw(self, screen):
+        font = self.font
+        title_font = self.title_font
+
+        # Draw background and grid
+        screen.fill((18, 24, 30))
+        draw_grid(screen, self.grid_size, self.margin, self.cell_size)
+
+        # Draw my position
+        try:
+            with self._locked():
+                pos = self.my_position
+        except Exception:
+            pos = None
+        if pos is not None:
+            draw_marker(screen, pos, self.margin, self.cell_size, (220, 50, 50))
+
+        # Hover highlight
+        mx, my = pygame.mouse.get_pos()
+        gx = (mx - self.margin) // self.cell_size
+        gy = (my - self.margin) // self.cell_size
+        hover_valid = (0 <= gx < self.grid_size and 0 <= gy < self.grid_size)
+        if hover_valid:
+            rx = self.margin + gx * self.cell_size
+            ry = self.margin + gy * self.cell_size
+            pygame.draw.rect(screen, (255, 255, 255), (rx, ry, self.cell_size, self.cell_size), 2)
+            self.selected_hover = (gx, gy)
+        else:
+            self.selected_hover = None
+
+        # Sidebar: participants list
+        sidebar_x = self.grid_px
+        pygame.draw.rect(screen, (28, 34, 40), (sidebar_x, 0, self.sidebar_width, self.height))
+        index = self.participant_index
+        title_str = f'Participants ({len(index)})'
+        if index.filter_text:
+            title_str += f'  filtro: {index.filter_text}_ ({len(index.rows())})'
+        title = title_font.render(title_str, True, (230, 230, 230))
+        screen.blit(title, (sidebar_x + 10, 10))
+        top = 40
+        line_h = 20
+        part_list = index.visible(self.participant_rows)
+        for i, p in enumerate(part_list):
+            if p == self.scout_selected_ip:
+                color = (255, 200, 100)
+            else:
+                color = (200, 200, 200)
+            txt = font.render(p, True, color)
+            screen.blit(txt, (sidebar_x + 10, top + i * line_h))
+            if self.latency is not None:
+                lat_txt = font.render(self.latency.describe(p), True, (140, 160, 140))
+                screen.blit(lat_txt, (sidebar_x + 180, top + i * line_h))
+
+        # Action history
+        hist_top = top + self.participant_rows * line_h + 20
+        hist_title = font.render('History', True, (230, 230, 230))
+        screen.blit(hist_title, (sidebar_x + 10, hist_top))
+        hist_top += 20
+        hist_height = self.height - hist_top - 10
+
+        visible_history = itertools.islice(self.action_history, self.history_scroll_offset, None)
+        for i, (ts, action_str) in enumerate(visible_history):
+            if i * line_h >= hist_height:
+                break
+            display_str = action_str[:50] if len(action_str) > 50 else action_str
+            hist_txt = font.render(display_str, True, (150, 150, 200))
+            screen.blit(hist_txt, (sidebar_x + 10, hist_top + i * line_h))
+
+        # Cooldown and status
+        remaining = self.actions.remaining()
+        status_lines = [f"IP: {self.my_ip}", f"Pos: {self.my_position}",
+                       f"Players: {len(self.participant_index)}", f"Hits: {self.times_hit}"]
+        for i, line in enumerate(status_lines):
+            surf = font.render(line, True, (230, 230, 230))
+            screen.blit(surf, (10, 10 + i * 18))
+
+        if remaining > 0:
+            rem_s = int(remaining + 0.999)
+            cd_surf = title_font.render(f'Cooldown: {rem_s}s', True, (255, 200, 60))
+            screen.blit(cd_surf, (sidebar_x + 10, self.height - 30))
+
+        # Button area background
+        pygame.draw.rect(screen, (18, 24, 30), (0, self.grid_px, self.grid_px, self.button_height))
+
+        # Leave button
+        button_y = self.grid_px + 10
+        button_x = self.margin
+        button_w = self.grid_px - self.margin * 2
+        button_h = 30
+        self.leave_button_rect = pygame.Rect(button_x, button_y, button_w, button_h)
+        pygame.draw.rect(screen, (200, 50, 50), self.leave_button_rect)
+        button_txt = font.render('Sair', True, (255, 255, 255))
+        btn_rect = button_txt.get_rect(center=self.leave_button_rect.center)
+        screen.blit(button_txt, btn_rect)
+
+        overlay = self.frame_stats
+        if overlay is not None:
+            lines = overlay.lines(self.participant_index.rows(), len(self.action_history),
+                                  self.action_history.maxlen)
+            overlay.draw(screen, font, lines)
+
+
+# ============================================================================
+# SPECTATOR SCREEN
+# ============================================================================
+
+class SpectatorScreen(Scene):
+    """Read-only view of a match fed by spectator.SpectatorState.
+
+    Every publishing player is drawn on the same grid as PygameInterface
+    (several players on one cell share it), with a scoreboard and the
+    history of moves and hits derived from the delta frames.
+    """
+
+    caption = 'PyNetworkBattleship - Espectador'
+    PALETTE = ((220, 50, 50), (60, 160, 230), (90, 200, 90), (230, 190, 60),
+               (190, 90, 220), (230, 120, 60), (80, 210, 200), (220, 220, 220))
+
+    def __init__(self, state, source, grid_size=10):
+        super().__init__()
+        self.state = state
+        self.source = source
+        self.cell_size = 40
+        self.margin = 20
+        self.grid_size = grid_size
+        self.grid_px = grid_size * self.cell_size + self.margin * 2
+        self.sidebar_width = 350
+        self.width = self.grid_px + self.sidebar_width
+        self.height = self.grid_px
+        self.size = (self.width, self.height)
+        self.board_rows = 12
+        self.state.notify = wake_ui
+
+    def start(self):
+        if not PYGAME_AVAILABLE:
+            print("Pygame not available; spectator screen disabled.")
+            self.running = False
+            return
+        super().start()
+
+    def enter(self, display):
+        self.font = display.font(18)
+        self.title_font = display.font(20)
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+
+    def _color(self, src):
+        return self.PALETTE[sum(src.encode()) % len(self.PALETTE)]
+
+    def draw(self, screen):
+        font = self.font
+        rows = self.state.snapshot()
+
+        screen.fill((18, 24, 30))
+        draw_grid(screen, self.grid_size, self.margin, self.cell_size)
+        stacked = {}
+        for src, pos, hits, times_hit, score in rows:
+            if pos is None:
+                continue
+            pos = tuple(pos)
+            depth = stacked.get(pos, 0)
+            stacked[pos] = depth + 1
+            draw_marker(screen, pos, self.margin, self.cell_size, self._color(src),
+                        scale=max(0.1, 0.35 - 0.08 * depth))
+
+        sidebar_x = self.grid_px
+        pygame.draw.rect(screen, (28, 34, 40), (sidebar_x, 0, self.sidebar_width, self.height))
+        title = self.title_font.render(f'Jogadores ({len(rows)}) via {self.source}', True, (230, 230, 230))
+        screen.blit(title, (sidebar_x + 10, 10))
+        top = 40
+        line_h = 20
+        for i, (src, pos, hits, times_hit, score) in enumerate(rows[:self.board_rows]):
+            txt = font.render(f'{src}  {score:+d} ({hits}/{times_hit})', True, self._color(src))
+            screen.blit(txt, (sidebar_x + 10, top + i * line_h))
+
+        hist_top = top + self.board_rows * line_h + 20
+        screen.blit(font.render('History', True, (230, 230, 230)), (sidebar_x + 10, hist_top))
+        hist_top += 20
+        for i, (ts, event) in enumerate(list(self.state.history)):
+            if hist_top + (i + 1) * line_h > self.height:
+                break
+            screen.blit(font.render(event[:50], True, (150, 150, 200)),
+                        (sidebar_x + 10, hist_top + i * line_h))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Bounded work handling: a fixed-size worker pool with a bounded queue
+(load shedding when full), per-key serial queues on top of it, and
+per-peer token-bucket rate limits.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/s, at most `burst` stored."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic() if now is None else now
+
+    def take(self, now, n=1):
+        """Take n tokens if available. Returns False (and takes nothing) otherwise."""
+        elapsed = now - self.stamp
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.stamp = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+class RateLimiter:
+    """One TokenBucket per key (peer). Idle buckets are pruned as the table grows."""
+
+    def __init__(self, rate, burst, max_keys=4096, idle_after=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle_after = idle_after
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def allow(self, key, now=None, n=1):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if bucket.take(now, n):
+                return True
+            self.limited += 1
+            return False
+
+    def _prune(self, now):
+        idle = [k for k, b in self._buckets.items() if now - b.stamp > self.idle_after]
+        for key in idle:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class WorkerPool:
+    """Fixed number of daemon threads consuming a bounded queue.
+
+    submit() never blocks: when the queue is full the job is rejected
+    (load shedding) and the caller decides what to drop.
+    """
+
+    def __init__(self, workers, queue_size, name="worker"):
+        self.workers = workers
+        self.name = name
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.stats = {"submitted": 0, "shed": 0, "completed": 0, "errors": 0, "max_depth": 0}
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args):
+        """Queue fn(*args). Returns False if the queue is full (job shed)."""
+        self.start()
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            self.stats["shed"] += 1
+            return False
+        self.stats["submitted"] += 1
+        depth = self._queue.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        return True
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            with self._lock:
+                self.busy += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Erro em {self.name}: {e}")
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.stats["completed"] += 1
+
+
+class SerialQueues:
+    """Per-key FIFO of jobs run on a WorkerPool, one at a time per key.
+
+    Jobs for the same key (a peer) run in submission order and never
+    concurrently; different keys run in parallel on the pool, so a slow
+    key only delays its own jobs. At most `max_pending` jobs wait per key;
+    beyond that (or with the pool full) submit() sheds the job.
+    """
+
+    def __init__(self, pool, max_pending=64):
+        self.pool = pool
+        self.max_pending = max_pending
+        self._queues = {}  # key -> deque de (fn, args); presente = drenagem agendada
+        self._cond = threading.Condition()
+        self.stats = {"submitted": 0, "shed": 0}
+
+    def submit(self, key, fn, *args):
+        """Queue fn(*args) behind key's earlier jobs. Returns False if shed."""
+        with self._cond:
+            jobs = self._queues.get(key)
+            if jobs is not None:
+                if len(jobs) >= self.max_pending:
+                    self.stats["shed"] += 1
+                    return False
+                jobs.append((fn, args))
+                self.stats["submitted"] += 1
+                return True
+            self._queues[key] = deque([(fn, args)])
+        if not self.pool.submit(self._drain, key):
+            with self._cond:
+                # descarta também o que chegou para key nesse meio tempo
+                self.stats["shed"] += len(self._queues.pop(key))
+                self._cond.notify_all()
+            return False
+        with self._cond:
+            self.stats["submitted"] += 1
+        return True
+
+    def _drain(self, key):
+        while True:
+            with self._cond:
+                jobs = self._queues[key]
+                if not jobs:
+                    del self._queues[key]
+                    self._cond.notify_all()
+                    return
+                fn, args = jobs[0]
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Erro em {self.pool.name} ({key}): {e}")
+            finally:
+                with self._cond:
+                    jobs.popleft()
+
+    def pending(self):
+        with self._cond:
+            return sum(len(jobs) for jobs in self._queues.values())
+
+    def join(self, timeout=None):
+        """Wait until every queued job ran (True) or timeout expired (False)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queues, timeout)